@@ -1,29 +1,57 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+import time
+# Arranque en frío: medido desde la primera importación del módulo
+API_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import sys
 from pathlib import Path
-import tempfile
 import os
 import shutil
 import uuid
+import asyncio
 from typing import List, Dict, Any
 
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent / 'src'))
 
 from compliance_checker import EPPComplianceChecker
-from chatbot_final import ChatbotEPP
+from chatbot_final import INTENTS as CHATBOT_INTENTS, ChatbotEPP
+from intent_router import Intent, IntentRouter
+from model_registry import registry
+from batch_scheduler import InferenceQueueFull, MicroBatcher
+from media_store import InMemoryMediaStore
+from video_jobs import JobQueueFull, JobStore, VideoJobManager
+from video_pipeline import VideoPipeline
+from frame_sampler import AdaptiveFrameSampler, FixedFrameSampler, person_class_id
+from tracker import PersonTracker, draw_tracks
+from association import associate
+from video_stats import DetectionStats
+from video_writer import open_video_writer
+from media_http import bytes_response, file_response
+from retention import RetentionManager
+from session_store import SESSION_COOKIE, open_session_store, session_id_from
+from upload_spool import BodySizeLimit, UnsupportedContainer, UploadTooLarge, spool_upload
+from startup import ModelWarmup, heavy_modules
+import tracing
+from metrics import (
+    metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE, REQUEST_LATENCY, REQUEST_EXCEPTIONS,
+    MODEL_STAGE_SECONDS, VIDEO_JOB_FPS, DETECTIONS_PER_IMAGE, QUEUE_DEPTH
+)
+from result_cache import ResultCache, bytes_digest, file_digest
 
 # ============================================
 # DIRECTORIOS PARA ARCHIVOS PROCESADOS
 # ============================================
-PROCESSED_DIR = Path(__file__).parent / "processed"
-PROCESSED_DIR.mkdir(exist_ok=True)
+PROCESSED_DIR = Path(os.environ.get("EPP_PROCESSED_DIR", Path(__file__).parent / "processed"))
+PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 IMAGES_DIR = PROCESSED_DIR / "images"
 IMAGES_DIR.mkdir(exist_ok=True)
 VIDEOS_DIR = PROCESSED_DIR / "videos"
 VIDEOS_DIR.mkdir(exist_ok=True)
+UPLOADS_DIR = PROCESSED_DIR / "uploads"
+UPLOADS_DIR.mkdir(exist_ok=True)
 
 # ============================================
 # CREAR APP FASTAPI
@@ -34,6 +62,12 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Tamaño máximo de video subido, aplicado mientras llega el cuerpo.
+# Se añade antes que CORS para quedar por dentro: el 413 también lleva
+# las cabeceras CORS y el navegador puede leerlo.
+MAX_UPLOAD_BYTES = int(float(os.environ.get("EPP_MAX_UPLOAD_MB", "2048")) * 1024 * 1024)
+app.add_middleware(BodySizeLimit, max_bytes=MAX_UPLOAD_BYTES, paths=["/api/detect/video"])
+
 # ============================================
 # CONFIGURAR CORS PARA REACT
 # ============================================
@@ -43,24 +77,515 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-Id"],
 )
 
+
+# ============================================
+# MÉTRICAS DE PETICIONES
+# ============================================
+def _route_label(request):
+    """Plantilla de la ruta (no la URL concreta) para acotar las series"""
+    route = request.scope.get("route")
+    return route.path if route else "unmatched"
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Latencia de cada petición por método, ruta y estado
+
+    Si el endpoint lanza una excepción se registra igual, con estado 500
+    (el que devolverá ServerErrorMiddleware), y se cuenta aparte.
+    """
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    except Exception:
+        REQUEST_EXCEPTIONS.labels(request.method, _route_label(request)).inc()
+        raise
+    finally:
+        REQUEST_LATENCY.labels(
+            request.method, _route_label(request), status_code
+        ).observe(time.perf_counter() - start)
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Desglose de tiempos por etapa si la petición lo pide
+    (X-EPP-Trace: 1 o ?trace=1); sin la marca no se crea ninguna traza
+    """
+    if not tracing.requested(request.headers, request.query_params):
+        return await call_next(request)
+    with tracing.start_trace(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = trace.server_timing()
+    tracing.export(trace)
+    return response
+
 # ============================================
 # INICIALIZAR MODELOS
 # ============================================
-MODEL_PATH = "runs/detect/train10/weights/best.pt"
-checker = EPPComplianceChecker(MODEL_PATH)
-chatbot = ChatbotEPP(MODEL_PATH)
+# EPP_MODEL_PATH permite usar un .onnx exportado (backend CPU, ver export_model.py)
+MODEL_PATH = os.environ.get("EPP_MODEL_PATH", "runs/detect/train10/weights/best.pt")
+# Cascada persona-primero para cámaras 1080p/4K (EPP buscado en recortes)
+CASCADE = os.environ.get("EPP_CASCADE", "0") == "1"
+# Un solo modelo en memoria compartido por checker, chatbot y video.
+# Se carga en segundo plano al arrancar (ver _warm_up_model), no al importar
+checker = EPPComplianceChecker(MODEL_PATH, cascade=CASCADE, lazy=True)
+chatbot = ChatbotEPP(MODEL_PATH, checker=checker)
+
+# Micro-batching: imágenes concurrentes comparten una sola llamada a predict
+BATCH_MAX_SIZE = int(os.environ.get("EPP_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("EPP_BATCH_MAX_WAIT_MS", "10"))
+BATCH_MAX_QUEUE = int(os.environ.get("EPP_BATCH_MAX_QUEUE", "64"))
+
+
+# Las imágenes se procesan en memoria; escribir el resultado es opcional
+PERSIST_OUTPUTS = os.environ.get("EPP_PERSIST_OUTPUTS", "1") == "1"
+memory_images = InMemoryMediaStore(max_items=int(os.environ.get("EPP_MEMORY_IMAGES", "256")))
+
 
-# Variable global para almacenar el último análisis
-last_analysis = {
+def _detect_image_batch(items):
+    """
+    Procesa un lote de (bytes_subidos, ruta_salida) con una inferencia
+    
+    Decodifica con imdecode, detecta sobre los arrays y codifica el JPEG
+    anotado en memoria. Si ruta_salida es None no se escribe a disco.
+    """
+    import cv2
+    import numpy as np
+    
+    results = [None] * len(items)
+    decoded, images = [], []
+    with tracing.span("decode", images=len(items)):
+        for i, (data, _) in enumerate(items):
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                results[i] = ValueError("No se pudo decodificar la imagen")
+            else:
+                decoded.append(i)
+                images.append(image)
+    
+    if not images:
+        return results
+    
+    for i, (annotated, detections, compliance) in zip(decoded, checker.detect_image_batch(images)):
+        counts = dict.fromkeys(checker.model.names.values(), 0)
+        for detection in detections:
+            counts[detection["class"]] += 1
+        for class_name, count in counts.items():
+            DETECTIONS_PER_IMAGE.labels(class_name).observe(count)
+        with tracing.span("imencode"):
+            _, encoded = cv2.imencode(".jpg", annotated)
+            jpeg = encoded.tobytes()
+        output_path = items[i][1]
+        if output_path is not None:
+            with tracing.span("file_write", bytes=len(jpeg)), open(output_path, "wb") as f:
+                f.write(jpeg)
+        results[i] = (jpeg, detections, compliance)
+    return results
+
+
+batcher = MicroBatcher(
+    _detect_image_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_queue=BATCH_MAX_QUEUE
+)
+
+# ============================================
+# CACHÉ DE RESULTADOS (por contenido)
+# ============================================
+# Clave = hash de la subida + hash de los pesos + umbrales. Solo se usa
+# cuando los resultados se escriben en processed/ (el artefacto en disco
+# es parte de la entrada de caché).
+CACHE_ENABLED = os.environ.get("EPP_CACHE", "1") == "1" and PERSIST_OUTPUTS
+MODEL_DIGEST = file_digest(MODEL_PATH) if os.path.exists(MODEL_PATH) else MODEL_PATH
+if MODEL_PATH.endswith(".onnx"):
+    # El mismo ONNX puede dar salidas ligeramente distintas según el runtime
+    MODEL_DIGEST += ":" + os.environ.get("EPP_BACKEND", "onnxruntime")
+IMAGE_CACHE_PARAMS = {
+    "kind": "image", "analysis_conf": 0.25, "display_conf": 0.5, "display_iou": 0.4,
+    "cascade": CASCADE
+}
+# EPP_CACHE_MAX_MB limita solo el índice (JSON); las imágenes y videos
+# procesados los borra la retención (EPP_RETENTION_*), no la caché
+result_cache = ResultCache(
+    PROCESSED_DIR / "cache",
+    max_memory_entries=int(os.environ.get("EPP_CACHE_MEMORY_ENTRIES", "512")),
+    max_disk_bytes=int(os.environ.get("EPP_CACHE_MAX_MB", "256")) * 1024 * 1024
+)
+
+# Último análisis de cada sesión (contexto del chatbot); EPP_SESSION_BACKEND=sqlite
+# lo comparte entre varios workers de uvicorn
+sessions = open_session_store(db_path=PROCESSED_DIR / "sessions.db")
+EMPTY_ANALYSIS = {
     "compliance": None,
     "missing_items": [],
     "detections": []
 }
 
+
+def _session_id(request: Request, http_response: Response):
+    """Id de sesión del cliente; si es nuevo se le devuelve en una cookie"""
+    session_id, is_new = session_id_from(request)
+    if is_new:
+        http_response.set_cookie(SESSION_COOKIE, session_id, max_age=int(sessions.ttl_seconds),
+                                 httponly=True, samesite="lax")
+    http_response.headers["X-Session-Id"] = session_id
+    return session_id
+
+# ============================================
+# ARRANQUE DEL MODELO EN SEGUNDO PLANO
+# ============================================
+
+def _warm_up_model():
+    """
+    Inferencia de prueba con una imagen vacía
+
+    Inicializa el predictor de ultralytics y el camino de anotación (NMS de
+    visualización) fuera de la primera petición real. Usa model.predict
+    directamente para no contar en las métricas de inferencia.
+    """
+    import numpy as np
+
+    dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+    sizes = [checker.person_imgsz, checker.crop_imgsz] if checker.cascade else [None]
+    with registry.lock_for(MODEL_PATH):
+        for imgsz in sizes:
+            kwargs = {"imgsz": imgsz} if imgsz else {}
+            results = checker.model.predict(dummy, conf=0.25, verbose=False, **kwargs)
+    checker.annotate_results(results[0], "warmup")
+
+
+warmup = ModelWarmup(load=checker.load, warm=_warm_up_model, imports=heavy_modules(MODEL_PATH))
+
+
+def _require_model():
+    """503 con Retry-After mientras el modelo no esté listo"""
+    if warmup.ready:
+        return
+    if warmup.state == "failed":
+        raise HTTPException(status_code=503, detail=f"El modelo no se pudo cargar: {warmup.error}")
+    raise HTTPException(status_code=503, detail="El modelo se está cargando, reintenta en unos segundos",
+                        headers={"Retry-After": "2"})
+
+
+API_IMPORT_SECONDS = time.perf_counter() - API_IMPORT_STARTED
 print("✅ API EPP Detection iniciada correctamente")
-print(f"📍 Modelo cargado: {MODEL_PATH}")
+print(f"📍 Modelo: {MODEL_PATH} (se carga en segundo plano, importación {API_IMPORT_SECONDS:.2f} s)")
+
+# ============================================
+# PROCESAMIENTO DE VIDEO
+# ============================================
+
+def procesar_video(input_path, output_filename, progress=None, batch_size=1):
+    """
+    Detectar EPP en un video con YOLO frame por frame (bloqueante)
+    
+    Se ejecuta en los workers de la cola de trabajos, nunca en el event loop.
+    
+    Args:
+        input_path: Ruta del video a procesar
+        output_filename: Nombre del archivo de salida en VIDEOS_DIR
+        progress: Callback progress(frames_procesados, total_frames)
+        batch_size: Frames por llamada a predict
+    
+    Returns:
+        tuple: (estadísticas, nombre final del video procesado)
+    """
+    import cv2
+    
+    output_path = VIDEOS_DIR / output_filename
+    
+    # Procesar video con YOLO
+    print(f"📹 Procesando video: {input_path}")
+
+    # Abrir video
+    with tracing.span("open"):
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            raise Exception("No se pudo abrir el video")
+
+        # Obtener propiedades del video
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Escritor H.264: ffmpeg por tubería (MP4 fragmentado) o OpenCV
+        # avc1 con respaldo XVID .avi si ffmpeg no está instalado
+        out = open_video_writer(output_path, fps, (width, height), codecs=('avc1',))
+        output_path = Path(out.path)
+        output_filename = output_path.name
+
+    # Modelo YOLO compartido (ya cargado en el registro)
+    model = registry.get(MODEL_PATH)
+
+    # Estadísticas en streaming: memoria constante aunque el video dure horas
+    detection_stats = DetectionStats()
+    tracker = PersonTracker()  # Identidad estable y EPP por persona
+
+    # Muestreo: adaptativo por movimiento o fijo cada 3 frames
+    if VIDEO_SAMPLING == "adaptive":
+        sampler = AdaptiveFrameSampler(person_class_id=person_class_id(model.names))
+    else:
+        sampler = FixedFrameSampler(interval=3)
+
+    print(f"📊 Total frames: {total_frames}, FPS: {fps}")
+
+    def infer_batch(frames):
+        """Etapa de inferencia: un predict por lote de frames (o cascada)"""
+        results = checker.predict(frames, conf=0.4)
+        for result in results:
+            sampler.observe(result)
+        return results
+
+    def handle_frame(frame_count, frame, result):
+        """Etapa de anotación: analiza el frame y devuelve lo que se escribe"""
+        # Reportar progreso al trabajo
+        if progress is not None:
+            progress(frame_count, total_frames)
+
+        if result is None:
+            # Frame sin inferencia: el tracker estima dónde está cada persona
+            return draw_tracks(frame, tracker.predicted_boxes(frame_count))
+
+        # Dibujar detecciones en el frame
+        annotated_frame = result.plot()
+
+        # Analizar detecciones del frame
+        frame_persons = []
+        frame_helmets = []
+        frame_vests = []
+        frame_gloves = []
+        frame_goggles = []
+        frame_boots = []
+
+        for box in result.boxes:
+            class_id = int(box.cls[0])
+            class_name = model.names[class_id]
+            confidence = float(box.conf[0])
+            bbox = box.xyxy[0].cpu().numpy()
+
+            detection_stats.add(class_name, confidence)
+
+            # Clasificar por tipo
+            if class_name == 'Person':
+                frame_persons.append((bbox, confidence))
+            elif class_name in ['helmet', 'Helmet']:
+                frame_helmets.append(bbox)
+            elif class_name in ['vest', 'Vest']:
+                frame_vests.append(bbox)
+            elif class_name in ['gloves', 'Gloves']:
+                frame_gloves.append(bbox)
+            elif class_name in ['goggles', 'Goggles']:
+                frame_goggles.append(bbox)
+            elif class_name in ['boots', 'Boots']:
+                frame_boots.append(bbox)
+
+        # Asignar cada persona a su track y acumular su EPP
+        tracks = tracker.update(
+            [box for box, _ in frame_persons],
+            [conf for _, conf in frame_persons],
+            frame_count
+        )
+        flags = associate([box for box, _ in frame_persons], {
+            'helmet': frame_helmets,
+            'vest': frame_vests,
+            'gloves': frame_gloves,
+            'goggles': frame_goggles,
+            'boots': frame_boots
+        })
+        for i, track in enumerate(tracks):
+            if track is None:
+                continue
+
+            # Superposición con EPP de esta persona en este frame
+            track.mark_epp({item: bool(present[i]) for item, present in flags.items()})
+
+        draw_tracks(annotated_frame, [
+            (track, track.box) for track in tracks if track is not None
+        ])
+
+        return annotated_frame
+
+    # Decodificación, inferencia y codificación en etapas solapadas;
+    # el muestreador decide qué frames pasan por YOLO
+    pipeline = VideoPipeline(
+        infer_batch,
+        handle_frame,
+        out,
+        batch_size=batch_size,
+        should_infer=sampler.should_infer,
+        revisit=sampler.revisit
+    )
+    try:
+        with tracing.span("pipeline"):
+            pipeline_stats = pipeline.run(cap)
+            # Los hilos del pipeline no llevan la traza: tiempo ocupado por etapa
+            for stage, stage_stats in pipeline_stats['stages'].items():
+                tracing.record(stage, stage_stats['busy_seconds'], frames=stage_stats['frames'])
+    finally:
+        # Liberar recursos
+        cap.release()
+        with tracing.span("encoder_flush"):
+            out.release()
+    frame_count = pipeline_stats['frames']
+
+    print(f"✅ Video procesado: {output_path}")
+
+    # Calcular implementos faltantes por persona (un track = una persona)
+    persons = tracker.confirmed()
+    missing_items_list = []
+    for person_num, track in enumerate(persons, start=1):
+        epp_status = track.epp
+        missing = []
+        if not epp_status['helmet']:
+            missing.append('Casco')
+        if not epp_status['vest']:
+            missing.append('Chaleco')
+        if not epp_status['gloves']:
+            missing.append('Guantes')
+        if not epp_status['goggles']:
+            missing.append('Gafas')
+
+        if missing:
+            missing_items_list.append({
+                "person_id": person_num,
+                "track_id": track.track_id,
+                "missing": missing
+            })
+
+    # Calcular cumplimiento general
+    total_persons = len(persons)
+    compliant_persons = sum(1 for track in persons if track.complies)
+    compliance = compliant_persons == total_persons if total_persons > 0 else False
+
+    stats = {
+        "total_frames": total_frames,
+        "processed_frames": frame_count,
+        "avg_detections": detection_stats.total / frame_count if frame_count > 0 else 0,
+        "compliance": compliance,
+        "total_persons": total_persons,
+        "compliant_persons": compliant_persons,
+        "missing_items": missing_items_list,
+        "detections": detection_stats.summary(limit=15),  # Confianza media por clase
+        "sampling": sampler.stats(),
+        "inferred_frames": sampler.inferred,
+        "skipped_frames": sampler.skipped,
+        "pipeline": pipeline_stats,
+        "encoder": out.stats()
+    }
+
+    return stats, output_filename
+
+
+def procesar_video_job(input_path, output_filename, progress=None, batch_size=1,
+                       cache_key=None, trace=False, upload=None):
+    """
+    Worker de la cola: procesa el video y guarda el resultado en caché
+    
+    Con trace=True el desglose de tiempos queda en stats["timings"];
+    los datos de la subida (tamaño, contenedor, memoria) en stats["upload"].
+    """
+    with tracing.start_trace("video_job", enabled=trace, batch_size=batch_size) as job_trace:
+        stats, output_filename = procesar_video(input_path, output_filename, progress, batch_size)
+    VIDEO_JOB_FPS.observe(stats["pipeline"]["fps"])
+    if cache_key is not None:
+        result_cache.put(
+            cache_key,
+            {"stats": stats, "processed_video_path": output_filename},
+            [VIDEOS_DIR / output_filename]
+        )
+    if upload is not None:
+        stats = {**stats, "upload": upload}
+    if job_trace is not None:
+        stats = {**stats, "timings": job_trace.breakdown()}
+        tracing.export(job_trace)
+    return stats, output_filename
+
+
+# ============================================
+# COLA DE TRABAJOS DE VIDEO
+# ============================================
+VIDEO_WORKERS = int(os.environ.get("EPP_VIDEO_WORKERS", "1"))
+VIDEO_MAX_PENDING = int(os.environ.get("EPP_VIDEO_MAX_PENDING", "16"))
+VIDEO_BATCH_SIZE = int(os.environ.get("EPP_VIDEO_BATCH_SIZE", "4"))
+VIDEO_SAMPLING = os.environ.get("EPP_VIDEO_SAMPLING", "adaptive")  # adaptive | fixed
+job_store = JobStore(PROCESSED_DIR / "jobs.db")
+job_manager = VideoJobManager(
+    job_store,
+    procesar_video_job,
+    workers=VIDEO_WORKERS,
+    max_pending=VIDEO_MAX_PENDING
+)
+
+
+# ============================================
+# RETENCIÓN DE ARCHIVOS PROCESADOS
+# ============================================
+def _active_job_files():
+    """Entradas y salidas de trabajos pendientes: nunca se borran"""
+    paths = set()
+    for input_path, output_filename in job_store.active_files():
+        paths.add(input_path)
+        paths.add(str(VIDEOS_DIR / output_filename))
+        paths.add(str(VIDEOS_DIR / output_filename.replace('.mp4', '.avi')))
+    return paths
+
+
+RETENTION_MAX_AGE = float(os.environ.get("EPP_RETENTION_MAX_AGE_HOURS", "168")) * 3600
+
+
+def _expire_records(removed):
+    """
+    Tras cada barrido: borra los trabajos cuyo video ya no existe y los
+    terminados hace más de la edad máxima (la tabla no crece sin límite)
+    """
+    videos_dir = os.path.abspath(VIDEOS_DIR)
+    removed_videos = [os.path.basename(p) for p in removed if os.path.dirname(p) == videos_dir]
+    job_store.expire(time.time() - RETENTION_MAX_AGE, removed_videos)
+
+
+retention = RetentionManager(
+    [IMAGES_DIR, VIDEOS_DIR],
+    max_bytes=int(float(os.environ.get("EPP_RETENTION_MAX_GB", "10")) * 1024 ** 3),
+    max_age_seconds=RETENTION_MAX_AGE,
+    interval=float(os.environ.get("EPP_RETENTION_INTERVAL", "60")),
+    uploads_dir=UPLOADS_DIR,
+    protected=_active_job_files,
+    after_sweep=_expire_records
+)
+
+
+# Profundidad de colas, leída en cada scrape de /metrics
+QUEUE_DEPTH.set_function(lambda: batcher.metrics()["queue_depth"], "image_batch")
+QUEUE_DEPTH.set_function(lambda: job_store.count("queued"), "video_jobs")
+
+
+@app.on_event("startup")
+def start_model_warmup():
+    """Importar, cargar y calentar el modelo sin bloquear el arranque"""
+    warmup.start()
+
+
+@app.on_event("startup")
+def start_video_jobs():
+    """Arrancar workers de video y recuperar la cola persistida"""
+    job_manager.start()
+
+
+@app.on_event("startup")
+def start_retention():
+    """Barrido inicial de processed/ y limpieza periódica"""
+    retention.start()
+
 
 # ============================================
 # ENDPOINTS
@@ -83,17 +608,38 @@ async def root():
         }
     }
 
+def _startup_stats():
+    stats = warmup.stats()
+    stats["timings"]["api_import_seconds"] = API_IMPORT_SECONDS
+    return stats
+
+@app.get("/live")
+async def liveness():
+    """El proceso responde (no depende del modelo)"""
+    return {"status": "alive"}
+
+@app.get("/ready")
+async def readiness():
+    """Listo para detectar: 200 con el modelo cargado y calentado, si no 503"""
+    stats = _startup_stats()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=stats, headers={"Retry-After": "2"})
+    return stats
+
 @app.get("/api/health")
 async def health_check():
     """Verificar estado de la API"""
     return {
-        "status": "healthy",
-        "model_loaded": True,
-        "model_path": MODEL_PATH
+        "status": "healthy" if warmup.ready else warmup.state,
+        "model_loaded": checker.loaded,
+        "model_ready": warmup.ready,
+        "model_path": MODEL_PATH,
+        "models": registry.loaded(),
+        "startup": _startup_stats()
     }
 
 @app.post("/api/detect/image")
-async def detect_image(file: UploadFile = File(...)):
+async def detect_image(request: Request, http_response: Response, file: UploadFile = File(...)):
     """
     Detectar EPP en una imagen
     
@@ -101,296 +647,248 @@ async def detect_image(file: UploadFile = File(...)):
         file: Archivo de imagen (jpg, jpeg, png)
     
     Returns:
-        JSON con detecciones y ruta de imagen procesada
+        JSON con detecciones y ruta de imagen procesada.
+        503 con Retry-After si la cola de lotes está llena o el modelo
+        aún se está cargando.
     """
     try:
         # Validar tipo de archivo
         if not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="El archivo debe ser una imagen")
         
-        # Guardar archivo temporal
-        temp_input = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-        temp_input.write(await file.read())
-        temp_input.close()
+        # Multipart ya recibido (y volcado por Starlette) al entrar aquí
+        tracing.record_since_start("upload_receive")
         
-        # Crear nombre único para archivo de salida
-        output_filename = f"processed_{uuid.uuid4().hex}.jpg"
-        output_path = IMAGES_DIR / output_filename
+        # Bytes de la subida: se decodifican en memoria, sin archivo temporal
+        with tracing.span("upload_read"):
+            contents = await file.read()
         
-        # Procesar imagen usando detect_and_save
-        result_path, detections, compliance = checker.detect_and_save(temp_input.name, str(output_path))
+        # Misma imagen, mismo modelo y umbrales: responder desde la caché
+        cache_key = None
+        cached = None
+        if CACHE_ENABLED:
+            with tracing.span("cache_lookup") as lookup:
+                cache_key = ResultCache.key(bytes_digest(contents), MODEL_DIGEST, IMAGE_CACHE_PARAMS)
+                cached = result_cache.get(cache_key)
+                lookup.set("hit", cached is not None)
         
-        # Guardar en variable global para el chatbot
-        global last_analysis
-        last_analysis = {
+        if cached is not None:
+            detections = cached["detections"]
+            compliance = cached["compliance"]
+            output_filename = cached["processed_image_path"]
+            retention.touch(IMAGES_DIR / output_filename)
+        else:
+            # Sin caché hace falta el modelo: 503 mientras arranca
+            _require_model()
+            
+            # Crear nombre único para archivo de salida
+            output_filename = f"processed_{uuid.uuid4().hex}.jpg"
+            output_path = str(IMAGES_DIR / output_filename) if PERSIST_OUTPUTS else None
+            
+            # Procesar imagen (lote compartido con otras peticiones)
+            try:
+                with tracing.span("batch"):
+                    jpeg, detections, compliance = await batcher.run(contents, output_path)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if not PERSIST_OUTPUTS:
+                memory_images.put(output_filename, jpeg)
+            if cache_key is not None:
+                result_cache.put(cache_key, {
+                    "detections": detections,
+                    "compliance": compliance,
+                    "processed_image_path": output_filename
+                }, [output_path])
+        
+        # Contexto del chatbot para esta sesión (no la de otros clientes)
+        sessions.put(_session_id(request, http_response), {
             "compliance": compliance,
             "missing_items": compliance.get("missing_items", []),
             "detections": detections,
             "total_persons": compliance.get("total_persons", 0)
-        }
+        })
         
         response = {
             "success": True,
             "detections": detections,
             "compliance": compliance,
             "processed_image_path": output_filename,  # Solo el nombre del archivo
-            "total_detections": len(detections)
+            "total_detections": len(detections),
+            "cached": cached is not None
         }
+        trace = tracing.current_trace()
+        if trace is not None:
+            response["timings"] = trace.breakdown()
         
-        # Limpiar archivo temporal de entrada
-        os.unlink(temp_input.name)
-        
-        return JSONResponse(content=response)
+        # Dict (no JSONResponse): FastAPI le añade la cookie y el
+        # X-Session-Id que _session_id dejó en http_response
+        return response
         
+    except HTTPException:
+        raise
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al procesar imagen: {str(e)}")
 
 @app.get("/api/image/{filename}")
-async def get_image(filename: str):
-    """Servir imagen procesada"""
+async def get_image(filename: str, request: Request):
+    """Servir imagen procesada (de memoria o de disco) con ETag y rangos"""
+    jpeg = memory_images.get(filename)
+    if jpeg is not None:
+        return bytes_response(request, jpeg, filename, "image/jpeg")
     file_path = IMAGES_DIR / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Imagen no encontrada")
-    return FileResponse(file_path)
+    retention.touch(file_path)
+    return file_response(request, file_path, "image/jpeg")
 
-@app.post("/api/detect/video")
-async def detect_video(file: UploadFile = File(...)):
+@app.post("/api/detect/video", status_code=202)
+async def detect_video(
+    file: UploadFile = File(...),
+    batch_size: int = Query(VIDEO_BATCH_SIZE, ge=1, le=32)
+):
     """
-    Detectar EPP en un video con YOLO frame por frame
+    Encolar un video para detección de EPP en segundo plano
     
     Args:
         file: Archivo de video (mp4, avi, mov)
+        batch_size: Frames agrupados por llamada al modelo
     
     Returns:
-        JSON con estadísticas y ruta de video procesado
+        JSON con el id del trabajo; el progreso y el resultado final
+        (mismo formato de estadísticas) se consultan en /api/jobs/{job_id}.
+        503 con Retry-After si ya hay EPP_VIDEO_MAX_PENDING trabajos
+        pendientes (mismo código que la cola llena de imágenes).
     """
     try:
-        import cv2
-        from ultralytics import YOLO
-        
         # Validar tipo de archivo
         if not file.content_type.startswith("video/"):
             raise HTTPException(status_code=400, detail="El archivo debe ser un video")
+
+        # Durante el calentamiento el trabajo se acepta y espera en la cola;
+        # solo se rechaza si la carga del modelo falló
+        if warmup.state == "failed":
+            _require_model()
+
+        # Copiar la subida por bloques a disco persistente (sobrevive
+        # reinicios); nunca se tiene el video completo en memoria
+        suffix = Path(file.filename or "").suffix or ".mp4"
+        input_path = UPLOADS_DIR / f"upload_{uuid.uuid4().hex}{suffix}"
+        try:
+            upload = await spool_upload(file, input_path, MAX_UPLOAD_BYTES)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UnsupportedContainer as e:
+            raise HTTPException(status_code=415, detail=str(e))
         
-        # Guardar archivo temporal
-        temp_input = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        temp_input.write(await file.read())
-        temp_input.close()
+        # Video ya procesado con este modelo: trabajo completado al instante
+        cache_key = None
+        if CACHE_ENABLED:
+            cache_key = ResultCache.key(upload["sha256"], MODEL_DIGEST, {
+                "kind": "video", "conf": 0.4, "sampling": VIDEO_SAMPLING, "cascade": CASCADE
+            })
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                os.unlink(input_path)
+                retention.touch(VIDEOS_DIR / cached["processed_video_path"])
+                job_id = job_manager.record_completed(
+                    cached["processed_video_path"],
+                    {"success": True, **cached},
+                    {"batch_size": batch_size, "cached": True}
+                )
+                return JSONResponse(status_code=200, content={
+                    "success": True,
+                    "job_id": job_id,
+                    "status": "completed",
+                    "status_url": f"/api/jobs/{job_id}",
+                    "cached": True
+                })
         
         # Crear nombre único para archivo de salida
         output_filename = f"processed_{uuid.uuid4().hex}.mp4"
-        output_path = VIDEOS_DIR / output_filename
-        
-        # Procesar video con YOLO
-        print(f"📹 Procesando video: {temp_input.name}")
-        
-        # Abrir video
-        cap = cv2.VideoCapture(temp_input.name)
-        if not cap.isOpened():
-            raise Exception("No se pudo abrir el video")
-        
-        # Obtener propiedades del video
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Configurar escritor de video con mejor codec
-        fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec
-        out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-        
-        if not out.isOpened():
-            # Si falla H.264, intentar con otro codec
-            fourcc = cv2.VideoWriter_fourcc(*'XVID')
-            output_path = VIDEOS_DIR / output_filename.replace('.mp4', '.avi')
-            out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-            output_filename = output_filename.replace('.mp4', '.avi')
-        
-        # Cargar modelo YOLO
-        model = YOLO(MODEL_PATH)
         
-        # Variables para estadísticas
-        all_detections = []
-        frame_count = 0
-        person_epp_map = {}  # Mapear EPP por persona
-        
-        print(f"📊 Total frames: {total_frames}, FPS: {fps}")
-        
-        # Procesar cada frame
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Detectar con YOLO cada 3 frames para mejor análisis
-            if frame_count % 3 == 0:
-                results = model.predict(frame, conf=0.4, verbose=False)
-                
-                # Dibujar detecciones en el frame
-                annotated_frame = results[0].plot()
-                
-                # Analizar detecciones del frame
-                frame_persons = []
-                frame_helmets = []
-                frame_vests = []
-                frame_gloves = []
-                frame_goggles = []
-                frame_boots = []
-                
-                for box in results[0].boxes:
-                    class_id = int(box.cls[0])
-                    class_name = model.names[class_id]
-                    confidence = float(box.conf[0])
-                    bbox = box.xyxy[0].cpu().numpy()
-                    
-                    all_detections.append({
-                        "class": class_name,
-                        "confidence": confidence
-                    })
-                    
-                    # Clasificar por tipo
-                    if class_name == 'Person':
-                        frame_persons.append(bbox)
-                    elif class_name in ['helmet', 'Helmet']:
-                        frame_helmets.append(bbox)
-                    elif class_name in ['vest', 'Vest']:
-                        frame_vests.append(bbox)
-                    elif class_name in ['gloves', 'Gloves']:
-                        frame_gloves.append(bbox)
-                    elif class_name in ['goggles', 'Goggles']:
-                        frame_goggles.append(bbox)
-                    elif class_name in ['boots', 'Boots']:
-                        frame_boots.append(bbox)
-                
-                # Analizar EPP por persona en este frame
-                for i, person_box in enumerate(frame_persons):
-                    person_id = f"person_{i}"
-                    if person_id not in person_epp_map:
-                        person_epp_map[person_id] = {
-                            'helmet': False,
-                            'vest': False,
-                            'gloves': False,
-                            'goggles': False,
-                            'boots': False
-                        }
-                    
-                    # Verificar superposición con EPP
-                    if checker.check_overlap(person_box, frame_helmets):
-                        person_epp_map[person_id]['helmet'] = True
-                    if checker.check_overlap(person_box, frame_vests):
-                        person_epp_map[person_id]['vest'] = True
-                    if checker.check_overlap(person_box, frame_gloves):
-                        person_epp_map[person_id]['gloves'] = True
-                    if checker.check_overlap(person_box, frame_goggles):
-                        person_epp_map[person_id]['goggles'] = True
-                    if checker.check_overlap(person_box, frame_boots):
-                        person_epp_map[person_id]['boots'] = True
-                
-                out.write(annotated_frame)
-            else:
-                out.write(frame)
-            
-            # Mostrar progreso
-            if frame_count % 30 == 0:
-                progress = (frame_count / total_frames) * 100
-                print(f"⏳ Progreso: {progress:.1f}%")
-        
-        # Liberar recursos
-        cap.release()
-        out.release()
-        
-        print(f"✅ Video procesado: {output_path}")
-        
-        # Calcular estadísticas
-        unique_detections = {}
-        for det in all_detections:
-            class_name = det["class"]
-            if class_name not in unique_detections:
-                unique_detections[class_name] = []
-            unique_detections[class_name].append(det["confidence"])
-        
-        # Crear lista de detecciones promedio
-        detection_list = []
-        for class_name, confidences in unique_detections.items():
-            avg_conf = sum(confidences) / len(confidences)
-            detection_list.append({
-                "class": class_name,
-                "confidence": avg_conf
+        try:
+            job_id = job_manager.submit(str(input_path), output_filename, {
+                "batch_size": batch_size,
+                "cache_key": cache_key,
+                "trace": tracing.current_trace() is not None,
+                "upload": upload
             })
+        except JobQueueFull:
+            os.unlink(input_path)
+            raise
         
-        # Calcular implementos faltantes por persona
-        missing_items_list = []
-        for person_id, epp_status in person_epp_map.items():
-            missing = []
-            if not epp_status['helmet']:
-                missing.append('Casco')
-            if not epp_status['vest']:
-                missing.append('Chaleco')
-            if not epp_status['gloves']:
-                missing.append('Guantes')
-            if not epp_status['goggles']:
-                missing.append('Gafas')
-            
-            if missing:
-                person_num = int(person_id.split('_')[1]) + 1
-                missing_items_list.append({
-                    "person_id": person_num,
-                    "missing": missing
-                })
-        
-        # Calcular cumplimiento general
-        total_persons = len(person_epp_map)
-        compliant_persons = sum(1 for epp in person_epp_map.values() 
-                                if epp['helmet'] and epp['vest'] and epp['gloves'] and epp['goggles'])
-        compliance = compliant_persons == total_persons if total_persons > 0 else False
-        
-        stats = {
-            "total_frames": total_frames,
-            "processed_frames": frame_count,
-            "avg_detections": len(all_detections) / frame_count if frame_count > 0 else 0,
-            "compliance": compliance,
-            "total_persons": total_persons,
-            "compliant_persons": compliant_persons,
-            "missing_items": missing_items_list,
-            "detections": detection_list[:15]  # Top 15 detecciones
-        }
-        
-        response = {
+        return JSONResponse(status_code=202, content={
             "success": True,
-            "stats": stats,
-            "processed_video_path": output_filename
-        }
-        
-        # Limpiar archivo temporal de entrada
-        os.unlink(temp_input.name)
-        
-        return JSONResponse(content=response)
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/jobs/{job_id}",
+            "cached": False
+        })
         
+    except HTTPException:
+        raise
+    except JobQueueFull as e:
+        # Cola llena = servidor saturado: 503 como en /api/detect/image
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
-        print(f"❌ Error en detect_video: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error al procesar video: {str(e)}")
-        
-        return JSONResponse(content=response)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al procesar video: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error al encolar video: {str(e)}")
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado de un trabajo de video: frames procesados, fps, ETA y resultado"""
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
 
 @app.get("/api/video/{filename}")
-async def get_video(filename: str):
-    """Servir video procesado"""
+async def get_video(filename: str, request: Request):
+    """Servir video procesado (Range para poder adelantar sin re-descargar)"""
     file_path = VIDEOS_DIR / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Video no encontrado")
-    return FileResponse(file_path)
+    retention.touch(file_path)
+    media_type = "video/x-msvideo" if file_path.suffix == ".avi" else "video/mp4"
+    return file_response(request, file_path, media_type)
+
+# ============================================
+# CHATBOT
+# ============================================
+# Intenciones propias de la API, por delante de las del chatbot
+API_INTENTS = [
+    Intent("faltantes", ["falta", "faltante", "incumple", "no cumple", "problema"]),
+    Intent("analisis", ["último", "ultima", "análisis", "detalle", "resumen", "reporte"]),
+    Intent("mejorar", ["mejorar", "solución", "arreglar", "corregir"]),
+]
+CHAT_ROUTER = IntentRouter(API_INTENTS + CHATBOT_INTENTS)
+
+# Respuesta fija de recomendaciones (se construye una vez)
+RESPUESTA_MEJORAR = (
+    "💡 **RECOMENDACIONES PARA MEJORAR EL CUMPLIMIENTO:**\n\n"
+    "1. 📚 **Capacitación:**\n"
+    "   • Realizar charlas de 5 minutos antes de iniciar labores\n"
+    "   • Explicar la importancia de cada EPP\n\n"
+    "2. 🚪 **Control de acceso:**\n"
+    "   • Implementar puntos de verificación en entradas\n"
+    "   • No permitir el ingreso sin EPP completo\n\n"
+    "3. 📊 **Monitoreo continuo:**\n"
+    "   • Usar este sistema de detección regularmente\n"
+    "   • Generar reportes semanales de cumplimiento\n\n"
+    "4. 🎯 **Disponibilidad:**\n"
+    "   • Asegurar que haya EPP disponible para todos\n"
+    "   • Mantener stock de repuestos\n\n"
+    "5. 📜 **Normativa:**\n"
+    "   • Establecer consecuencias claras por incumplimiento\n"
+    "   • Reconocer y premiar el cumplimiento constante"
+)
 
 @app.post("/api/chatbot")
-async def chatbot_query(query: Dict[str, str]):
+async def chatbot_query(query: Dict[str, str], request: Request, http_response: Response):
     """
     Chatbot de EPP - Responder preguntas con contexto del último análisis
+    de la misma sesión (cookie epp_session o encabezado X-Session-Id)
     
     Args:
         query: {"message": "tu pregunta aquí"}
@@ -403,11 +901,15 @@ async def chatbot_query(query: Dict[str, str]):
         if not message:
             raise HTTPException(status_code=400, detail="Mensaje vacío")
         
-        # Verificar si pregunta sobre el último análisis
-        message_lower = message.lower()
+        # Último análisis de quien pregunta
+        last_analysis = sessions.get(_session_id(request, http_response)) or EMPTY_ANALYSIS
+        
+        # Intención del mensaje en una sola pasada (reglas de la API primero)
+        has_context = bool(last_analysis.get("detections") or last_analysis.get("missing_items"))
+        intent = CHAT_ROUTER.route(message, context=has_context)
         
         # Pregunta sobre implementos faltantes
-        if any(word in message_lower for word in ["falta", "faltante", "incumple", "no cumple", "problema"]):
+        if intent == "faltantes":
             if last_analysis["missing_items"]:
                 # Construir respuesta detallada sobre faltantes
                 response_text = "⚠️ **ANÁLISIS DE INCUMPLIMIENTO**\n\n"
@@ -448,8 +950,9 @@ async def chatbot_query(query: Dict[str, str]):
                     "response": "✅ ¡Excelente! No hay incumplimientos detectados. Todas las personas en el último análisis cumplen con los requisitos de EPP."
                 }
         
-        # Pregunta sobre detalles del último análisis
-        elif any(word in message_lower for word in ["último", "ultima", "analisis", "análisis", "detalle", "resumen", "reporte"]):
+        # Pregunta sobre detalles del último análisis ("reporte" del
+        # chatbot de consola imprime en stdout: aquí usa el mismo resumen)
+        elif intent in ("analisis", "reporte"):
             if last_analysis.get("detections"):
                 # Construir reporte completo
                 response_text = "📊 **REPORTE COMPLETO DEL ÚLTIMO ANÁLISIS**\n\n"
@@ -512,36 +1015,17 @@ async def chatbot_query(query: Dict[str, str]):
                 }
         
         # Pregunta sobre cómo mejorar cumplimiento
-        elif any(word in message_lower for word in ["mejorar", "solución", "solucion", "arreglar", "corregir"]):
-            response_text = "💡 **RECOMENDACIONES PARA MEJORAR EL CUMPLIMIENTO:**\n\n"
-            response_text += "1. 📚 **Capacitación:**\n"
-            response_text += "   • Realizar charlas de 5 minutos antes de iniciar labores\n"
-            response_text += "   • Explicar la importancia de cada EPP\n\n"
-            
-            response_text += "2. 🚪 **Control de acceso:**\n"
-            response_text += "   • Implementar puntos de verificación en entradas\n"
-            response_text += "   • No permitir el ingreso sin EPP completo\n\n"
-            
-            response_text += "3. 📊 **Monitoreo continuo:**\n"
-            response_text += "   • Usar este sistema de detección regularmente\n"
-            response_text += "   • Generar reportes semanales de cumplimiento\n\n"
-            
-            response_text += "4. 🎯 **Disponibilidad:**\n"
-            response_text += "   • Asegurar que haya EPP disponible para todos\n"
-            response_text += "   • Mantener stock de repuestos\n\n"
-            
-            response_text += "5. 📜 **Normativa:**\n"
-            response_text += "   • Establecer consecuencias claras por incumplimiento\n"
-            response_text += "   • Reconocer y premiar el cumplimiento constante\n"
-            
+        elif intent == "mejorar":
             return {
                 "success": True,
                 "query": message,
-                "response": response_text.strip()
+                "response": RESPUESTA_MEJORAR
             }
         
-        # Obtener respuesta del chatbot normal
-        response = chatbot.responder(message)
+        # Resto de intenciones: respuestas del chatbot normal, sobre el
+        # análisis completo de esta sesión (compliance["details"])
+        details = (last_analysis.get("compliance") or {}).get("details")
+        response = chatbot.responder_intencion(intent, analysis=details or {})
         
         return {
             "success": True,
@@ -552,6 +1036,21 @@ async def chatbot_query(query: Dict[str, str]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en chatbot: {str(e)}")
 
+@app.get("/api/storage")
+async def get_storage():
+    """Uso de disco de processed/ y contadores de la política de retención"""
+    return retention.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+def _latency_ms(histogram, *labels):
+    """Percentiles p50/p95/p99 en milisegundos de una serie en segundos"""
+    values = histogram.percentiles(*labels)
+    return {k: v * 1000 if k != "count" else v for k, v in values.items()}
+
 @app.get("/api/stats")
 async def get_stats():
     """Obtener estadísticas del sistema"""
@@ -565,10 +1064,23 @@ async def get_stats():
             }
         },
         "stats": {
-            "precision": "99.2%",
-            "inference_time": "<50ms",
+            # Percentiles recientes (ms) del mismo registro que /metrics
+            "request_ms": _latency_ms(REQUEST_LATENCY, "POST", "/api/detect/image", 200),
+            "inference_ms": _latency_ms(MODEL_STAGE_SECONDS, "inference"),
+            "preprocess_ms": _latency_ms(MODEL_STAGE_SECONDS, "preprocess"),
+            "postprocess_ms": _latency_ms(MODEL_STAGE_SECONDS, "postprocess"),
+            "video_fps": VIDEO_JOB_FPS.percentiles(),
             "epp_types": 15
-        }
+        },
+        "video_jobs": {
+            "queued": job_store.count("queued"),
+            "running": job_store.count("running"),
+            "workers": VIDEO_WORKERS
+        },
+        "batching": batcher.metrics(),
+        "cache": {"enabled": CACHE_ENABLED, **result_cache.stats()},
+        "storage": retention.stats(),
+        "sessions": sessions.stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+# Benchmark de asociación EPP-persona en escenas con muchas cajas
+# Compara check_overlap (bucle Python por persona y clase) con
+# association.associate (una matriz NumPy para todas las clases).
+# La equivalencia de ambos se prueba en tests/test_association.py.
+# Ejecuta desde IA_Final con: python benchmarks/bench_association.py
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+import numpy as np
+
+from association import associate
+from compliance_checker import EPPComplianceChecker
+
+CLASSES = ['helmet', 'vest', 'boots', 'goggles', 'gloves', 'no_helmet', 'no_vest', 'no_boots']
+
+
+def random_boxes(rng, count, grid, max_size, dtype=np.float32):
+    """Cajas aleatorias en una rejilla pequeña para forzar bordes y contactos"""
+    xy = rng.integers(0, grid, size=(count, 2))
+    wh = rng.integers(0, max_size, size=(count, 2))
+    return [np.concatenate([p, p + s]).astype(dtype) for p, s in zip(xy, wh)]
+
+
+def random_scene(rng, persons, items_per_class, grid, max_size, dtype=np.float32):
+    person_boxes = random_boxes(rng, persons, grid, max_size, dtype)
+    items = {name: random_boxes(rng, items_per_class, grid, max_size, dtype) for name in CLASSES}
+    return person_boxes, items
+
+
+def loop_association(person_boxes, items):
+    """Referencia: check_overlap persona por persona y clase por clase"""
+    return {
+        name: [EPPComplianceChecker.check_overlap(None, person, boxes) for person in person_boxes]
+        for name, boxes in items.items()
+    }
+
+
+def bench(fn, scene, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*scene)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de asociación EPP-persona")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"\n{'Personas':>9} {'Items':>7} {'Bucle (ms)':>12} {'NumPy (ms)':>12} {'Mejora':>8}")
+    for persons, per_class in [(5, 5), (20, 10), (50, 25), (100, 50), (200, 60)]:
+        scene = random_scene(rng, persons, per_class, grid=1920, max_size=300)
+        loop_ms = bench(loop_association, scene, max(1, args.repeat // 10))
+        numpy_ms = bench(associate, scene, args.repeat)
+        total_items = per_class * len(CLASSES)
+        print(f"{persons:>9} {total_items:>7} {loop_ms:>12.3f} {numpy_ms:>12.3f} {loop_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Benchmark de backends de inferencia en CPU
+# Compara PyTorch (best.pt) con ONNX Runtime y OpenVINO (FP32 e INT8):
+# latencia por imagen y deriva de las detecciones respecto a PyTorch.
+# Ejecuta desde IA_Final con: python benchmarks/bench_backends.py
+# (antes exporta los modelos con: python export_model.py --int8)
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+import cv2
+import numpy as np
+
+from tracker import greedy_match, iou_matrix
+
+
+def load(spec, threads):
+    """spec = 'torch:ruta.pt' | 'onnxruntime:ruta.onnx' | 'openvino:ruta.onnx'"""
+    backend, path = spec.split(':', 1)
+    if backend == 'torch':
+        import torch
+        from ultralytics import YOLO
+
+        if threads:
+            torch.set_num_threads(threads)
+        return YOLO(path)
+
+    from inference_backends import load_backend
+
+    return load_backend(path, backend=backend, threads=threads)
+
+
+def detections(results):
+    boxes = results.boxes
+    return (boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy().astype(int))
+
+
+def drift(reference, candidate, iou_threshold=0.5):
+    """
+    Deriva frente a la referencia: cajas emparejadas (misma clase, IoU>0.5),
+    IoU de cada pareja y diferencia absoluta de confianza
+    """
+    ref_boxes, ref_conf, ref_cls = reference
+    boxes, conf, cls = candidate
+    iou = iou_matrix(ref_boxes, boxes)
+    iou[ref_cls[:, None] != cls[None, :]] = 0
+    matches = greedy_match(iou, iou_threshold)
+    return (len(matches), [iou[r, c] for r, c in matches],
+            [abs(ref_conf[r] - conf[c]) for r, c in matches])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de inferencia")
+    parser.add_argument('--backends', nargs='+', default=[
+        'torch:runs/detect/train10/weights/best.pt',
+        'onnxruntime:runs/detect/train10/weights/best.onnx',
+        'openvino:runs/detect/train10/weights/best.onnx',
+        'onnxruntime:runs/detect/train10/weights/best_int8.onnx',
+        'openvino:runs/detect/train10/weights/best_int8.onnx',
+    ], help='La primera entrada es la referencia para medir la deriva')
+    parser.add_argument('--images', default='../datasets/images/val')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--conf', type=float, default=0.25)
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.images).glob('*.jpg'))[:args.limit]
+    if not paths:
+        print(f"❌ No se encontraron imágenes en {args.images}")
+        sys.exit(1)
+    images = [cv2.imread(str(p)) for p in paths]
+
+    reference = None
+    print(f"\n📊 {len(images)} imágenes, hilos intra-op: {args.threads or 'auto'}")
+    print(f"{'Backend':<58} {'media ms':>9} {'p95 ms':>8} {'recall':>7} {'IoU':>6} {'Δconf':>7}")
+    for spec in args.backends:
+        try:
+            model = load(spec, args.threads)
+        except Exception as e:
+            print(f"{spec:<58} ⚠️ omitido: {e}")
+            continue
+
+        model.predict(images[0], conf=args.conf, verbose=False)  # Calentamiento
+        latencies, outputs = [], []
+        for image in images:
+            start = time.perf_counter()
+            results = model.predict(image, conf=args.conf, verbose=False)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            outputs.append(detections(results))
+
+        latencies.sort()
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        if reference is None:
+            reference = outputs
+            print(f"{spec:<58} {statistics.mean(latencies):>9.1f} {p95:>8.1f} {'ref':>7} {'ref':>6} {'ref':>7}")
+            continue
+
+        total_ref = sum(len(r[0]) for r in reference)
+        matched, ious, deltas = 0, [], []
+        for ref, out in zip(reference, outputs):
+            m, i, d = drift(ref, out)
+            matched += m
+            ious += i
+            deltas += d
+        recall = matched / total_ref if total_ref else 1.0
+        print(f"{spec:<58} {statistics.mean(latencies):>9.1f} {p95:>8.1f} {recall:>7.3f} "
+              f"{np.mean(ious) if ious else 0:>6.3f} {np.mean(deltas) if deltas else 0:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
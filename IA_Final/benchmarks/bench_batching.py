@@ -0,0 +1,85 @@
+# Prueba de carga: micro-batching vs una inferencia por petición
+# Simula N clientes concurrentes enviando imágenes al checker.
+# Ejecuta desde IA_Final con: python benchmarks/bench_batching.py
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+from batch_scheduler import MicroBatcher
+from compliance_checker import EPPComplianceChecker
+
+
+def load_test(process_one, images, clients, requests_per_client):
+    """Lanza clientes concurrentes y devuelve imágenes/segundo"""
+    out_dir = Path(tempfile.mkdtemp(prefix='epp_bench_'))
+
+    def client(client_id):
+        for i in range(requests_per_client):
+            image = images[(client_id + i) % len(images)]
+            process_one(str(image), str(out_dir / f"c{client_id}_{i}.jpg"))
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return clients * requests_per_client / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de micro-batching")
+    parser.add_argument('--model', default='runs/detect/train10/weights/best.pt')
+    parser.add_argument('--images', default='../datasets/images/val')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=10, help="Peticiones por cliente")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--wait-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    images = sorted(Path(args.images).glob('*.jpg'))[:50]
+    if not images:
+        print(f"❌ No se encontraron imágenes en {args.images}")
+        sys.exit(1)
+
+    checker = EPPComplianceChecker(args.model)
+    checker.detect_and_save(str(images[0]), str(Path(tempfile.gettempdir()) / 'warmup.jpg'))
+
+    print(f"\n📊 {args.clients} clientes x {args.requests} peticiones")
+
+    # Ruta actual: una inferencia (lote de 1) por petición
+    per_request = load_test(checker.detect_and_save, images, args.clients, args.requests)
+    print(f"   Por petición:  {per_request:7.2f} img/s")
+
+    # Ruta con micro-batching
+    batcher = MicroBatcher(
+        lambda items: checker.detect_and_save_batch(
+            [image for image, _ in items], [out for _, out in items]
+        ),
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.wait_ms,
+        max_queue=args.clients * 2
+    )
+    batched = load_test(
+        lambda image, out: batcher.submit(image, out).result(),
+        images, args.clients, args.requests
+    )
+    print(f"   Micro-batching: {batched:7.2f} img/s")
+    print(f"\n⚡ Mejora de throughput: {batched / per_request:.2f}x")
+
+    metrics = batcher.metrics()
+    print(f"📦 Lote promedio: {metrics['avg_batch_size']:.2f} | "
+          f"tamaños: {metrics['batch_size_counts']}")
+    print(f"⏳ Espera en cola: media {metrics['queue_wait_ms']['avg']:.1f} ms | "
+          f"p95 {metrics['queue_wait_ms']['p95']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Benchmark de la cascada persona-primero frente a inferencia de frame completo
+# Reescala las imágenes de validación a resolución de cámara (1080p por
+# defecto) y compara latencia y EPP encontrado con:
+#   - frame completo en alta resolución (referencia)
+#   - frame completo a 640
+#   - cascada (personas a baja resolución + recortes de EPP en lote)
+# Ejecuta desde IA_Final con: python benchmarks/bench_cascade.py
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+import cv2
+import numpy as np
+
+from compliance_checker import EPPComplianceChecker
+from tracker import greedy_match, iou_matrix
+
+
+def ppe_boxes(results, person_id):
+    boxes = results.boxes
+    cls = boxes.cls.cpu().numpy().astype(int)
+    mask = cls != person_id
+    return boxes.xyxy.cpu().numpy()[mask], cls[mask]
+
+
+def recall(reference, candidate):
+    """Fracción del EPP de la referencia encontrado (misma clase, IoU>0.5)"""
+    found = total = 0
+    for (ref_boxes, ref_cls), (boxes, cls) in zip(reference, candidate):
+        iou = iou_matrix(ref_boxes, boxes)
+        iou[ref_cls[:, None] != cls[None, :]] = 0
+        found += len(greedy_match(iou, 0.5))
+        total += len(ref_boxes)
+    return found / total if total else 1.0
+
+
+def run(name, predict, images, person_id):
+    predict(images[:1])  # Calentamiento
+    latencies, outputs = [], []
+    for image in images:
+        start = time.perf_counter()
+        results = predict([image])[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(ppe_boxes(results, person_id))
+    latencies.sort()
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    count = sum(len(boxes) for boxes, _ in outputs)
+    print(f"   {name:<28} media {statistics.mean(latencies):8.1f} ms | p95 {p95:8.1f} ms | EPP {count:5d}",
+          end='')
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la cascada persona-primero")
+    parser.add_argument('--model', default='runs/detect/train10/weights/best.pt')
+    parser.add_argument('--images', default='../datasets/images/val')
+    parser.add_argument('--limit', type=int, default=30)
+    parser.add_argument('--width', type=int, default=1920, help='Ancho de cámara simulado')
+    parser.add_argument('--full-imgsz', type=int, default=1280)
+    parser.add_argument('--person-imgsz', type=int, default=416)
+    parser.add_argument('--crop-imgsz', type=int, default=320)
+    parser.add_argument('--conf', type=float, default=0.25)
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.images).glob('*.jpg'))[:args.limit]
+    if not paths:
+        print(f"❌ No se encontraron imágenes en {args.images}")
+        sys.exit(1)
+
+    images = []
+    for path in paths:
+        image = cv2.imread(str(path))
+        scale = args.width / image.shape[1]
+        images.append(cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC))
+
+    checker = EPPComplianceChecker(args.model, person_imgsz=args.person_imgsz,
+                                   crop_imgsz=args.crop_imgsz)
+    person_id = checker.person_id
+    model = checker.model
+
+    def full_frame(imgsz):
+        return lambda batch: model.predict(batch, conf=args.conf, imgsz=imgsz, verbose=False)
+
+    def cascade(batch):
+        return checker.predict_cascade(batch, conf=args.conf)
+
+    print(f"\n📊 {len(images)} imágenes a {images[0].shape[1]}x{images[0].shape[0]}")
+    reference = run(f"Frame completo {args.full_imgsz}", full_frame(args.full_imgsz), images, person_id)
+    print(" | recall ref")
+    for name, predict in [("Frame completo 640", full_frame(640)),
+                          (f"Cascada {args.person_imgsz}/{args.crop_imgsz}", cascade)]:
+        outputs = run(name, predict, images, person_id)
+        print(f" | recall {recall(reference, outputs):.3f}")
+
+    persons = [len(r.boxes) for r in model.predict(images, conf=args.conf, imgsz=args.person_imgsz,
+                                                   classes=[person_id], verbose=False)]
+    print(f"\n👥 Personas por imagen: media {np.mean(persons):.1f}, máx {max(persons)}")
+
+
+if __name__ == "__main__":
+    main()
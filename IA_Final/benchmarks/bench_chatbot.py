@@ -0,0 +1,110 @@
+# Benchmark del enrutado de intenciones del chatbot
+# Compara la cadena original de `if any(word in pregunta ...)` con el
+# IntentRouter compilado (Aho–Corasick) y reporta mensajes por segundo.
+# Antes de medir verifica que ambos eligen la misma intención, salvo
+# los cambios buscados (ROUTING_CHANGES).
+# Ejecuta desde IA_Final con: python benchmarks/bench_chatbot.py
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+from chatbot_final import RESPUESTAS, ROUTER
+
+MESSAGES = [
+    '¿Qué es EPP?', 'que es epp', 'define epp por favor', 'normativa vigente', '¿es obligatorio el casco?',
+    '¿qué dice la ley?', '¿cómo funciona el sistema?', 'tipos de casco', 'cascos para electricistas',
+    '¿por qué usar chaleco?', 'vest', 'guantes de nitrilo', 'protección de manos', 'ayuda', '?',
+    'hola', 'buenas tardes', '¿cumple con la norma?', '¿qué le falta?', '¿qué detectaste?',
+    'dame el reporte completo', 'todo bien?', 'necesita botas?', 'asdf qwerty',
+    'quisiera saber cuál es la normativa de seguridad para trabajos en altura con arnés',
+    '¿qué tipos de casco hay?', '¿viste los guantes?',
+]
+
+# Diferencias intencionadas con la cadena original: con contexto, las
+# palabras genéricas ('hay', 'viste', 'todo') ya no tapan a una palabra
+# clave específica de otra regla
+ROUTING_CHANGES = {
+    ('¿qué tipos de casco hay?', True): 'cascos',
+    ('¿viste los guantes?', True): 'guantes',
+}
+
+
+def legacy_route(pregunta, context):
+    """Cadena original de ChatbotEPP.responder (devuelve la intención)"""
+    pregunta_lower = pregunta.lower()
+    if context:
+        if any(word in pregunta_lower for word in ['cumple', 'cumplimiento', 'norma']):
+            return 'cumplimiento'
+        if any(word in pregunta_lower for word in ['falta', 'necesita', 'le falta']):
+            return 'falta'
+        if any(word in pregunta_lower for word in ['detectaste', 'viste', 'hay']):
+            return 'detecciones'
+        if any(word in pregunta_lower for word in ['reporte', 'resumen', 'todo']):
+            return 'reporte'
+    if any(word in pregunta_lower for word in ['qué es epp', 'que es epp', 'define epp', 'epp?']):
+        return 'que_es_epp'
+    if any(word in pregunta_lower for word in ['normativa', 'obligatorio', 'requisito', 'ley', 'seguridad']):
+        return 'normativas'
+    if any(word in pregunta_lower for word in ['cómo funciona', 'como funciona', 'sistema', 'funciona']):
+        return 'funcionamiento'
+    if any(word in pregunta_lower for word in ['tipos de casco', 'tipo de casco', 'cascos', 'tipos casco']):
+        return 'cascos'
+    if any(word in pregunta_lower for word in ['chaleco', 'importancia chaleco', 'vest']):
+        return 'chaleco'
+    if any(word in pregunta_lower for word in ['guante', 'mano', 'protección de manos', 'proteccion manos']):
+        return 'guantes'
+    if pregunta_lower in ['ayuda', 'help', '?']:
+        return 'ayuda'
+    if any(word in pregunta_lower for word in ['hola', 'buenos', 'hey', 'buenas']):
+        return 'saludo'
+    return None
+
+
+def verify():
+    for context in (False, True):
+        for message in MESSAGES:
+            expected = ROUTING_CHANGES.get((message, context), legacy_route(message, context))
+            actual = ROUTER.route(message, context=context)
+            if expected != actual:
+                print(f"❌ '{message}' (contexto={context}): cadena={expected} router={actual}")
+                sys.exit(1)
+    print(f"✅ {2 * len(MESSAGES)} casos: IntentRouter == cadena de if/any "
+          f"(salvo {len(ROUTING_CHANGES)} cambios buscados)")
+
+
+def messages_per_second(fn, messages, context):
+    start = time.perf_counter()
+    for message in messages:
+        fn(message, context)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del enrutado del chatbot")
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    verify()
+
+    rng = random.Random(args.seed)
+    messages = [rng.choice(MESSAGES) for _ in range(args.messages)]
+
+    def router_answer(message, context):
+        return RESPUESTAS.get(ROUTER.route(message, context=context))
+
+    print(f"\n{'Contexto':>9} {'Cadena (msg/s)':>16} {'Router (msg/s)':>16} {'+respuesta':>12} {'Mejora':>8}")
+    for context in (False, True):
+        legacy = messages_per_second(legacy_route, messages, context)
+        routed = messages_per_second(lambda m, c: ROUTER.route(m, context=c), messages, context)
+        answered = messages_per_second(router_answer, messages, context)
+        print(f"{str(context):>9} {legacy:>16,.0f} {routed:>16,.0f} {answered:>12,.0f} {routed / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Benchmark de latencia por imagen para EPPComplianceChecker.detect_and_save
+# Compara el flujo anterior (dos inferencias) con el de inferencia única.
+# Ejecuta desde IA_Final con: python benchmarks/bench_detect_and_save.py
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+import cv2
+
+from compliance_checker import EPPComplianceChecker
+
+
+def legacy_detect_and_save(checker, image_path, output_path):
+    """Flujo anterior: una inferencia para anotar y otra para cumplimiento"""
+    results = checker.model(image_path, conf=0.5, iou=0.4, verbose=False)
+    cv2.imwrite(output_path, results[0].plot())
+    checker.detect_compliance(image_path)
+
+
+def measure(fn, images, output_path, repeat):
+    """Devuelve latencias en ms de fn sobre todas las imágenes"""
+    latencies = []
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            fn(str(image), output_path)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summary(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"   {name:<18} media {statistics.mean(latencies):8.1f} ms | "
+          f"p50 {statistics.median(latencies):8.1f} ms | p95 {p95:8.1f} ms")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detect_and_save")
+    parser.add_argument('--model', default='runs/detect/train10/weights/best.pt')
+    parser.add_argument('--images', default='../datasets/images/val')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    images = sorted(Path(args.images).glob('*.jpg'))[:args.limit]
+    if not images:
+        print(f"❌ No se encontraron imágenes en {args.images}")
+        sys.exit(1)
+
+    checker = EPPComplianceChecker(args.model)
+    output_path = str(Path(tempfile.gettempdir()) / 'bench_detect_and_save.jpg')
+
+    # Calentamiento para no medir la carga perezosa del modelo
+    checker.detect_and_save(str(images[0]), output_path)
+
+    print(f"\n📊 {len(images)} imágenes x {args.repeat} repeticiones")
+    before = summary('Antes (2 pasadas)', measure(
+        lambda img, out: legacy_detect_and_save(checker, img, out),
+        images, output_path, args.repeat))
+    after = summary('Después (1 pasada)', measure(
+        checker.detect_and_save, images, output_path, args.repeat))
+    print(f"\n⚡ Aceleración: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Benchmark del pipeline de video por etapas sobre un video sintético
+# Compara el bucle secuencial (leer -> inferir -> anotar -> escribir)
+# con VideoPipeline y reporta el throughput de cada etapa.
+# Ejecuta desde IA_Final con: python benchmarks/bench_video_pipeline.py
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+import cv2
+
+from model_registry import registry
+from synthetic import make_synthetic_video
+from video_pipeline import VideoPipeline
+
+
+def open_io(video_path, output_path):
+    cap = cv2.VideoCapture(str(video_path))
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    out = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    return cap, out
+
+
+def run_sequential(model, video_path, output_path):
+    cap, out = open_io(video_path, output_path)
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        result = model.predict(frame, conf=0.25, verbose=False)[0]
+        out.write(result.plot())
+        frames += 1
+    elapsed = time.perf_counter() - start
+    cap.release()
+    out.release()
+    return frames / elapsed
+
+
+def run_pipelined(model, video_path, output_path, batch_size):
+    cap, out = open_io(video_path, output_path)
+    pipeline = VideoPipeline(
+        lambda frames: model.predict(frames, conf=0.25, verbose=False),
+        lambda index, frame, result: result.plot(),
+        out,
+        batch_size=batch_size
+    )
+    stats = pipeline.run(cap)
+    cap.release()
+    out.release()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de video")
+    parser.add_argument('--model', default='runs/detect/train10/weights/best.pt')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--batch-size', type=int, default=4)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='epp_bench_video_'))
+    video_path = make_synthetic_video(work_dir / 'synthetic.mp4', args.frames, args.width, args.height)
+    print(f"🎬 Video sintético: {args.frames} frames {args.width}x{args.height}")
+
+    # Calentamiento con el primer frame para no medir la carga del modelo
+    model = registry.get(args.model)
+    cap = cv2.VideoCapture(str(video_path))
+    _, first_frame = cap.read()
+    cap.release()
+    model.predict(first_frame, verbose=False)
+
+    sequential_fps = run_sequential(model, video_path, work_dir / 'sequential.mp4')
+    print(f"\n🐢 Secuencial:  {sequential_fps:7.2f} fps")
+
+    stats = run_pipelined(model, video_path, work_dir / 'pipelined.mp4', args.batch_size)
+    print(f"⚡ Pipeline:    {stats['fps']:7.2f} fps (lote {stats['batch_size']}, {stats['batches']} lotes)")
+    for name, stage in stats['stages'].items():
+        print(f"   ├─ {name:<10} {stage['fps']:8.2f} fps ({stage['busy_seconds']:.2f} s ocupada)")
+    print(f"\n📈 Aceleración: {stats['fps'] / sequential_fps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
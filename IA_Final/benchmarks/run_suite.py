@@ -0,0 +1,309 @@
+# Suite de benchmarks reproducible (imagen, video, API y chatbot)
+# Mide las rutas principales con un modelo sintético (sin pesos ni GPU)
+# o con pesos reales (--model), y guarda los resultados en JSON para
+# comparar entre commits:
+#   python benchmarks/run_suite.py
+#   python benchmarks/run_suite.py --compare benchmarks/results/base.json
+# Ejecuta desde IA_Final.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+import cv2
+import numpy as np
+
+from model_registry import registry
+from percentiles import percentile
+from synthetic import SyntheticModel, make_synthetic_image, make_synthetic_video
+
+SYNTHETIC_MODEL_PATH = 'synthetic://epp'
+
+QUESTIONS = [
+    '¿qué es epp?', '¿cumple la normativa?', '¿qué le falta?', '¿qué detectaste?',
+    'tipos de casco', '¿cómo funciona el sistema?', 'dame el reporte', 'hola'
+]
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+
+def measure(fn, repeat, warmup=1):
+    """Ejecuta fn repeat veces y resume las latencias en ms"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    mean = statistics.mean(latencies)
+    return {
+        'n': repeat,
+        'mean_ms': mean,
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'min_ms': latencies[0],
+        'ops_per_s': 1000 / mean if mean else 0.0
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silencia los print de progreso de los componentes medidos"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ============================================
+# CASOS
+# ============================================
+
+def bench_association(args, work):
+    from bench_association import loop_association, random_scene
+    from association import associate
+
+    rng = np.random.default_rng(args.seed)
+    scene = random_scene(rng, persons=50, items_per_class=25, grid=1920, max_size=300)
+    return {
+        'association.check_overlap': measure(lambda: loop_association(*scene), max(1, args.repeat // 5)),
+        'association.associate': measure(lambda: associate(*scene), args.repeat)
+    }
+
+
+def bench_checker(args, work):
+    from compliance_checker import EPPComplianceChecker
+
+    with quiet():
+        checker = EPPComplianceChecker(args.model)
+    images = work['images']
+    output = str(work['dir'] / 'detect_and_save.jpg')
+    cycle = {'i': 0}
+
+    def next_image():
+        cycle['i'] = (cycle['i'] + 1) % len(images)
+        return images[cycle['i']]
+
+    return {
+        'checker.detect_compliance': measure(lambda: checker.detect_compliance(next_image()), args.repeat),
+        'checker.detect_and_save': measure(lambda: checker.detect_and_save(next_image(), output), args.repeat)
+    }
+
+
+def bench_video_analyzer(args, work):
+    from video_analyzer import VideoEPPAnalyzer
+
+    results = {}
+    for sampling in (True, False):
+        name = 'video.analyze_video' + ('' if sampling else '.fixed_sampling')
+        with quiet():
+            analyzer = VideoEPPAnalyzer(args.model, adaptive_sampling=sampling)
+
+        def run():
+            with quiet():
+                analyzer.analyze_video(str(work['video']), output_dir=str(work['dir'] / 'video'))
+
+        results[name] = measure(run, args.video_repeat, warmup=0)
+        results[name]['fps'] = analyzer.pipeline_stats['fps']
+        results[name]['frames'] = analyzer.pipeline_stats['frames']
+    return results
+
+
+def bench_api(args, work):
+    # La API lee su configuración al importarse
+    os.environ['EPP_MODEL_PATH'] = args.model
+    os.environ['EPP_PROCESSED_DIR'] = str(work['dir'] / 'processed')
+    os.environ['EPP_CACHE'] = '0'
+    from fastapi.testclient import TestClient
+
+    with quiet():
+        import api
+
+    image_bytes = cv2.imencode('.jpg', cv2.imread(work['images'][0]))[1].tobytes()
+    video_bytes = work['video'].read_bytes()
+
+    with quiet(), TestClient(api.app) as client:
+        # El modelo se carga en segundo plano: medir solo con /ready en 200
+        while client.get('/ready').status_code != 200:
+            if api.warmup.state == 'failed':
+                raise RuntimeError(api.warmup.error)
+            time.sleep(0.05)
+
+        def detect_image():
+            response = client.post('/api/detect/image',
+                                   files={'file': ('bench.jpg', image_bytes, 'image/jpeg')})
+            response.raise_for_status()
+
+        def detect_video():
+            response = client.post('/api/detect/video',
+                                   files={'file': ('bench.mp4', video_bytes, 'video/mp4')})
+            response.raise_for_status()
+            status_url = response.json()['status_url']
+            while True:
+                job = client.get(status_url).json()
+                if job['status'] in ('completed', 'failed'):
+                    if job['status'] == 'failed':
+                        raise RuntimeError(job.get('error'))
+                    return
+                time.sleep(0.02)
+
+        def chatbot():
+            client.post('/api/chatbot', json={'message': '¿qué le falta?'}).raise_for_status()
+
+        return {
+            'api.detect_image': measure(detect_image, args.repeat),
+            'api.detect_video': measure(detect_video, args.video_repeat, warmup=0),
+            'api.chatbot': measure(chatbot, args.repeat)
+        }
+
+
+def bench_chatbot(args, work):
+    from chatbot_final import ChatbotEPP
+
+    with quiet():
+        bot = ChatbotEPP(args.model)
+        bot.analizar_imagen(work['images'][0])
+
+    def ask_all():
+        for question in QUESTIONS:
+            bot.responder(question)
+
+    result = measure(ask_all, args.repeat)
+    result['messages_per_s'] = result['ops_per_s'] * len(QUESTIONS)
+    return {'chatbot.responder': result}
+
+
+CASES = {
+    'association': bench_association,
+    'checker': bench_checker,
+    'video': bench_video_analyzer,
+    'api': bench_api,
+    'chatbot': bench_chatbot,
+}
+
+
+# ============================================
+# RESULTADOS
+# ============================================
+
+def environment(args):
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'model': args.model,
+        'synthetic_latency_ms': args.latency_ms if args.model == SYNTHETIC_MODEL_PATH else None,
+        'seed': args.seed
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Compara p50 con un JSON anterior; devuelve los casos más lentos que threshold"""
+    baseline = json.loads(Path(baseline_path).read_text())['results']
+    regressions = []
+    print(f"\n📊 Comparación de p50 con {baseline_path}")
+    print(f"   {'Caso':<34} {'Antes (ms)':>11} {'Ahora (ms)':>11} {'Cambio':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"   {name:<34} {'—':>11} {current['p50_ms']:>11.3f} {'nuevo':>8}")
+            continue
+        change = current['p50_ms'] / previous['p50_ms'] - 1 if previous['p50_ms'] else 0.0
+        flag = ' ⚠️' if change > threshold else ''
+        print(f"   {name:<34} {previous['p50_ms']:>11.3f} {current['p50_ms']:>11.3f} {change:>+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de EPP")
+    parser.add_argument('--model', default=SYNTHETIC_MODEL_PATH,
+                        help='Pesos reales (.pt/.onnx); por defecto el modelo sintético')
+    parser.add_argument('--latency-ms', type=float, default=5.0,
+                        help='Latencia simulada por imagen del modelo sintético')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--video-repeat', type=int, default=3)
+    parser.add_argument('--frames', type=int, default=90)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON de salida (por defecto benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Empeoramiento relativo de p50 que cuenta como regresión')
+    args = parser.parse_args()
+
+    if args.model == SYNTHETIC_MODEL_PATH:
+        registry.register(SYNTHETIC_MODEL_PATH, SyntheticModel(latency_ms=args.latency_ms))
+
+    work_dir = Path(tempfile.mkdtemp(prefix='epp_bench_suite_'))
+    images = []
+    for i in range(8):
+        path = work_dir / f'image_{i}.jpg'
+        cv2.imwrite(str(path), make_synthetic_image(args.width, args.height, seed=args.seed + i))
+        images.append(str(path))
+    work = {
+        'dir': work_dir,
+        'images': images,
+        'video': make_synthetic_video(work_dir / 'clip.mp4', args.frames, args.width,
+                                      args.height, seed=args.seed)
+    }
+    print(f"🧪 Modelo: {args.model} | {len(images)} imágenes y video de {args.frames} frames "
+          f"{args.width}x{args.height}")
+
+    results = {}
+    for case in args.cases:
+        print(f"⏳ {case}...")
+        results.update(CASES[case](args, work))
+
+    print(f"\n{'Caso':<34} {'media (ms)':>11} {'p50 (ms)':>10} {'p95 (ms)':>10} {'ops/s':>9}")
+    for name, result in results.items():
+        print(f"{name:<34} {result['mean_ms']:>11.3f} {result['p50_ms']:>10.3f} "
+              f"{result['p95_ms']:>10.3f} {result['ops_per_s']:>9.1f}")
+
+    report = {'environment': environment(args), 'results': results}
+    output = Path(args.output or ROOT / 'benchmarks' / 'results' /
+                  f"{report['environment']['commit'] or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\n💾 Resultados: {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n❌ Regresiones (> {args.threshold:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
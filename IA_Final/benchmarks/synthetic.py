@@ -0,0 +1,133 @@
+# Datos sintéticos para los benchmarks (no requieren el dataset)
+
+import time
+import zlib
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def make_synthetic_video(path, frames=300, width=1280, height=720, fps=30, seed=0):
+    """
+    Genera un video con fondo estático y rectángulos en movimiento
+
+    Simula una cámara fija de obra: la mayor parte de la escena no cambia
+    y unas pocas "personas" cruzan el plano.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+    walkers = [
+        {
+            'x': float(rng.integers(0, width - 120)),
+            'y': float(rng.integers(0, height - 260)),
+            'dx': float(rng.uniform(-6, 6)),
+            'color': tuple(int(c) for c in rng.integers(0, 255, size=3))
+        }
+        for _ in range(3)
+    ]
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for _ in range(frames):
+        frame = background.copy()
+        for w in walkers:
+            w['x'] = (w['x'] + w['dx']) % (width - 120)
+            x, y = int(w['x']), int(w['y'])
+            cv2.rectangle(frame, (x, y), (x + 120, y + 260), w['color'], -1)
+            cv2.circle(frame, (x + 60, y - 25), 25, (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def make_synthetic_image(width=1280, height=720, persons=3, seed=0):
+    """Imagen BGR con fondo de obra y unas cuantas siluetas"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+    for _ in range(persons):
+        x = int(rng.integers(0, max(width - 120, 1)))
+        y = int(rng.integers(50, max(height - 260, 51)))
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        cv2.rectangle(image, (x, y), (x + 120, y + 260), color, -1)
+        cv2.circle(image, (x + 60, y - 25), 25, (0, 200, 255), -1)
+    return image
+
+
+# Mismas clases que ppe_data.yaml
+PPE_NAMES = {
+    0: 'helmet', 1: 'gloves', 2: 'vest', 3: 'boots', 4: 'goggles', 5: 'none',
+    6: 'Person', 7: 'no_helmet', 8: 'no_goggle', 9: 'no_gloves', 10: 'no_boots'
+}
+
+# Posición de cada EPP dentro de la persona (fracciones x1, y1, x2, y2)
+_PPE_LAYOUT = {
+    0: (0.25, 0.00, 0.75, 0.15),  # helmet
+    4: (0.30, 0.08, 0.70, 0.16),  # goggles
+    2: (0.15, 0.20, 0.85, 0.55),  # vest
+    1: (0.00, 0.45, 0.20, 0.60),  # gloves
+    3: (0.20, 0.85, 0.80, 1.00),  # boots
+}
+
+
+class SyntheticModel:
+    """
+    Modelo falso con la interfaz de YOLO de ultralytics
+
+    Devuelve Results reales (mismas cajas para la misma imagen) sin
+    pesos ni GPU, con una latencia simulada configurable, para que los
+    benchmarks midan el código de la aplicación alrededor del modelo.
+    Se inyecta con registry.register(ruta, SyntheticModel()).
+    """
+
+    def __init__(self, persons=3, latency_ms=0.0, overhead_ms=0.0, names=None):
+        self.names = dict(names or PPE_NAMES)
+        self.persons = persons
+        self.latency_ms = latency_ms
+        self.overhead_ms = overhead_ms
+        self.person_id = next(i for i, n in self.names.items() if n == 'Person')
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+    def _detections(self, image):
+        """Cajas (N, 6) deterministas a partir del contenido de la imagen"""
+        height, width = image.shape[:2]
+        rng = np.random.default_rng(zlib.crc32(image[::32, ::32].tobytes()))
+        rows = []
+        for _ in range(self.persons):
+            w = width * rng.uniform(0.08, 0.15)
+            h = w * rng.uniform(2.0, 2.6)
+            x1 = rng.uniform(0, max(width - w, 1))
+            y1 = rng.uniform(0, max(height - h, 1))
+            rows.append([x1, y1, x1 + w, y1 + h, rng.uniform(0.5, 0.95), self.person_id])
+            for class_id, (fx1, fy1, fx2, fy2) in _PPE_LAYOUT.items():
+                if rng.random() < 0.8:
+                    rows.append([x1 + fx1 * w, y1 + fy1 * h, x1 + fx2 * w, y1 + fy2 * h,
+                                 rng.uniform(0.2, 0.95), class_id])
+        return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+    def predict(self, source=None, conf=0.25, classes=None, verbose=False, **kwargs):
+        from ultralytics.engine.results import Results
+        import torch
+
+        sources = source if isinstance(source, (list, tuple)) else [source]
+        images, paths = [], []
+        for item in sources:
+            if isinstance(item, (str, Path)):
+                images.append(cv2.imread(str(item)))
+                paths.append(str(item))
+            else:
+                images.append(item)
+                paths.append('image0.jpg')
+
+        time.sleep((self.overhead_ms + self.latency_ms * len(images)) / 1000)
+        results = []
+        for image, path in zip(images, paths):
+            boxes = self._detections(image)
+            mask = boxes[:, 4] > conf
+            if classes is not None:
+                mask &= np.isin(boxes[:, 5], classes)
+            speed = {'preprocess': 0.0, 'inference': self.latency_ms, 'postprocess': 0.0}
+            results.append(Results(image, path=path, names=self.names,
+                                   boxes=torch.from_numpy(boxes[mask]), speed=speed))
+        return results
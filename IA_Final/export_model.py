@@ -0,0 +1,111 @@
+# Exporta best.pt a ONNX para los backends de CPU (ONNX Runtime / OpenVINO)
+# Opcionalmente cuantiza a INT8 calibrando con un subconjunto de datasets/images/val.
+#
+# Uso (desde IA_Final):
+#   python export_model.py
+#   python export_model.py --int8 --calibration-images 200
+#
+# Luego arranca la API con:
+#   EPP_MODEL_PATH=runs/detect/train10/weights/best_int8.onnx EPP_BACKEND=openvino python api.py
+
+import argparse
+import json
+import random
+import shutil
+import sys
+from pathlib import Path
+
+import cv2
+
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+from inference_backends import letterbox, to_tensor
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def export_onnx(weights, imgsz, dynamic):
+    """Exporta con ultralytics y deja un JSON con clases e imgsz al lado"""
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    onnx_path = Path(model.export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True))
+    onnx_path.with_suffix('.json').write_text(json.dumps({
+        'names': {int(k): v for k, v in model.names.items()},
+        'imgsz': imgsz
+    }, indent=2))
+    print(f"✅ ONNX exportado: {onnx_path}")
+    return onnx_path
+
+
+class ValCalibrationReader:
+    """Lector de calibración para onnxruntime.quantization (una imagen por lote)"""
+
+    def __init__(self, image_paths, imgsz, input_name):
+        self.image_paths = iter(image_paths)
+        self.imgsz = imgsz
+        self.input_name = input_name
+
+    def get_next(self):
+        for path in self.image_paths:
+            image = cv2.imread(str(path))
+            if image is None:
+                continue
+            return {self.input_name: to_tensor([letterbox(image, self.imgsz)[0]])}
+        return None
+
+
+def quantize_int8(onnx_path, calibration_dir, count, imgsz, seed):
+    """Cuantización estática INT8 (formato QDQ, lo leen ORT y OpenVINO)"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    images = sorted(p for p in Path(calibration_dir).rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not images:
+        raise SystemExit(f"❌ No hay imágenes de calibración en {calibration_dir}")
+    random.Random(seed).shuffle(images)
+    images = images[:count]
+    print(f"📊 Calibrando con {len(images)} imágenes de {calibration_dir}")
+
+    prepared_path = onnx_path.with_name(f"{onnx_path.stem}_prep.onnx")
+    int8_path = onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+    quant_pre_process(str(onnx_path), str(prepared_path))
+
+    input_name = ort.InferenceSession(
+        str(prepared_path), providers=['CPUExecutionProvider']
+    ).get_inputs()[0].name
+    quantize_static(
+        str(prepared_path),
+        str(int8_path),
+        ValCalibrationReader(images, imgsz, input_name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    prepared_path.unlink(missing_ok=True)
+    shutil.copy(onnx_path.with_suffix('.json'), int8_path.with_suffix('.json'))
+    print(f"✅ Modelo INT8: {int8_path}")
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar best.pt a ONNX (FP32/INT8)")
+    parser.add_argument('--weights', default='runs/detect/train10/weights/best.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--dynamic', action='store_true',
+                        help='Lote dinámico (permite micro-batching en el backend)')
+    parser.add_argument('--int8', action='store_true', help='Cuantizar también a INT8')
+    parser.add_argument('--calibration-dir', default='../datasets/images/val')
+    parser.add_argument('--calibration-images', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    onnx_path = export_onnx(args.weights, args.imgsz, args.dynamic)
+    if args.int8:
+        quantize_int8(onnx_path, args.calibration_dir, args.calibration_images, args.imgsz, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def overlap_matrix(person_boxes, item_boxes):
+    """
+    Fracción del área de cada item que cae dentro de cada persona
+
+    Args:
+        person_boxes: Array (P, 4) xyxy
+        item_boxes: Array (N, 4) xyxy
+
+    Returns:
+        Array (P, N): intersección / área del item (0 si no se tocan)
+    """
+    px1, py1, px2, py2 = (person_boxes[:, None, k] for k in range(4))
+    ix1, iy1, ix2, iy2 = (item_boxes[None, :, k] for k in range(4))
+
+    width = np.minimum(px2, ix2) - np.maximum(px1, ix1)
+    height = np.minimum(py2, iy2) - np.maximum(py1, iy1)
+    touching = (width > 0) & (height > 0)
+
+    intersection = width * height
+    item_area = np.broadcast_to((ix2 - ix1) * (iy2 - iy1), intersection.shape)
+    ratio = np.zeros_like(intersection)
+    np.divide(intersection, item_area, out=ratio, where=touching)
+    return ratio
+
+
+def associate(person_boxes, items_by_class, threshold=0.3):
+    """
+    Asocia EPP a personas para todas las clases a la vez
+
+    Equivale a llamar EPPComplianceChecker.check_overlap por cada
+    persona y cada clase, pero calcula una sola matriz personas x items
+    con todos los items concatenados.
+
+    Args:
+        person_boxes: Lista/array de cajas de persona [x1, y1, x2, y2]
+        items_by_class: dict {clase: lista de cajas}
+        threshold: % de superposición mínimo
+
+    Returns:
+        dict {clase: array bool (P,)} - True si la persona tiene ese item
+    """
+    persons = np.asarray(person_boxes)
+    dtype = persons.dtype if np.issubdtype(persons.dtype, np.floating) else np.float64
+    persons = persons.astype(dtype, copy=False).reshape(-1, 4)
+
+    classes = list(items_by_class)
+    counts = [len(items_by_class[name]) for name in classes]
+    flags = {name: np.zeros(len(persons), dtype=bool) for name in classes}
+    if len(persons) == 0 or sum(counts) == 0:
+        return flags
+
+    items = np.concatenate([
+        np.asarray(items_by_class[name], dtype=dtype).reshape(-1, 4) for name in classes
+    ])
+    hits = overlap_matrix(persons, items) > threshold
+
+    # Reducir columnas por clase: cualquier item de la clase basta
+    starts = np.cumsum([0] + counts[:-1])
+    present = [c for c, n in enumerate(counts) if n > 0]
+    reduced = np.logical_or.reduceat(hits, starts[present], axis=1)
+    for column, c in enumerate(present):
+        flags[classes[c]] = reduced[:, column]
+    return flags
@@ -0,0 +1,130 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import tracing
+from percentiles import percentile
+
+
+class InferenceQueueFull(Exception):
+    """Cola de lotes llena: la API responde 503 con Retry-After"""
+
+
+class MicroBatcher:
+    """
+    Agrupador de peticiones concurrentes en lotes (micro-batching)
+
+    Las peticiones que llegan dentro de una ventana corta (max_wait_ms) o
+    hasta completar max_batch_size se procesan con una sola llamada a
+    batch_fn, que recibe la lista de items y devuelve la lista de
+    resultados en el mismo orden. Cada petición recibe su resultado a
+    través de un Future; si batch_fn devuelve una excepción en la
+    posición de un item, solo esa petición falla.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=10, max_queue=64,
+                 name='epp-batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+
+        # Métricas
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._size_counts = {}
+        self._waits = deque(maxlen=1024)
+
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, *item):
+        """Encola un item y devuelve un Future con su resultado"""
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter(), tracing.current_trace()))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise InferenceQueueFull(
+                f"Cola de lotes llena ({self.max_queue} peticiones en espera)"
+            )
+        return future
+
+    async def run(self, *item):
+        """Versión async de submit para los endpoints"""
+        return await asyncio.wrap_future(self.submit(*item))
+
+    def _collect(self):
+        """Espera el primer item y junta los que lleguen dentro de la ventana"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _, _ in batch]
+            futures = [future for _, future, _, _ in batch]
+            traces = [trace for _, _, _, trace in batch]
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._size_counts[len(batch)] = self._size_counts.get(len(batch), 0) + 1
+                self._waits.extend(started - enqueued for _, _, enqueued, _ in batch)
+
+            # Peticiones con trazado: espera en cola y spans del lote compartido
+            for _, _, enqueued, trace in batch:
+                if trace is not None:
+                    trace.add_span('queue_wait', enqueued, started, batch_size=len(batch))
+
+            try:
+                with tracing.attach(traces):
+                    results = self.batch_fn(items)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def metrics(self):
+        """Tamaño de lote y espera en cola observados"""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'rejected': self._rejected,
+                'avg_batch_size': self._items / self._batches if self._batches else 0,
+                'batch_size_counts': dict(sorted(self._size_counts.items())),
+                'queue_wait_ms': {
+                    'avg': sum(waits) / len(waits) * 1000 if waits else 0,
+                    'p50': percentile(waits, 0.50) * 1000,
+                    'p95': percentile(waits, 0.95) * 1000,
+                    'max': waits[-1] * 1000 if waits else 0
+                }
+            }
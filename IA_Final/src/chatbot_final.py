@@ -1,13 +1,164 @@
 from compliance_checker import EPPComplianceChecker
+from intent_router import Intent, IntentRouter
 import os
 
+
+# ============================================
+# INTENCIONES (en orden de prioridad)
+# ============================================
+INTENTS = [
+    # Sobre la imagen analizada
+    Intent('cumplimiento', ['cumple', 'cumplimiento', 'norma'], needs_context=True),
+    Intent('falta', ['falta', 'necesita', 'le falta'], needs_context=True),
+    Intent('detecciones', ['detectaste'], weak_keywords=['viste', 'hay'], needs_context=True),
+    Intent('reporte', ['reporte', 'resumen'], weak_keywords=['todo'], needs_context=True),
+    # Normativas (generales)
+    Intent('que_es_epp', ['qué es epp', 'define epp', 'epp?']),
+    Intent('normativas', ['normativa', 'obligatorio', 'requisito', 'ley', 'seguridad']),
+    Intent('funcionamiento', ['cómo funciona', 'sistema', 'funciona']),
+    Intent('cascos', ['tipos de casco', 'tipo de casco', 'cascos', 'tipos casco']),
+    Intent('chaleco', ['chaleco', 'importancia chaleco', 'vest']),
+    Intent('guantes', ['guante', 'mano', 'protección de manos', 'proteccion manos']),
+    Intent('ayuda', exact=['ayuda', 'help', '?']),
+    Intent('saludo', ['hola', 'buenos', 'hey', 'buenas']),
+]
+ROUTER = IntentRouter(INTENTS)
+
+# Respuestas fijas, construidas una sola vez al importar
+RESPUESTAS = {
+    'que_es_epp': (
+        "🛡️ **¿QUÉ ES EPP?**\n\n"
+        "EPP = Equipos de Protección Personal\n\n"
+        "Son dispositivos y prendas que protegen al trabajador de riesgos que pueden amenazar su seguridad o salud.\n\n"
+        "✅ **EPP Básicos Obligatorios:**\n"
+        "• ⛑️ Casco de seguridad\n"
+        "• 🦺 Chaleco reflectivo\n"
+        "• 🧤 Guantes de trabajo\n"
+        "• 🥽 Gafas de protección\n"
+        "• 🥾 Botas de seguridad\n\n"
+        "📋 Su uso es obligatorio según normativas de seguridad laboral"
+    ),
+    'normativas': (
+        "📋 **NORMATIVAS DE SEGURIDAD EPP**\n\n"
+        "🌎 **Normativas Internacionales:**\n"
+        "• OSHA (Occupational Safety and Health Administration)\n"
+        "• ANSI Z89.1 - Cascos de protección\n"
+        "• ANSI 107 / ISO 20471 - Ropa de alta visibilidad\n"
+        "• EN 388 - Guantes de protección\n\n"
+        "✅ **Requisitos Obligatorios:**\n"
+        "1. Casco en áreas de construcción e industria\n"
+        "2. Chaleco en zonas con vehículos\n"
+        "3. Guantes para manipulación de materiales\n"
+        "4. Gafas en trabajos con partículas\n"
+        "5. Botas con puntera de acero\n\n"
+        "⚖️ El incumplimiento puede resultar en multas y suspensión de actividades"
+    ),
+    'funcionamiento': (
+        "🤖 **¿CÓMO FUNCIONA EL SISTEMA?**\n\n"
+        "Nuestro sistema usa Inteligencia Artificial (YOLOv8) para detectar EPP en tiempo real:\n\n"
+        "📸 **Para Imágenes:**\n"
+        "1. Subes una foto del trabajador\n"
+        "2. La IA detecta personas y EPP\n"
+        "3. Verifica cumplimiento (casco, chaleco, guantes, gafas)\n"
+        "4. Muestra qué implementos faltan\n\n"
+        "🎥 **Para Videos:**\n"
+        "1. Subes un video\n"
+        "2. Análisis frame por frame\n"
+        "3. Detección en tiempo real\n"
+        "4. Reporte completo de cumplimiento\n\n"
+        "✨ **Precisión:** 99.2%\n"
+        "⚡ **Velocidad:** <50ms por imagen"
+    ),
+    'cascos': (
+        "⛑️ **TIPOS DE CASCOS DE SEGURIDAD**\n\n"
+        "**Clase G (General):**\n"
+        "• Protección contra impactos\n"
+        "• Resistencia a 2,200V\n"
+        "• Uso: Construcción general\n\n"
+        "**Clase E (Eléctrica):**\n"
+        "• Alta resistencia dieléctrica\n"
+        "• Protección hasta 20,000V\n"
+        "• Uso: Trabajos eléctricos\n\n"
+        "**Clase C (Conductora):**\n"
+        "• Sin protección eléctrica\n"
+        "• Ventilación mejorada\n"
+        "• Uso: Áreas sin riesgo eléctrico\n\n"
+        "🎨 **Por Color:**\n"
+        "• Blanco: Supervisores\n"
+        "• Amarillo: Operarios\n"
+        "• Azul: Electricistas\n"
+        "• Verde: Brigadistas"
+    ),
+    'chaleco': (
+        "🦺 **IMPORTANCIA DEL CHALECO REFLECTIVO**\n\n"
+        "**¿Por qué es obligatorio?**\n"
+        "• Aumenta visibilidad hasta 500 metros\n"
+        "• Reduce accidentes vehiculares en 50%\n"
+        "• Obligatorio en zonas de tráfico\n\n"
+        "**Características clave:**\n"
+        "• Material reflectivo de alta intensidad\n"
+        "• Colores fluorescentes (amarillo/naranja)\n"
+        "• Debe cumplir ANSI 107 Clase 2 o 3\n\n"
+        "**Cuándo usarlo:**\n"
+        "✅ Cerca de vehículos o maquinaria\n"
+        "✅ Áreas de baja iluminación\n"
+        "✅ Carreteras y vías públicas\n"
+        "✅ Almacenes y zonas logísticas\n\n"
+        "⚠️ Sin chaleco = 60% más riesgo de atropello"
+    ),
+    'guantes': (
+        "🧤 **PROTECCIÓN DE MANOS - GUANTES**\n\n"
+        "**¿Por qué son importantes?**\n"
+        "• Las manos sufren 25% de lesiones laborales\n"
+        "• Protegen contra cortes, químicos, calor\n\n"
+        "**Tipos de Guantes:**\n\n"
+        "**1. Cuero:**\n"
+        "   • Construcción y carpintería\n"
+        "   • Protección contra abrasión\n\n"
+        "**2. Nitrilo:**\n"
+        "   • Manipulación de químicos\n"
+        "   • Resistente a aceites\n\n"
+        "**3. Látex:**\n"
+        "   • Uso médico y limpieza\n"
+        "   • Sensibilidad táctil\n\n"
+        "**4. Anticorte:**\n"
+        "   • Manejo de vidrio y metal\n"
+        "   • Nivel 5 de protección\n\n"
+        "**5. Térmicos:**\n"
+        "   • Trabajos con calor/frío\n"
+        "   • Hasta -50°C o +300°C\n\n"
+        "📏 Elige según la tarea específica"
+    ),
+    'saludo': (
+        "¡Hola! 👋 Soy tu asistente EPP.\n\n"
+        "Puedo ayudarte con:\n"
+        "• Preguntas sobre normativas EPP\n"
+        "• Tipos de equipos de protección\n"
+        "• Verificar cumplimiento en imágenes/videos\n\n"
+        "¿Qué necesitas saber?"
+    ),
+    'desconocida': (
+        "🤔 No entendí tu pregunta.\n\n"
+        "**Puedes preguntar:**\n"
+        "• '¿Qué es EPP?'\n"
+        "• 'Normativas de seguridad'\n"
+        "• '¿Cómo funciona el sistema?'\n"
+        "• 'Tipos de cascos'\n"
+        "• 'Importancia del chaleco'\n"
+        "• 'Protección de manos'\n\n"
+        "Escribe 'ayuda' para ver todas las opciones"
+    ),
+}
+
+
 class ChatbotEPP:
     """
     Chatbot unificado: Responde normativas + Analiza imágenes
     """
     
-    def __init__(self, model_path):
-        self.checker = EPPComplianceChecker(model_path)
+    def __init__(self, model_path, checker=None):
+        # Reutilizar el checker de quien nos crea si lo comparte
+        self.checker = checker or EPPComplianceChecker(model_path)
         self.last_analysis = None
         self.last_image = None
         print("🤖 Chatbot EPP inicializado")
@@ -34,172 +185,35 @@ class ChatbotEPP:
     
     def responder(self, pregunta):
         """Responde preguntas (normativas o sobre la imagen analizada)"""
-        
-        pregunta_lower = pregunta.lower()
-        
-        # ============================================
-        # PREGUNTAS SOBRE LA IMAGEN ANALIZADA
-        # ============================================
-        if self.last_analysis:
-            
-            # ¿Cumple?
-            if any(word in pregunta_lower for word in ['cumple', 'cumplimiento', 'norma']):
-                return self._responder_cumplimiento()
-            
-            # ¿Qué falta?
-            if any(word in pregunta_lower for word in ['falta', 'necesita', 'le falta']):
-                return self._responder_falta()
-            
-            # ¿Qué detectaste?
-            if any(word in pregunta_lower for word in ['detectaste', 'viste', 'hay']):
-                return self._responder_detecciones()
-            
-            # Reporte completo
-            if any(word in pregunta_lower for word in ['reporte', 'resumen', 'todo']):
-                return self._responder_reporte()
-        
-        # ============================================
-        # PREGUNTAS SOBRE NORMATIVAS (GENERALES)
-        # ============================================
-        
-        # ¿Qué es EPP?
-        if any(word in pregunta_lower for word in ['qué es epp', 'que es epp', 'define epp', 'epp?']):
-            return ("🛡️ **¿QUÉ ES EPP?**\n\n"
-                   "EPP = Equipos de Protección Personal\n\n"
-                   "Son dispositivos y prendas que protegen al trabajador de riesgos que pueden amenazar su seguridad o salud.\n\n"
-                   "✅ **EPP Básicos Obligatorios:**\n"
-                   "• ⛑️ Casco de seguridad\n"
-                   "• 🦺 Chaleco reflectivo\n"
-                   "• 🧤 Guantes de trabajo\n"
-                   "• 🥽 Gafas de protección\n"
-                   "• 🥾 Botas de seguridad\n\n"
-                   "📋 Su uso es obligatorio según normativas de seguridad laboral")
-        
-        # Normativas de seguridad
-        if any(word in pregunta_lower for word in ['normativa', 'obligatorio', 'requisito', 'ley', 'seguridad']):
-            return ("📋 **NORMATIVAS DE SEGURIDAD EPP**\n\n"
-                   "🌎 **Normativas Internacionales:**\n"
-                   "• OSHA (Occupational Safety and Health Administration)\n"
-                   "• ANSI Z89.1 - Cascos de protección\n"
-                   "• ANSI 107 / ISO 20471 - Ropa de alta visibilidad\n"
-                   "• EN 388 - Guantes de protección\n\n"
-                   "✅ **Requisitos Obligatorios:**\n"
-                   "1. Casco en áreas de construcción e industria\n"
-                   "2. Chaleco en zonas con vehículos\n"
-                   "3. Guantes para manipulación de materiales\n"
-                   "4. Gafas en trabajos con partículas\n"
-                   "5. Botas con puntera de acero\n\n"
-                   "⚖️ El incumplimiento puede resultar en multas y suspensión de actividades")
-        
-        # ¿Cómo funciona el sistema?
-        if any(word in pregunta_lower for word in ['cómo funciona', 'como funciona', 'sistema', 'funciona']):
-            return ("🤖 **¿CÓMO FUNCIONA EL SISTEMA?**\n\n"
-                   "Nuestro sistema usa Inteligencia Artificial (YOLOv8) para detectar EPP en tiempo real:\n\n"
-                   "📸 **Para Imágenes:**\n"
-                   "1. Subes una foto del trabajador\n"
-                   "2. La IA detecta personas y EPP\n"
-                   "3. Verifica cumplimiento (casco, chaleco, guantes, gafas)\n"
-                   "4. Muestra qué implementos faltan\n\n"
-                   "🎥 **Para Videos:**\n"
-                   "1. Subes un video\n"
-                   "2. Análisis frame por frame\n"
-                   "3. Detección en tiempo real\n"
-                   "4. Reporte completo de cumplimiento\n\n"
-                   "✨ **Precisión:** 99.2%\n"
-                   "⚡ **Velocidad:** <50ms por imagen")
-        
-        # Tipos de cascos
-        if any(word in pregunta_lower for word in ['tipos de casco', 'tipo de casco', 'cascos', 'tipos casco']):
-            return ("⛑️ **TIPOS DE CASCOS DE SEGURIDAD**\n\n"
-                   "**Clase G (General):**\n"
-                   "• Protección contra impactos\n"
-                   "• Resistencia a 2,200V\n"
-                   "• Uso: Construcción general\n\n"
-                   "**Clase E (Eléctrica):**\n"
-                   "• Alta resistencia dieléctrica\n"
-                   "• Protección hasta 20,000V\n"
-                   "• Uso: Trabajos eléctricos\n\n"
-                   "**Clase C (Conductora):**\n"
-                   "• Sin protección eléctrica\n"
-                   "• Ventilación mejorada\n"
-                   "• Uso: Áreas sin riesgo eléctrico\n\n"
-                   "🎨 **Por Color:**\n"
-                   "• Blanco: Supervisores\n"
-                   "• Amarillo: Operarios\n"
-                   "• Azul: Electricistas\n"
-                   "• Verde: Brigadistas")
-        
-        # Importancia del chaleco
-        if any(word in pregunta_lower for word in ['chaleco', 'importancia chaleco', 'vest']):
-            return ("🦺 **IMPORTANCIA DEL CHALECO REFLECTIVO**\n\n"
-                   "**¿Por qué es obligatorio?**\n"
-                   "• Aumenta visibilidad hasta 500 metros\n"
-                   "• Reduce accidentes vehiculares en 50%\n"
-                   "• Obligatorio en zonas de tráfico\n\n"
-                   "**Características clave:**\n"
-                   "• Material reflectivo de alta intensidad\n"
-                   "• Colores fluorescentes (amarillo/naranja)\n"
-                   "• Debe cumplir ANSI 107 Clase 2 o 3\n\n"
-                   "**Cuándo usarlo:**\n"
-                   "✅ Cerca de vehículos o maquinaria\n"
-                   "✅ Áreas de baja iluminación\n"
-                   "✅ Carreteras y vías públicas\n"
-                   "✅ Almacenes y zonas logísticas\n\n"
-                   "⚠️ Sin chaleco = 60% más riesgo de atropello")
-        
-        # Protección de manos / Guantes
-        if any(word in pregunta_lower for word in ['guante', 'mano', 'protección de manos', 'proteccion manos']):
-            return ("🧤 **PROTECCIÓN DE MANOS - GUANTES**\n\n"
-                   "**¿Por qué son importantes?**\n"
-                   "• Las manos sufren 25% de lesiones laborales\n"
-                   "• Protegen contra cortes, químicos, calor\n\n"
-                   "**Tipos de Guantes:**\n\n"
-                   "**1. Cuero:**\n"
-                   "   • Construcción y carpintería\n"
-                   "   • Protección contra abrasión\n\n"
-                   "**2. Nitrilo:**\n"
-                   "   • Manipulación de químicos\n"
-                   "   • Resistente a aceites\n\n"
-                   "**3. Látex:**\n"
-                   "   • Uso médico y limpieza\n"
-                   "   • Sensibilidad táctil\n\n"
-                   "**4. Anticorte:**\n"
-                   "   • Manejo de vidrio y metal\n"
-                   "   • Nivel 5 de protección\n\n"
-                   "**5. Térmicos:**\n"
-                   "   • Trabajos con calor/frío\n"
-                   "   • Hasta -50°C o +300°C\n\n"
-                   "📏 Elige según la tarea específica")
-        
-        # Ayuda
-        if pregunta_lower in ['ayuda', 'help', '?']:
-            return self._mostrar_ayuda()
-        
-        # Saludos
-        if any(word in pregunta_lower for word in ['hola', 'buenos', 'hey', 'buenas']):
-            return ("¡Hola! 👋 Soy tu asistente EPP.\n\n"
-                   "Puedo ayudarte con:\n"
-                   "• Preguntas sobre normativas EPP\n"
-                   "• Tipos de equipos de protección\n"
-                   "• Verificar cumplimiento en imágenes/videos\n\n"
-                   "¿Qué necesitas saber?")
-        
-        # No entendió
-        return ("🤔 No entendí tu pregunta.\n\n"
-               "**Puedes preguntar:**\n"
-               "• '¿Qué es EPP?'\n"
-               "• 'Normativas de seguridad'\n"
-               "• '¿Cómo funciona el sistema?'\n"
-               "• 'Tipos de cascos'\n"
-               "• 'Importancia del chaleco'\n"
-               "• 'Protección de manos'\n\n"
-               "Escribe 'ayuda' para ver todas las opciones")
+        intent = ROUTER.route(pregunta, context=bool(self.last_analysis))
+        return self.responder_intencion(intent)
     
-    def _responder_cumplimiento(self):
+    def responder_intencion(self, intent, analysis=None):
+        """
+        Respuesta para una intención ya resuelta (None = no entendida)
+
+        analysis es el análisis sobre el que responder; la API pasa el de
+        la sesión de quien pregunta, la consola usa el último propio.
+        """
+        if analysis is None:
+            analysis = self.last_analysis
+        if intent == 'cumplimiento':
+            return self._responder_cumplimiento(analysis)
+        if intent == 'falta':
+            return self._responder_falta(analysis)
+        if intent == 'detecciones':
+            return self._responder_detecciones(analysis)
+        if intent == 'reporte':
+            return self._responder_reporte(analysis)
+        if intent == 'ayuda':
+            return self._mostrar_ayuda(analysis)
+        return RESPUESTAS.get(intent, RESPUESTAS['desconocida'])
+    
+    def _responder_cumplimiento(self, analysis):
         """Responde si cumple con normativas"""
-        total = self.last_analysis['total_persons']
-        compliant = self.last_analysis['summary']['compliant']
-        non_compliant = self.last_analysis['summary']['non_compliant']
+        total = analysis['total_persons']
+        compliant = analysis['summary']['compliant']
+        non_compliant = analysis['summary']['non_compliant']
         
         if total == 0:
             return "❌ No detecté personas en la imagen"
@@ -221,11 +235,11 @@ class ChatbotEPP:
                    f"✗ Con violaciones: {non_compliant}\n\n"
                    f"🚨 URGENTE: Detener actividades hasta corregir")
     
-    def _responder_falta(self):
+    def _responder_falta(self, analysis):
         """Responde qué EPP falta"""
         missing_all = []
         
-        for person in self.last_analysis['compliance_results']:
+        for person in analysis['compliance_results']:
             if not person['complies']:
                 missing_all.extend(person['missing_items'])
         
@@ -242,14 +256,14 @@ class ChatbotEPP:
         
         return response
     
-    def _responder_detecciones(self):
+    def _responder_detecciones(self, analysis):
         """Responde qué se detectó"""
-        total = self.last_analysis['total_persons']
-        detections = self.last_analysis['total_detections']
+        total = analysis['total_persons']
+        detections = analysis['total_detections']
         
         # Contar por tipo
         counts = {}
-        for person in self.last_analysis['compliance_results']:
+        for person in analysis['compliance_results']:
             if person.get('has_helmet'):
                 counts['Cascos'] = counts.get('Cascos', 0) + 1
             if person.get('has_vest'):
@@ -270,16 +284,16 @@ class ChatbotEPP:
         
         return response
     
-    def _responder_reporte(self):
+    def _responder_reporte(self, analysis):
         """Genera reporte completo"""
-        self.checker.generate_report(self.last_analysis)
+        self.checker.generate_report(analysis)
         return "📊 Reporte mostrado arriba ⬆️"
     
-    def _mostrar_ayuda(self):
+    def _mostrar_ayuda(self, analysis):
         """Muestra ayuda"""
         help_text = "🆘 **COMANDOS DISPONIBLES**\n\n"
         
-        if self.last_analysis:
+        if analysis:
             help_text += "**Sobre la imagen analizada:**\n"
             help_text += "  • '¿cumple?'\n"
             help_text += "  • '¿qué falta?'\n"
@@ -1,7 +1,13 @@
-from ultralytics import YOLO
 import numpy as np
-import cv2
 import os
+import threading
+
+from model_registry import registry
+from association import associate
+from nms import to_numpy, batched_nms
+from frame_sampler import person_class_id
+from metrics import observe_model_speed
+from tracing import span
 
 
 class EPPComplianceChecker:
@@ -22,11 +28,54 @@ class EPPComplianceChecker:
     ============================================
     """
     
-    def __init__(self, model_path):
-        """Inicializar con el modelo entrenado"""
-        self.model = YOLO(model_path)
-        print(f"✅ Modelo cargado: {model_path}")
-        print(f"📋 Clases: {self.model.names}")
+    def __init__(self, model_path, device=None, cascade=False,
+                 person_imgsz=416, crop_imgsz=320, crop_margin=0.15, lazy=False):
+        """
+        Inicializar con el modelo entrenado (compartido vía registro)
+        
+        Args:
+            model_path: Ruta de los pesos
+            device: Dispositivo de inferencia (opcional)
+            cascade: Modo persona-primero (ver predict_cascade)
+            person_imgsz: Resolución de la pasada de personas
+            crop_imgsz: Resolución de cada recorte de persona
+            crop_margin: Margen añadido a cada persona al recortar
+            lazy: No cargar los pesos hasta load() o el primer uso
+        """
+        self.model_path = model_path
+        self.device = device
+        self.person_imgsz = person_imgsz
+        self.crop_imgsz = crop_imgsz
+        self.crop_margin = crop_margin
+        
+        self._cascade_requested = cascade
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._predict_lock = None
+        self.person_id = None
+        self.cascade = False
+        if not lazy:
+            self.load()
+    
+    def load(self):
+        """Obtiene el modelo del registro (lo carga la primera vez)"""
+        with self._load_lock:
+            if self._model is None:
+                model = registry.acquire(self.model_path, self.device)
+                # El modelo se comparte entre hilos: serializar predict
+                self._predict_lock = registry.lock_for(self.model_path, self.device)
+                self.person_id = person_class_id(model.names)
+                self.cascade = self._cascade_requested and self.person_id is not None
+                self._model = model
+        return self._model
+    
+    @property
+    def loaded(self):
+        return self._model is not None
+    
+    @property
+    def model(self):
+        return self._model if self._model is not None else self.load()
     
     def check_overlap(self, person_box, item_boxes, threshold=0.3):
         """
@@ -64,6 +113,89 @@ class EPPComplianceChecker:
         
         return False
     
+    def predict(self, source, conf=0.25):
+        """
+        Inferencia del checker: imagen completa o en cascada
+        
+        Args:
+            source: Ruta, array BGR o lista de ellos
+            conf: Confianza mínima
+        
+        Returns:
+            list: Un Results de YOLO por imagen
+        """
+        if self._model is None:
+            self.load()
+        with span('inference', cascade=self.cascade), self._predict_lock:
+            if self.cascade:
+                return self.predict_cascade(source, conf)
+            results = self.model.predict(source=source, conf=conf, verbose=False)
+        observe_model_speed(results)
+        return results
+    
+    def predict_cascade(self, source, conf=0.25):
+        """
+        Cascada persona-primero para cámaras de alta resolución
+        
+        ============================================
+        ETAPAS:
+        ============================================
+        1. Personas a baja resolución (person_imgsz) sobre el frame completo.
+        2. EPP solo dentro de cada persona: los recortes de todas las
+           imágenes van en un único lote a crop_imgsz, así guantes y gafas
+           conservan resolución sin inferir el frame completo en alta.
+        3. Las cajas de EPP se trasladan a coordenadas del frame y se
+           fusionan con un NMS por clase (recortes solapados).
+        ============================================
+        El coste crece con el número de personas, no con los píxeles.
+        Llamar con el lock del modelo tomado (lo hace predict).
+        """
+        ppe_ids = [class_id for class_id in self.model.names if class_id != self.person_id]
+        frames = self.model.predict(source=source, conf=conf, imgsz=self.person_imgsz,
+                                    classes=[self.person_id], verbose=False)
+        observe_model_speed(frames)
+        
+        # Recortes de persona con margen (el casco puede sobresalir)
+        crops, owners = [], []
+        for i, frame in enumerate(frames):
+            height, width = frame.orig_shape
+            for x1, y1, x2, y2 in frame.boxes.xyxy.cpu().numpy():
+                mx, my = (x2 - x1) * self.crop_margin, (y2 - y1) * self.crop_margin
+                cx1, cy1 = int(max(0, x1 - mx)), int(max(0, y1 - my))
+                cx2, cy2 = int(min(width, x2 + mx)), int(min(height, y2 + my))
+                if cx2 - cx1 < 2 or cy2 - cy1 < 2:
+                    continue
+                crops.append(frame.orig_img[cy1:cy2, cx1:cx2])
+                owners.append((i, cx1, cy1))
+        
+        crop_results = []
+        if crops:
+            crop_results = self.model.predict(source=crops, conf=conf, imgsz=self.crop_imgsz,
+                                              classes=ppe_ids, verbose=False)
+            observe_model_speed(crop_results)
+        
+        # Llevar el EPP de cada recorte a coordenadas del frame (NumPy:
+        # igual con Results de ultralytics o del backend ONNX)
+        parts = [[to_numpy(frame.boxes.data)] for frame in frames]
+        for (i, ox, oy), crop_result in zip(owners, crop_results):
+            data = to_numpy(crop_result.boxes.data).copy()
+            data[:, [0, 2]] += ox
+            data[:, [1, 3]] += oy
+            parts[i].append(data)
+        
+        merged = []
+        for frame, frame_parts in zip(frames, parts):
+            persons = frame_parts[0]
+            ppe = np.concatenate(frame_parts[1:]) if len(frame_parts) > 1 else persons[:0]
+            keep = batched_nms(ppe[:, :4], ppe[:, 4], ppe[:, 5], 0.7)
+            boxes = np.concatenate([persons, ppe[keep]])
+            # Devolver las cajas en el tipo del modelo (tensor de torch o array)
+            original = frame.boxes.data
+            result = frame.new()
+            result.update(boxes=original.new_tensor(boxes) if hasattr(original, 'new_tensor') else boxes)
+            merged.append(result)
+        return merged
+    
     def detect_compliance(self, image_path, conf_threshold=0.25):
         """
         Detecta EPP y verifica cumplimiento de normativa
@@ -76,12 +208,21 @@ class EPPComplianceChecker:
             dict: Resultados del análisis
         """
         # Hacer predicción
-        results = self.model.predict(
-            source=image_path,
-            conf=conf_threshold,
-            verbose=False
-        )[0]
+        results = self.predict(image_path, conf=conf_threshold)[0]
+        
+        return self.analyze_results(results, image_path)
+    
+    def analyze_results(self, results, image_path):
+        """
+        Analiza cumplimiento a partir de un objeto Results ya calculado
+        
+        Args:
+            results: Results de YOLO para una imagen
+            image_path: Ruta (o etiqueta) de la imagen analizada
         
+        Returns:
+            dict: Resultados del análisis
+        """
         # Extraer detecciones por clase
         persons = []
         helmets = []
@@ -118,23 +259,30 @@ class EPPComplianceChecker:
             elif class_name == 'no_boots':
                 no_boots.append(bbox)
         
+        # Asociación EPP-persona de todas las clases en una sola operación
+        # (mismo resultado que check_overlap persona por persona)
+        with span('association', persons=len(persons)):
+            flags = associate([person['bbox'] for person in persons], {
+                'helmet': helmets,
+                'vest': vests,
+                'boots': boots,
+                'goggles': goggles,
+                'gloves': gloves,
+                'no_helmet': no_helmet,
+                'no_vest': no_vest,
+                'no_boots': no_boots
+            })
+        
         # Análisis de cumplimiento por persona
         compliance_results = []
         
         for i, person in enumerate(persons):
-            person_bbox = person['bbox']
-            
             # Verificar cada EPP
-            has_helmet = self.check_overlap(person_bbox, helmets)
-            has_vest = self.check_overlap(person_bbox, vests)
-            has_boots = self.check_overlap(person_bbox, boots)
-            has_goggles = self.check_overlap(person_bbox, goggles)
-            has_gloves = self.check_overlap(person_bbox, gloves)
-            
-            # Verificar violaciones
-            missing_helmet = self.check_overlap(person_bbox, no_helmet)
-            missing_vest = self.check_overlap(person_bbox, no_vest)
-            missing_boots = self.check_overlap(person_bbox, no_boots)
+            has_helmet = bool(flags['helmet'][i])
+            has_vest = bool(flags['vest'][i])
+            has_boots = bool(flags['boots'][i])
+            has_goggles = bool(flags['goggles'][i])
+            has_gloves = bool(flags['gloves'][i])
             
             # ============================================
             # CRITERIO DE CUMPLIMIENTO
@@ -221,13 +369,54 @@ class EPPComplianceChecker:
         print("\n" + "="*70)
 
 
-    def detect_and_save(self, image_path, output_path=None):
+    def filter_for_display(self, results, conf=0.5, iou=0.4):
+        """
+        Aplica el umbral de visualización sobre un Results ya calculado
+        
+        Aproxima el filtrado de una predicción con conf=0.5 e iou=0.4 sin
+        volver a ejecutar el modelo: descarta cajas de baja confianza y
+        aplica un NMS por clase más estricto sobre las restantes.
+        
+        Es una aproximación: las cajas de entrada ya pasaron el NMS del
+        modelo (conf 0.25, IoU 0.7). En supresiones encadenadas (A suprime
+        a B y B habría suprimido a C) el resultado puede diferir del NMS
+        a conf 0.5 / IoU 0.4 sobre la salida cruda. El NMS es NumPy, así
+        que no hace falta torchvision (ruta ONNX).
+        
+        Args:
+            results: Results de YOLO (predicción a umbral bajo)
+            conf: Confianza mínima para mostrar una caja
+            iou: Umbral IoU del NMS de visualización
+        
+        Returns:
+            Results: Subconjunto de cajas a mostrar
+        """
+        boxes = results.boxes
+        scores = to_numpy(boxes.conf).reshape(-1)
+        candidates = np.flatnonzero(scores > conf)
+        keep = batched_nms(
+            to_numpy(boxes.xyxy)[candidates],
+            scores[candidates],
+            to_numpy(boxes.cls).reshape(-1)[candidates],
+            iou
+        )
+        return results[candidates[keep]]
+    
+    def detect_and_save(self, image_path, output_path=None,
+                        display_conf=0.5, display_iou=0.4, analysis_conf=0.25):
         """
         Detecta EPP en imagen y guarda resultado con anotaciones
         
+        Se ejecuta una sola inferencia al umbral de análisis; la imagen
+        anotada y la lista de detecciones usan el umbral de visualización
+        aplicado como post-filtro.
+        
         Args:
             image_path: Ruta de la imagen a analizar
             output_path: Ruta donde guardar imagen procesada (opcional)
+            display_conf: Confianza mínima de las cajas mostradas
+            display_iou: Umbral IoU del NMS de visualización
+            analysis_conf: Confianza mínima para el análisis de cumplimiento
             
         Returns:
             tuple: (ruta_imagen_procesada, lista_detecciones, cumplimiento)
@@ -237,31 +426,97 @@ class EPPComplianceChecker:
             base_name = os.path.splitext(os.path.basename(image_path))[0]
             output_path = f"result_{base_name}.jpg"
         
-        # Realizar detección con YOLO
-        results = self.model(image_path, conf=0.5, iou=0.4)
+        # Única inferencia YOLO para anotación, detecciones y cumplimiento
+        results = self.predict(image_path, conf=analysis_conf)[0]
+        
+        return self.save_results(results, image_path, output_path,
+                                 display_conf=display_conf, display_iou=display_iou)
+    
+    def detect_and_save_batch(self, image_paths, output_paths,
+                              display_conf=0.5, display_iou=0.4, analysis_conf=0.25):
+        """
+        Versión por lotes de detect_and_save: una sola llamada a predict
+        
+        Args:
+            image_paths: Lista de imágenes a analizar
+            output_paths: Lista de rutas de salida (mismo orden)
+            
+        Returns:
+            list: Una tupla (ruta, detecciones, cumplimiento) por imagen
+        """
+        batch_results = self.predict(list(image_paths), conf=analysis_conf)
+        
+        return [
+            self.save_results(results, image_path, output_path,
+                              display_conf=display_conf, display_iou=display_iou)
+            for results, image_path, output_path in zip(batch_results, image_paths, output_paths)
+        ]
+    
+    def detect_image_batch(self, images, labels=None,
+                           display_conf=0.5, display_iou=0.4, analysis_conf=0.25):
+        """
+        Detecta EPP en imágenes ya decodificadas, sin tocar disco
+        
+        Args:
+            images: Lista de arrays BGR (por ejemplo de cv2.imdecode)
+            labels: Etiqueta de cada imagen para el reporte (opcional)
+            
+        Returns:
+            list: Una tupla (imagen_anotada, detecciones, cumplimiento) por imagen
+        """
+        labels = labels or ['memoria'] * len(images)
+        batch_results = self.predict(list(images), conf=analysis_conf)
+        
+        return [
+            self.annotate_results(results, label,
+                                  display_conf=display_conf, display_iou=display_iou)
+            for results, label in zip(batch_results, labels)
+        ]
+    
+    def save_results(self, results, image_path, output_path, display_conf=0.5, display_iou=0.4):
+        """
+        Anota, guarda y resume un Results ya calculado
+        
+        Returns:
+            tuple: (ruta_imagen_procesada, lista_detecciones, cumplimiento)
+        """
+        annotated_img, detections, compliance = self.annotate_results(
+            results, image_path, display_conf=display_conf, display_iou=display_iou
+        )
+        import cv2
         
-        # Guardar imagen con anotaciones
-        annotated_img = results[0].plot()
-        cv2.imwrite(output_path, annotated_img)
+        with span('imwrite'):
+            cv2.imwrite(output_path, annotated_img)
+        return output_path, detections, compliance
+    
+    def annotate_results(self, results, image_label, display_conf=0.5, display_iou=0.4):
+        """
+        Anota y resume un Results ya calculado (en memoria)
         
+        Returns:
+            tuple: (imagen_anotada, lista_detecciones, cumplimiento)
+        """
         # Obtener análisis de cumplimiento
-        analysis = self.detect_compliance(image_path)
+        analysis = self.analyze_results(results, image_label)
+        
+        # Imagen con anotaciones
+        with span('plot'):
+            display = self.filter_for_display(results, conf=display_conf, iou=display_iou)
+            annotated_img = display.plot()
         
         # Extraer detecciones en formato simple
         detections = []
-        for result in results:
-            boxes = result.boxes
-            for i, box in enumerate(boxes):
-                class_id = int(box.cls[0])
-                class_name = self.model.names[class_id]
-                confidence = float(box.conf[0])
-                bbox = box.xyxy[0].tolist()
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'box': bbox
-                })
+        for box in display.boxes:
+            class_id = int(box.cls[0])
+            class_name = self.model.names[class_id]
+            confidence = float(box.conf[0])
+            bbox = box.xyxy[0].tolist()
+            
+            detections.append({
+                'class': class_name,
+                'confidence': confidence,
+                'box': bbox
+            })
         
         # Preparar resumen de cumplimiento con implementos faltantes
         missing_items = []
@@ -282,7 +537,7 @@ class EPPComplianceChecker:
             'details': analysis
         }
         
-        return output_path, detections, compliance
+        return annotated_img, detections, compliance
 
 
 # Ejemplo de uso
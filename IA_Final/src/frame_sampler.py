@@ -0,0 +1,169 @@
+from collections import deque
+
+import numpy as np
+
+
+class FixedFrameSampler:
+    """Muestreo fijo: infiere un frame de cada `interval`"""
+
+    def __init__(self, interval=3):
+        self.interval = interval
+        self.inferred = 0
+        self.skipped = 0
+
+    def should_infer(self, index, frame):
+        if index % self.interval == 0:
+            self.inferred += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, result):
+        pass
+
+    def revisit(self, index, frame):
+        return False
+
+    def stats(self):
+        return {
+            'mode': 'fixed',
+            'inferred_frames': self.inferred,
+            'skipped_frames': self.skipped
+        }
+
+
+class AdaptiveFrameSampler:
+    """
+    Muestreo adaptativo con detección de movimiento
+
+    ============================================
+    REGLAS:
+    ============================================
+    - El primer frame siempre se infiere.
+    - Se calcula un puntaje de movimiento barato: diferencia absoluta
+      media entre el frame actual y el último frame inferido, ambos en
+      gris y reducidos a `downscale`.
+    - Si el puntaje supera `motion_threshold` se infiere (respetando
+      `min_interval`); si no, se reutilizan las últimas detecciones.
+    - Nunca pasan más de `idle_interval` frames sin inferir con la
+      escena vacía, ni más de `active_interval` con personas en escena.
+    - Si entra una persona nueva se infieren cada `min_interval` los
+      `burst` frames siguientes, aunque ya se hubieran saltado (ver
+      revisit).
+    ============================================
+
+    observe recibe los resultados en el mismo orden en que should_infer
+    y revisit aceptaron los frames; así sabe a qué frame corresponde cada
+    resultado.
+    """
+
+    def __init__(self, person_class_id=None, min_interval=1, active_interval=3,
+                 idle_interval=30, motion_threshold=4.0, downscale=(64, 36), burst=None):
+        self.person_class_id = person_class_id
+        self.min_interval = min_interval
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.motion_threshold = motion_threshold
+        self.downscale = downscale
+        self.burst = active_interval if burst is None else burst
+
+        self.interval = active_interval
+        self._reference = None
+        self._last_index = None
+        self._last_persons = 0
+        self._last_observed = 0
+        self._pending = deque()  # Frames aceptados aún sin resultado
+        self._bursts = deque(maxlen=8)  # (frame de entrada, último frame de la ráfaga)
+        self.inferred = 0
+        self.skipped = 0
+        self.motion_triggered = 0
+
+    def _thumbnail(self, frame):
+        import cv2
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.downscale, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_infer(self, index, frame):
+        thumbnail = self._thumbnail(frame)
+
+        if self._reference is None:
+            infer = True
+        else:
+            since = index - self._last_index
+            interval = self.min_interval if self._in_burst(index) else self.interval
+            motion = float(np.abs(thumbnail - self._reference).mean())
+            moved = motion >= self.motion_threshold and since >= self.min_interval
+            infer = moved or since >= interval
+            if moved and since < interval:
+                self.motion_triggered += 1
+
+        if infer:
+            self._reference = thumbnail
+            self._last_index = index
+            self._pending.append(index)
+            self.inferred += 1
+        else:
+            self.skipped += 1
+        return infer
+
+    def _in_burst(self, index):
+        """El frame cae en la ráfaga tras una entrada (a paso min_interval)"""
+        return any(
+            entered < index <= until and (index - entered) % self.min_interval == 0
+            for entered, until in self._bursts
+        )
+
+    def revisit(self, index, frame):
+        """
+        ¿Inferir un frame ya saltado a la vista de los resultados nuevos?
+
+        Con lotes, should_infer decide varios frames antes de que llegue
+        el resultado del primero; si ese resultado muestra una persona
+        nueva, los frames de la ráfaga que ya se habían saltado se
+        recuperan aquí (el pipeline los infiere antes de emitirlos).
+        """
+        if not self._in_burst(index):
+            return False
+        self._pending.append(index)
+        self.inferred += 1
+        self.skipped -= 1
+        return True
+
+    def observe(self, result):
+        """Ajusta el intervalo según las personas del frame inferido"""
+        index = self._pending.popleft() if self._pending else self._last_observed
+        if self.person_class_id is None:
+            return
+        # Un frame recuperado por revisit es anterior a otros ya observados
+        if index < self._last_observed:
+            return
+        self._last_observed = index
+
+        persons = int((result.boxes.cls == self.person_class_id).sum())
+        if persons > self._last_persons:
+            # Alguien entró en escena: muestrear al máximo
+            self._bursts.append((index, index + self.burst))
+        if persons > 0:
+            self.interval = self.active_interval
+        else:
+            self.interval = self.idle_interval
+        self._last_persons = persons
+
+    def stats(self):
+        total = self.inferred + self.skipped
+        return {
+            'mode': 'adaptive',
+            'inferred_frames': self.inferred,
+            'skipped_frames': self.skipped,
+            'motion_triggered': self.motion_triggered,
+            'inference_ratio': self.inferred / total if total else 0
+        }
+
+
+def person_class_id(names):
+    """Id de la clase 'Person' en el diccionario de clases del modelo"""
+    for class_id, name in names.items():
+        if name == 'Person':
+            return class_id
+    return None
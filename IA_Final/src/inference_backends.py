@@ -0,0 +1,388 @@
+import ast
+import json
+import os
+import time
+import warnings
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from nms import batched_nms, to_numpy
+
+
+# ============================================
+# PRE / POST-PROCESO (compatible con ultralytics)
+# ============================================
+
+def letterbox(image, size, color=114):
+    """
+    Redimensiona manteniendo proporción y rellena hasta size x size
+
+    Mismo criterio que LetterBox de ultralytics (padding centrado) para
+    que las cajas coincidan con las del modelo PyTorch.
+
+    Returns:
+        tuple: (imagen, ratio, (pad_x, pad_y))
+    """
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right,
+                               cv2.BORDER_CONSTANT, value=(color, color, color))
+    return image, ratio, (left, top)
+
+
+def to_tensor(images):
+    """Lista de imágenes BGR letterbox -> array NCHW float32 RGB en [0, 1]"""
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def postprocess(output, conf, iou, ratio, pad, shape, classes=None, max_det=300):
+    """
+    Salida cruda de YOLOv8 (4 + nc, anclas) -> detecciones (N, 6)
+
+    Columnas: x1, y1, x2, y2, confianza, clase (coordenadas de la imagen
+    original). NMS por clase, como agnostic=False en ultralytics.
+    """
+    preds = output.T
+    scores = preds[:, 4:]
+    class_ids = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+
+    mask = confidences > conf
+    if classes is not None:
+        mask &= np.isin(class_ids, classes)
+    preds, class_ids, confidences = preds[mask], class_ids[mask], confidences[mask]
+    if len(preds) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    # NMS por clase: cajas de clases distintas no se suprimen entre sí
+    keep = batched_nms(boxes, confidences, class_ids, iou)[:max_det]
+    boxes, confidences, class_ids = boxes[keep], confidences[keep], class_ids[keep]
+
+    # Deshacer letterbox
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / ratio
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+    return np.concatenate(
+        [boxes, confidences[:, None], class_ids[:, None].astype(np.float32)], axis=1
+    ).astype(np.float32)
+
+
+def read_metadata(onnx_path):
+    """
+    Nombres de clase e imgsz del modelo exportado
+
+    Primero busca el JSON que deja export_model.py junto al .onnx y si no
+    existe lee los metadatos que ultralytics guarda dentro del ONNX.
+    """
+    sidecar = Path(onnx_path).with_suffix('.json')
+    if sidecar.exists():
+        meta = json.loads(sidecar.read_text())
+        return {int(k): v for k, v in meta['names'].items()}, int(meta['imgsz'])
+
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    props = session.get_modelmeta().custom_metadata_map
+    names = ast.literal_eval(props['names'])
+    imgsz = ast.literal_eval(props.get('imgsz', '[640, 640]'))
+    return names, int(imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz)
+
+
+# ============================================
+# RESULTADOS SIN TORCH
+# ============================================
+# Misma interfaz que usan checker, API y analizador de video sobre los
+# Results de ultralytics (boxes.xyxy/conf/cls, plot, new, update,
+# indexado), pero con arrays de NumPy: la ruta ONNX no importa torch.
+
+# Paleta de ultralytics (hex RGB) para que las anotaciones se parezcan
+_PALETTE = [
+    'FF3838', 'FF9D97', 'FF701F', 'FFB21D', 'CFD231', '48F90A', '92CC17', '3DDB86', '1A9334', '00D4BB',
+    '2C99A8', '00C2FF', '344593', '6473FF', '0018EC', '8438FF', '520085', 'CB38FF', 'FF95C8', 'FF37C7'
+]
+_COLORS = [(int(h[4:6], 16), int(h[2:4], 16), int(h[0:2], 16)) for h in _PALETTE]  # BGR
+
+
+class HostArray(np.ndarray):
+    """ndarray con cpu()/numpy()/clone() como un tensor de torch en CPU"""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.view(np.ndarray)
+
+    def clone(self):
+        return self.copy()
+
+
+class Boxes:
+    """Cajas (N, 6): x1, y1, x2, y2, confianza, clase"""
+
+    def __init__(self, data, orig_shape):
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 6).view(HostArray)
+        self.orig_shape = orig_shape
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return Boxes(self.data[index], self.orig_shape)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Results:
+    """Detecciones de una imagen, compatibles con Results de ultralytics"""
+
+    def __init__(self, orig_img, path, names, boxes=None, speed=None):
+        self.orig_img = orig_img
+        self.orig_shape = orig_img.shape[:2]
+        self.path = path
+        self.names = names
+        self.speed = speed or {}
+        self.boxes = Boxes(np.zeros((0, 6)) if boxes is None else boxes, self.orig_shape)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        result = self.new()
+        result.boxes = self.boxes[index]
+        return result
+
+    def new(self):
+        """Mismo frame sin cajas"""
+        return Results(self.orig_img, self.path, self.names, speed=self.speed)
+
+    def update(self, boxes=None):
+        """Reemplaza las cajas (recortadas al tamaño de la imagen)"""
+        if boxes is not None:
+            data = to_numpy(boxes).astype(np.float32).reshape(-1, 6)
+            height, width = self.orig_shape
+            data[:, [0, 2]] = data[:, [0, 2]].clip(0, width)
+            data[:, [1, 3]] = data[:, [1, 3]].clip(0, height)
+            self.boxes = Boxes(data, self.orig_shape)
+
+    def plot(self, img=None, conf=True, labels=True, line_width=None):
+        """Imagen BGR anotada (copia de img o del original)"""
+        image = (self.orig_img if img is None else img).copy()
+        width = line_width or max(round(sum(image.shape[:2]) / 2 * 0.003), 2)
+        font_scale = width / 3
+        for x1, y1, x2, y2, score, class_id in self.boxes.data.numpy():
+            color = _COLORS[int(class_id) % len(_COLORS)]
+            p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+            cv2.rectangle(image, p1, p2, color, width, cv2.LINE_AA)
+            if not labels:
+                continue
+            label = self.names.get(int(class_id), str(int(class_id)))
+            if conf:
+                label = f"{label} {score:.2f}"
+            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, max(width - 1, 1))
+            outside = p1[1] - text_h - 3 >= 0
+            q2 = (p1[0] + text_w, p1[1] - text_h - 3 if outside else p1[1] + text_h + 3)
+            cv2.rectangle(image, p1, q2, color, -1, cv2.LINE_AA)
+            cv2.putText(image, label, (p1[0], p1[1] - 2 if outside else p1[1] + text_h + 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), max(width - 1, 1), cv2.LINE_AA)
+        return image
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class InferenceBackend:
+    """
+    Backend de inferencia con la misma interfaz que YOLO de ultralytics
+
+    predict(source, conf, ...) acepta una ruta, un array BGR o una lista
+    de ellos y devuelve una lista de Results (NumPy, misma interfaz que
+    los de ultralytics), así que EPPComplianceChecker, el analizador de
+    video y la API no cambian y no se importa torch.
+    Las subclases solo implementan _infer(batch NCHW) -> salida cruda y
+    marcan dynamic_shape si el grafo acepta otras resoluciones.
+    """
+
+    name = 'base'
+    stride = 32
+
+    def __init__(self, onnx_path, threads=None):
+        self.model_path = str(onnx_path)
+        self.threads = threads
+        self.names, self.imgsz = read_metadata(onnx_path)
+        self.fixed_batch = None  # Tamaño de lote fijo del grafo (si lo hay)
+        self.dynamic_shape = False  # Alto/ancho de entrada libres
+        self._warned_sizes = set()
+
+    def _infer(self, batch):
+        raise NotImplementedError
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+    def input_size(self, imgsz=None):
+        """
+        Resolución de entrada para un imgsz pedido
+
+        Con un export dinámico se usa imgsz (redondeado al stride); con
+        forma fija solo vale la del export y se avisa una vez por tamaño.
+        """
+        if imgsz is None:
+            return self.imgsz
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+        if self.dynamic_shape:
+            return max(self.stride, -(-int(imgsz) // self.stride) * self.stride)
+        if imgsz != self.imgsz and imgsz not in self._warned_sizes:
+            self._warned_sizes.add(imgsz)
+            warnings.warn(
+                f"{self.model_path} se exportó con entrada fija de {self.imgsz}px: se ignora "
+                f"imgsz={imgsz}. Exporta con dynamic=True para usar otra resolución.",
+                RuntimeWarning, stacklevel=3
+            )
+        return self.imgsz
+
+    def predict(self, source=None, conf=0.25, iou=0.7, classes=None, max_det=300,
+                verbose=False, imgsz=None, **kwargs):
+        """Inferencia compatible con YOLO.predict"""
+        size = self.input_size(imgsz)
+        sources = source if isinstance(source, (list, tuple)) else [source]
+        images, paths = [], []
+        for item in sources:
+            if isinstance(item, (str, Path)):
+                images.append(cv2.imread(str(item)))
+                paths.append(str(item))
+            else:
+                images.append(item)
+                paths.append('image0.jpg')
+
+        start = time.perf_counter()
+        prepared = [letterbox(image, size) for image in images]
+        batch = to_tensor([p[0] for p in prepared])
+        preprocessed = time.perf_counter()
+
+        # Grafos exportados con batch fijo se ejecutan imagen por imagen
+        step = self.fixed_batch or len(batch)
+        outputs = np.concatenate([
+            self._infer(batch[i:i + step]) for i in range(0, len(batch), step)
+        ])
+        inferred = time.perf_counter()
+
+        detections = [
+            postprocess(output, conf, iou, ratio, pad, image.shape[:2],
+                        classes=classes, max_det=max_det)
+            for output, image, (_, ratio, pad) in zip(outputs, images, prepared)
+        ]
+        finished = time.perf_counter()
+
+        # Tiempos por imagen en ms, como Results.speed de ultralytics
+        speed = {
+            'preprocess': (preprocessed - start) * 1000 / len(images),
+            'inference': (inferred - preprocessed) * 1000 / len(images),
+            'postprocess': (finished - inferred) * 1000 / len(images)
+        }
+        return [
+            Results(image, path=path, names=self.names, boxes=boxes, speed=speed)
+            for boxes, image, path in zip(detections, images, paths)
+        ]
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime en CPU (FP32 o INT8 cuantizado)"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, onnx_path, threads=None):
+        super().__init__(onnx_path, threads)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=['CPUExecutionProvider']
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        if isinstance(model_input.shape[0], int):
+            self.fixed_batch = model_input.shape[0]
+        self.dynamic_shape = not all(isinstance(dim, int) for dim in model_input.shape[2:])
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend(InferenceBackend):
+    """OpenVINO en CPU; lee el mismo .onnx (FP32 o INT8 QDQ)"""
+
+    name = 'openvino'
+
+    def __init__(self, onnx_path, threads=None):
+        super().__init__(onnx_path, threads)
+        import openvino as ov
+
+        core = ov.Core()
+        model = core.read_model(self.model_path)
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        self.compiled = core.compile_model(model, 'CPU', config)
+        shape = model.input(0).get_partial_shape()
+        if shape[0].is_static:
+            self.fixed_batch = shape[0].get_length()
+        self.dynamic_shape = shape[2].is_dynamic or shape[3].is_dynamic
+
+    def _infer(self, batch):
+        return self.compiled(batch)[0]
+
+
+BACKENDS = {
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+
+def load_backend(model_path, backend=None, threads=None):
+    """
+    Crea el backend para un modelo exportado
+
+    Args:
+        model_path: Ruta al .onnx
+        backend: 'onnxruntime' u 'openvino' (por defecto EPP_BACKEND)
+        threads: Hilos intra-op (por defecto EPP_INTRA_OP_THREADS)
+    """
+    backend = backend or os.environ.get('EPP_BACKEND', 'onnxruntime')
+    if threads is None and os.environ.get('EPP_INTRA_OP_THREADS'):
+        threads = int(os.environ['EPP_INTRA_OP_THREADS'])
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](model_path, threads=threads)
@@ -0,0 +1,127 @@
+from collections import deque
+
+
+# Minúsculas sin tildes: "Protección" y "proteccion" son la misma palabra
+_ACCENTED = 'áàäâéèëêíìïîóòöôúùüûñ'
+_PLAIN = 'aaaaeeeeiiiioooouuuun'
+_ACCENTS = str.maketrans(_ACCENTED, _PLAIN)
+_NO_MATCH = 1 << 30
+
+
+def normalize(text):
+    return text.lower().translate(_ACCENTS)
+
+
+class Intent:
+    """
+    Regla de intención del chatbot
+
+    Args:
+        name: Nombre de la intención
+        keywords: Basta con que una aparezca en el mensaje (subcadena)
+        exact: Mensajes completos que activan la intención ('ayuda')
+        needs_context: Solo aplica si hay un análisis previo
+        weak_keywords: Palabras genéricas ('hay', 'todo'); solo deciden si
+            ninguna palabra clave normal de otra regla aparece
+    """
+
+    def __init__(self, name, keywords=(), exact=(), needs_context=False, weak_keywords=()):
+        self.name = name
+        self.keywords = tuple(keywords)
+        self.exact = tuple(exact)
+        self.needs_context = needs_context
+        self.weak_keywords = tuple(weak_keywords)
+
+
+class IntentRouter:
+    """
+    Índice de intenciones compilado una sola vez (Aho–Corasick)
+
+    Todas las palabras clave de todas las reglas forman un autómata que
+    recorre el mensaje una vez, carácter a carácter (las tildes se
+    resuelven en las transiciones). Cada estado guarda la regla de mayor
+    prioridad (la primera de la lista) que termina en él, con y sin
+    contexto, así el resultado es el mismo que la cadena de
+    `if any(word in mensaje ...)` en orden, sin repetir el escaneo por
+    cada grupo.
+
+    Las palabras débiles entran con prioridad len(intents) + i: cualquier
+    palabra normal les gana, así el contexto no hace que "¿qué tipos de
+    casco hay?" deje de ser la respuesta de cascos.
+    """
+
+    def __init__(self, intents):
+        self.intents = list(intents)
+        self._exact = {}
+        goto = [{}]
+        outputs = [[]]
+        weak = len(self.intents)
+        for priority, intent in enumerate(self.intents):
+            for phrase in intent.exact:
+                self._exact.setdefault(normalize(phrase).strip(), priority)
+            keywords = [(k, priority) for k in intent.keywords] + \
+                [(k, weak + priority) for k in intent.weak_keywords]
+            for keyword, rank in keywords:
+                state = 0
+                for char in normalize(keyword):
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                outputs[state].append(rank)
+
+        # Enlaces de fallo por BFS y transiciones completas (DFA): en la
+        # búsqueda cada carácter es una sola consulta de diccionario
+        fail = [0] * len(goto)
+        self._delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, target in goto[state].items():
+                fail[target] = self._delta[fail[state]].get(char, 0) if state else 0
+                queue.append(target)
+            for char, target in self._delta[fail[state]].items():
+                self._delta[state].setdefault(char, target)
+
+        # Las letras con tilde siguen la misma transición que sin tilde:
+        # el mensaje solo se pasa a minúsculas, sin traducirlo entero
+        for edges in self._delta:
+            for accented, plain in zip(_ACCENTED, _PLAIN):
+                if plain in edges:
+                    edges[accented] = edges[plain]
+        self._max_exact = max(map(len, self._exact), default=0)
+
+        self._best_any = [min(found, default=_NO_MATCH) for found in outputs]
+        self._best_free = [
+            min((p for p in found if not self.intents[p % weak].needs_context), default=_NO_MATCH)
+            for found in outputs
+        ]
+
+    def route(self, message, context=False):
+        """
+        Intención del mensaje en una pasada
+
+        Args:
+            message: Texto del usuario
+            context: Hay un análisis previo (habilita needs_context)
+
+        Returns:
+            str o None: Nombre de la intención, None si ninguna aplica
+        """
+        text = message.lower()
+        best_of = self._best_any if context else self._best_free
+        delta = self._delta
+        best = _NO_MATCH
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if best_of[state] < best:
+                best = best_of[state]
+
+        stripped = text.strip()
+        exact = self._exact.get(normalize(stripped)) if len(stripped) <= self._max_exact else None
+        if exact is not None and exact < best and (context or not self.intents[exact].needs_context):
+            best = exact
+        return self.intents[best % len(self.intents)].name if best != _NO_MATCH else None
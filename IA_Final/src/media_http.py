@@ -0,0 +1,112 @@
+import os
+
+from fastapi.responses import Response, StreamingResponse
+
+
+# Los archivos procesados tienen nombre uuid y nunca cambian
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 256 * 1024
+
+
+def parse_range(header, size):
+    """
+    Interpreta un encabezado Range de un solo rango en bytes
+
+    Returns:
+        tuple (inicio, fin) inclusivo, o None si no aplica (se sirve
+        el archivo completo: sin Range, varias partes o sintaxis ajena)
+
+    Raises:
+        ValueError: Rango no satisfacible (416)
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start_text, sep, end_text = header[len('bytes='):].strip().partition('-')
+    if not sep or not (start_text or end_text):
+        return None
+    if not all(text.isdigit() for text in (start_text, end_text) if text):
+        return None
+
+    if not start_text:
+        # Sufijo: los últimos N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Rango vacío")
+        return max(size - length, 0), size - 1
+
+    start = int(start_text)
+    if start >= size:
+        raise ValueError("Rango fuera del archivo")
+    end = min(int(end_text), size - 1) if end_text else size - 1
+    if end < start:
+        return None
+    return start, end
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def _media_response(request, etag, size, media_type, read):
+    """
+    Respuesta común para bytes en memoria y archivos
+
+    read(inicio, fin) devuelve bytes o un iterador de bloques.
+    Soporta If-None-Match (304), Range/If-Range (206) y 416.
+    """
+    headers = {
+        'ETag': etag,
+        'Cache-Control': CACHE_CONTROL,
+        'Accept-Ranges': 'bytes'
+    }
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get('if-range')
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('range'), size)
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{size}'
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        (start, end), status = byte_range, 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    headers['Content-Length'] = str(end - start + 1 if size else 0)
+
+    body = read(start, end) if size else b''
+    if isinstance(body, bytes):
+        return Response(content=body, status_code=status, headers=headers, media_type=media_type)
+    return StreamingResponse(body, status_code=status, headers=headers, media_type=media_type)
+
+
+def bytes_response(request, data, name, media_type):
+    """Sirve un archivo procesado que vive en memoria"""
+    etag = f'"{name}-{len(data):x}"'
+    return _media_response(request, etag, len(data), media_type,
+                           lambda start, end: data[start:end + 1])
+
+
+def file_response(request, path, media_type):
+    """Sirve un archivo procesado de disco con rangos y caché"""
+    stat = os.stat(path)
+    etag = f'"{os.path.basename(path)}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def read(start, end):
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return _media_response(request, etag, stat.st_size, media_type, read)
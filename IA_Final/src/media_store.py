@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+
+
+class InMemoryMediaStore:
+    """
+    Almacén acotado (LRU) de archivos procesados en memoria
+
+    Se usa cuando la API no escribe sus resultados en disco: guarda los
+    bytes ya codificados para que /api/image/{filename} los sirva.
+    """
+
+    def __init__(self, max_items=256, max_bytes=256 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, name, data):
+        with self._lock:
+            if name in self._items:
+                self._bytes -= len(self._items.pop(name))
+            self._items[name] = data
+            self._bytes += len(data)
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, name):
+        with self._lock:
+            data = self._items.get(name)
+            if data is not None:
+                self._items.move_to_end(name)
+            return data
+
+    def stats(self):
+        with self._lock:
+            return {'items': len(self._items), 'bytes': self._bytes}
@@ -0,0 +1,266 @@
+import abc
+import math
+import threading
+from collections import deque
+
+from percentiles import percentile
+
+
+# Buckets por defecto (segundos), como los de prometheus_client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """Base de las métricas: series hijas por combinación de etiquetas"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """Serie hija para una combinación de etiquetas"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera etiquetas {self.labelnames}")
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._new_child()
+            return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Serie vacía (valor o buckets) para una nueva combinación de etiquetas"""
+
+    @abc.abstractmethod
+    def _render_child(self, values, child):
+        """Líneas de texto de Prometheus de una serie"""
+
+    def _series(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for values, child in self._series():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """Contador monótono"""
+
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class Gauge(_Metric):
+    """
+    Valor instantáneo
+
+    set_function(fn) hace que el valor se lea al exportar (por ejemplo la
+    profundidad de una cola).
+    """
+
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, fn, *values):
+        child = self.labels(*values)
+        child.function = fn
+
+    def _render_child(self, values, child):
+        function = getattr(child, 'function', None)
+        value = function() if function else child.value
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}']
+
+
+class _HistogramChild:
+    def __init__(self, buckets, window):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count, sorted(self.recent)
+
+
+class Histogram(_Metric):
+    """
+    Histograma acumulativo estilo Prometheus
+
+    Además de los buckets guarda las últimas `window` observaciones para
+    calcular percentiles exactos recientes (p50/p95/p99 en /api/stats).
+    """
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, window=2048):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.window = window
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets, self.window)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def percentiles(self, *values, quantiles=(0.5, 0.95, 0.99)):
+        """Percentiles de las observaciones recientes de una serie"""
+        with self._lock:
+            child = self._children.get(tuple(str(v) for v in values))
+        recent = child.snapshot()[3] if child else []
+        result = {f'p{int(q * 100)}': percentile(recent, q) for q in quantiles}
+        result['count'] = child.count if child else 0
+        return result
+
+    def _render_child(self, values, child):
+        counts, total, count, _ = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, values, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registro propio de métricas (no el global de prometheus_client)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, window=2048):
+        return self._register(Histogram, name, documentation, labelnames,
+                              buckets=buckets, window=window)
+
+    def render(self):
+        """Exposición en formato de texto de Prometheus (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# ============================================
+# MÉTRICAS DEL PROCESO
+# ============================================
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    'epp_http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+    ['method', 'route', 'status']
+)
+MODEL_STAGE_SECONDS = metrics.histogram(
+    'epp_model_stage_seconds', 'Tiempo por imagen de cada etapa del modelo',
+    ['stage']
+)
+VIDEO_JOB_FPS = metrics.histogram(
+    'epp_video_job_fps', 'Frames por segundo de cada trabajo de video',
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 240)
+)
+DETECTIONS_PER_IMAGE = metrics.histogram(
+    'epp_detections_per_image', 'Detecciones por imagen según clase',
+    ['class_name'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34)
+)
+REQUEST_EXCEPTIONS = metrics.counter(
+    'epp_http_request_exceptions', 'Peticiones que terminaron en una excepción no controlada',
+    ['method', 'route']
+)
+QUEUE_DEPTH = metrics.gauge(
+    'epp_queue_depth', 'Elementos en espera en cada cola', ['queue']
+)
+
+
+def observe_model_speed(results):
+    """Registra preproceso/inferencia/postproceso (ms) de cada Results"""
+    for result in results:
+        speed = getattr(result, 'speed', None) or {}
+        for stage, milliseconds in speed.items():
+            if milliseconds is not None:
+                MODEL_STAGE_SECONDS.labels(stage).observe(milliseconds / 1000)
@@ -0,0 +1,136 @@
+import os
+import threading
+
+
+class ModelRegistry:
+    """
+    Registro de modelos compartido por todo el proceso
+
+    Cada modelo se identifica por (ruta de pesos, dispositivo) y se carga
+    una sola vez, la primera vez que alguien lo pide. Todos los
+    componentes (checker, chatbot, analizador de video, API) reciben la
+    misma instancia, de modo que best.pt vive una única vez en memoria.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._refcounts = {}
+        self._locks = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_path, device=None):
+        return (os.path.abspath(model_path), device or 'auto')
+
+    def _load(self, model_path, device):
+        """
+        Carga los pesos (import perezoso de ultralytics)
+
+        Un .onnx exportado con export_model.py se ejecuta con el backend de
+        CPU indicado en EPP_BACKEND (onnxruntime u openvino).
+        """
+        if model_path.endswith('.onnx'):
+            from inference_backends import load_backend
+
+            model = load_backend(model_path)
+            print(f"✅ Modelo cargado: {model_path} ({model.name})")
+            print(f"📋 Clases: {model.names}")
+            return model
+
+        from ultralytics import YOLO
+
+        model = YOLO(model_path)
+        if device is not None:
+            model.to(device)
+        print(f"✅ Modelo cargado: {model_path}")
+        print(f"📋 Clases: {model.names}")
+        return model
+
+    def get(self, model_path, device=None):
+        """
+        Devuelve el modelo registrado, cargándolo si es necesario
+
+        La carga (segundos) ocurre fuera del lock global, con un lock por
+        modelo: quien pida el mismo modelo espera a esa carga, pero
+        loaded() y los demás modelos no se bloquean mientras tanto.
+        """
+        key = self._key(model_path, device)
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+            model = self._load(model_path, device)
+            with self._lock:
+                self._models[key] = model
+                self._refcounts.setdefault(key, 0)
+                self._locks.setdefault(key, threading.RLock())
+                self._loading.pop(key, None)
+            return model
+
+    def register(self, model_path, model, device=None):
+        """
+        Registra un modelo ya construido bajo model_path
+
+        Quien pida esa ruta recibe este objeto en lugar de cargar pesos
+        (p. ej. el modelo sintético de benchmarks/synthetic.py).
+        """
+        key = self._key(model_path, device)
+        with self._lock:
+            self._models[key] = model
+            self._refcounts.setdefault(key, 0)
+            self._locks.setdefault(key, threading.RLock())
+        return model
+
+    def acquire(self, model_path, device=None):
+        """Obtiene el modelo e incrementa su contador de referencias"""
+        model = self.get(model_path, device)
+        key = self._key(model_path, device)
+        with self._lock:
+            self._refcounts[key] += 1
+        return model
+
+    def release(self, model_path, device=None):
+        """Libera una referencia; el modelo se descarta al llegar a cero"""
+        key = self._key(model_path, device)
+        with self._lock:
+            if key not in self._models:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] <= 0:
+                del self._models[key]
+                del self._refcounts[key]
+                del self._locks[key]
+
+    def lock_for(self, model_path, device=None):
+        """
+        Lock asociado al modelo
+
+        El predictor de ultralytics no es seguro entre hilos; quien
+        comparta el modelo entre hilos debe serializar predict con él.
+        """
+        self.get(model_path, device)
+        with self._lock:
+            return self._locks[self._key(model_path, device)]
+
+    def loaded(self):
+        """Lista de modelos cargados con su número de referencias"""
+        with self._lock:
+            return [
+                {'model_path': path, 'device': device, 'refs': self._refcounts[(path, device)]}
+                for path, device in self._models
+            ]
+
+
+# Registro global del proceso
+registry = ModelRegistry()
+
+
+def get_model(model_path, device=None):
+    """Atajo para obtener un modelo del registro global"""
+    return registry.get(model_path, device)
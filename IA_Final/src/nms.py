@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def to_numpy(values):
+    """Tensor de torch (CPU o GPU) o array -> array de NumPy"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def batched_nms(boxes, scores, classes, iou_threshold):
+    """
+    NMS por clase en NumPy (mismo contrato que torchvision.ops.batched_nms)
+
+    Cajas de clases distintas nunca se suprimen entre sí: se desplazan
+    por clase para que no se solapen y se hace un único NMS.
+
+    Args:
+        boxes: (N, 4) xyxy
+        scores: (N,)
+        classes: (N,) id de clase
+        iou_threshold: Se descarta una caja si su IoU con otra de mayor
+                       puntuación y la misma clase supera este valor
+
+    Returns:
+        Array de índices conservados, de mayor a menor puntuación
+    """
+    boxes = to_numpy(boxes).astype(np.float64, copy=False).reshape(-1, 4)
+    scores = to_numpy(scores).reshape(-1)
+    classes = to_numpy(classes).reshape(-1)
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    offsets = classes.astype(np.float64)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offsets
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        width = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        height = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        intersection = width * height
+        union = areas[best] + areas[rest] - intersection
+        iou = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,11 @@
+def percentile(sorted_values, q):
+    """
+    Percentil simple (nearest-rank) sobre una lista ya ordenada
+
+    Compartido por el agrupador de lotes, las métricas y los benchmarks
+    para que todos informen los mismos p50/p95/p99.
+    """
+    if not sorted_values:
+        return 0
+    index = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 de un archivo leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    Caché de resultados direccionada por contenido
+
+    La clave combina el hash del archivo subido, el hash de los pesos
+    del modelo y los parámetros de inferencia, así que una misma imagen
+    o video vuelto a subir se responde sin tocar el modelo.
+
+    ============================================
+    NIVELES:
+    ============================================
+    - Memoria: LRU de los últimos max_memory_entries resultados.
+    - Disco: un JSON por entrada en cache_dir con el resultado y la
+      lista de artefactos (imagen/video procesado en processed/).
+      Cuando los JSON superan max_disk_bytes se eliminan las entradas
+      usadas hace más tiempo (nunca la que se acaba de guardar).
+    ============================================
+
+    La caché solo indexa los artefactos, no es su dueña: nunca los
+    borra. Los archivos de processed/ los borra RetentionManager y una
+    entrada cuyo artefacto ya no existe se descarta al consultarla.
+    """
+
+    def __init__(self, cache_dir, max_memory_entries=512, max_disk_bytes=2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk = {}  # clave -> (bytes, último acceso)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._scan()
+
+    @staticmethod
+    def key(content_digest, model_digest, params):
+        """Clave estable a partir de contenido, pesos y parámetros"""
+        material = json.dumps(
+            {'content': content_digest, 'model': model_digest, 'params': params},
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _scan(self):
+        """Reconstruye el índice de disco al arrancar"""
+        for entry_path in self.cache_dir.glob('*.json'):
+            try:
+                json.loads(entry_path.read_text())['artifacts']
+                stat = entry_path.stat()
+                self._disk[entry_path.stem] = (stat.st_size, stat.st_mtime)
+            except (OSError, ValueError, KeyError):
+                entry_path.unlink(missing_ok=True)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Resultado cacheado o None; valida que los artefactos sigan en disco"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and key in self._disk:
+                try:
+                    entry = json.loads(self._entry_path(key).read_text())
+                except (OSError, ValueError):
+                    entry = None
+
+            if entry is None or not all(os.path.exists(a) for a in entry['artifacts']):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(key, entry)
+            size, _ = self._disk.get(key, (0, 0))
+            self._disk[key] = (size, time.time())
+            os.utime(self._entry_path(key))
+            return entry['payload']
+
+    def put(self, key, payload, artifacts=()):
+        """Guarda el resultado con la lista de artefactos que lo respaldan"""
+        entry = {'payload': payload, 'artifacts': [str(a) for a in artifacts]}
+        entry_path = self._entry_path(key)
+        with self._lock:
+            entry_path.write_text(json.dumps(entry))
+            self._disk[key] = (entry_path.stat().st_size, time.time())
+            self._remember(key, entry)
+            self._enforce_disk_limit(keep=key)
+
+    def _drop(self, key):
+        """Olvida la entrada (índice y JSON); los artefactos no se tocan"""
+        self._memory.pop(key, None)
+        self._disk.pop(key, None)
+        self._entry_path(key).unlink(missing_ok=True)
+
+    def _enforce_disk_limit(self, keep=None):
+        total = sum(size for size, _ in self._disk.values())
+        for key, (size, _) in sorted(self._disk.items(), key=lambda item: item[1][1]):
+            if total <= self.max_disk_bytes:
+                break
+            if key == keep:
+                continue
+            self._drop(key)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._disk),
+                'disk_bytes': sum(size for size, _ in self._disk.values()),
+                'max_disk_bytes': self.max_disk_bytes,
+                'evictions': self.evictions
+            }
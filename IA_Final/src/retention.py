@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+
+
+class RetentionManager:
+    """
+    Política de retención de los archivos procesados en disco
+
+    ============================================
+    REGLAS (en cada barrido):
+    ============================================
+    1. Edad: se borra lo que no se usó en max_age_seconds.
+    2. Cuota: si el total supera max_bytes se borra primero lo usado
+       hace más tiempo (LRU por último acceso).
+    3. Subidas huérfanas: entradas en uploads_dir que ningún trabajo en
+       cola referencia (tras un margen de gracia para no pisar una
+       subida que se está registrando).
+    ============================================
+
+    El último acceso sale de touch() (llamado al servir el archivo) o,
+    si el archivo no se ha servido desde el arranque, de su fecha de
+    modificación. protected() devuelve rutas que nunca se borran
+    (entradas y salidas de trabajos en curso). after_sweep(removed)
+    recibe al final de cada barrido las rutas borradas, para expirar los
+    registros que las referencian (trabajos, caché).
+    """
+
+    def __init__(self, directories, max_bytes, max_age_seconds, interval=60,
+                 uploads_dir=None, protected=None, orphan_grace=600, after_sweep=None):
+        self.directories = [str(d) for d in directories]
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.interval = interval
+        self.uploads_dir = str(uploads_dir) if uploads_dir else None
+        self.protected = protected or (lambda: set())
+        self.orphan_grace = orphan_grace
+        self.after_sweep = after_sweep
+
+        self._access = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.age_evictions = 0
+        self.quota_evictions = 0
+        self.orphans_removed = 0
+        self.last_sweep = None
+        self.last_sweep_seconds = 0.0
+
+    def start(self):
+        """Barrido inicial (sincrónico) y luego uno cada interval segundos"""
+        self.sweep()
+        self._thread = threading.Thread(target=self._loop, name='epp-retention', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Error en retención de archivos: {str(e)}")
+
+    def touch(self, path):
+        """Marca un archivo como usado ahora (al servirlo o reutilizarlo)"""
+        with self._lock:
+            self._access[os.path.abspath(path)] = time.time()
+
+    def _scan(self):
+        files = []
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((os.path.abspath(entry.path), stat.st_size, stat.st_mtime))
+        return files
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"⚠️ No se pudo borrar {path}: {str(e)}")
+            return False
+
+    def _sweep_orphans(self, now, protected):
+        if self.uploads_dir is None:
+            return
+        try:
+            entries = list(os.scandir(self.uploads_dir))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            path = os.path.abspath(entry.path)
+            if not entry.is_file() or path in protected:
+                continue
+            if now - entry.stat().st_mtime > self.orphan_grace and self._remove(path):
+                self.orphans_removed += 1
+
+    def sweep(self):
+        """Aplica edad, cuota y limpieza de huérfanos una vez"""
+        started = time.perf_counter()
+        now = time.time()
+        protected = {os.path.abspath(p) for p in self.protected()}
+        files = self._scan()
+
+        with self._lock:
+            access = dict(self._access)
+        entries = sorted(
+            ((access.get(path, mtime), size, path) for path, size, mtime in files),
+            key=lambda entry: entry[0]
+        )
+        total = sum(size for _, size, _ in entries)
+
+        kept = []
+        removed = []
+        for last_access, size, path in entries:
+            if path in protected:
+                kept.append((last_access, size, path))
+                continue
+            expired = now - last_access > self.max_age_seconds
+            over_quota = total > self.max_bytes
+            if (expired or over_quota) and self._remove(path):
+                removed.append(path)
+                total -= size
+                self.evicted_files += 1
+                self.evicted_bytes += size
+                if expired:
+                    self.age_evictions += 1
+                else:
+                    self.quota_evictions += 1
+            else:
+                kept.append((last_access, size, path))
+
+        self._sweep_orphans(now, protected)
+
+        usage = {directory: {'files': 0, 'bytes': 0} for directory in self.directories}
+        for _, size, path in kept:
+            directory = os.path.dirname(path)
+            for root in self.directories:
+                if os.path.abspath(root) == directory:
+                    usage[root]['files'] += 1
+                    usage[root]['bytes'] += size
+        live = {path for _, _, path in kept}
+        with self._lock:
+            self._access = {path: t for path, t in self._access.items() if path in live}
+            self._usage = usage
+        if self.after_sweep is not None:
+            self.after_sweep(removed)
+        self.last_sweep = now
+        self.last_sweep_seconds = time.perf_counter() - started
+
+    def stats(self):
+        with self._lock:
+            usage = {os.path.basename(d): dict(u) for d, u in self._usage.items()}
+        total = sum(u['bytes'] for u in usage.values())
+        return {
+            'usage': usage,
+            'total_bytes': total,
+            'max_bytes': self.max_bytes,
+            'usage_percent': total / self.max_bytes * 100 if self.max_bytes else 0,
+            'max_age_seconds': self.max_age_seconds,
+            'evicted_files': self.evicted_files,
+            'evicted_bytes': self.evicted_bytes,
+            'age_evictions': self.age_evictions,
+            'quota_evictions': self.quota_evictions,
+            'orphan_uploads_removed': self.orphans_removed,
+            'last_sweep': self.last_sweep,
+            'last_sweep_seconds': self.last_sweep_seconds
+        }
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# Cookie y encabezado con los que el cliente identifica su sesión
+SESSION_COOKIE = 'epp_session'
+SESSION_HEADER = 'x-session-id'
+_VALID_ID = re.compile(r'^[A-Za-z0-9_-]{8,128}$')
+
+
+def session_id_from(request):
+    """
+    Id de sesión de la petición (encabezado X-Session-Id o cookie)
+
+    Returns:
+        tuple: (session_id, es_nueva). Si el cliente no envía un id
+        válido se genera uno nuevo que hay que devolverle.
+    """
+    for candidate in (request.headers.get(SESSION_HEADER), request.cookies.get(SESSION_COOKIE)):
+        if candidate and _VALID_ID.match(candidate):
+            return candidate, False
+    return uuid.uuid4().hex, True
+
+
+class MemorySessionStore:
+    """
+    Contexto por sesión en memoria: LRU acotado con caducidad (TTL)
+
+    Cada get renueva la caducidad. Con más de max_sessions se descarta
+    la sesión usada hace más tiempo, así la memoria no crece con el
+    número de clientes. Solo sirve dentro de un proceso (un worker).
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_sessions=10000, ttl_seconds=3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if now - entry[0] > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session_id, context):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (now, context)
+            self._sessions.move_to_end(session_id)
+            # Las más antiguas están al principio: caducadas primero
+            while self._sessions:
+                oldest_id, (touched, _) = next(iter(self._sessions.items()))
+                if now - touched > self.ttl_seconds:
+                    self.expired += 1
+                elif len(self._sessions) > self.max_sessions:
+                    self.evicted += 1
+                else:
+                    break
+                del self._sessions[oldest_id]
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            'backend': self.backend,
+            'sessions': sessions,
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'evicted': self.evicted,
+            'expired': self.expired
+        }
+
+
+class SQLiteSessionStore:
+    """
+    Contexto por sesión en SQLite, compartido entre workers de uvicorn
+
+    Misma semántica que MemorySessionStore (TTL renovado en cada lectura,
+    límite de sesiones); la poda se hace al escribir cada prune_every
+    escrituras para no pagar un DELETE por petición.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path, max_sessions=10000, ttl_seconds=3600, prune_every=100):
+        self.db_path = str(db_path)
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    context TEXT NOT NULL,
+                    touched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Conexión por operación: confirma la transacción y se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, session_id):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT context FROM sessions WHERE id = ? AND touched_at > ?",
+                (session_id, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE sessions SET touched_at = ? WHERE id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def put(self, session_id, context):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, context, touched_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(context), now)
+            )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune(now)
+
+    def prune(self, now=None):
+        """Borra sesiones caducadas y las más antiguas por encima del límite"""
+        now = now or time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE touched_at <= ?", (now - self.ttl_seconds,))
+            conn.execute("""
+                DELETE FROM sessions WHERE id IN (
+                    SELECT id FROM sessions ORDER BY touched_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_sessions,))
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        with self._connect() as conn:
+            sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            'backend': self.backend,
+            'sessions': sessions,
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+
+def open_session_store(backend=None, db_path=None, max_sessions=None, ttl_seconds=None):
+    """
+    Crea el almacén de sesiones según la configuración
+
+    Args:
+        backend: 'memory' (por defecto) o 'sqlite' (EPP_SESSION_BACKEND)
+        db_path: Base de datos para 'sqlite'
+        max_sessions: Máximo de sesiones (EPP_SESSION_MAX)
+        ttl_seconds: Caducidad por inactividad (EPP_SESSION_TTL_MINUTES)
+    """
+    backend = backend or os.environ.get('EPP_SESSION_BACKEND', 'memory')
+    max_sessions = max_sessions or int(os.environ.get('EPP_SESSION_MAX', '10000'))
+    ttl_seconds = ttl_seconds or float(os.environ.get('EPP_SESSION_TTL_MINUTES', '60')) * 60
+    if backend == 'memory':
+        return MemorySessionStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(db_path, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Backend de sesiones desconocido: {backend} (opciones: memory, sqlite)")
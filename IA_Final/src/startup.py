@@ -0,0 +1,112 @@
+import importlib
+import os
+import threading
+import time
+import traceback
+
+
+def heavy_modules(model_path, backend=None):
+    """
+    Módulos pesados que necesita el modelo, en orden de importación
+
+    Un .pt necesita torch y ultralytics; un .onnx solo el runtime de CPU
+    (los backends devuelven Results de NumPy, sin torch).
+    """
+    if str(model_path).endswith('.onnx'):
+        return ['cv2', backend or os.environ.get('EPP_BACKEND', 'onnxruntime')]
+    return ['cv2', 'torch', 'ultralytics']
+
+
+class ModelWarmup:
+    """
+    Arranque del modelo en segundo plano
+
+    ============================================
+    FASES (en un hilo, sin bloquear a uvicorn):
+    ============================================
+    1. importing: importa los módulos pesados (cv2, torch/ultralytics o
+                  el runtime ONNX)
+    2. loading:   carga los pesos (load)
+    3. warming:   inferencia de prueba (warm) para inicializar el
+                  predictor antes de la primera petición real
+    4. ready / failed
+    ============================================
+
+    Mientras tanto la API ya responde: /live siempre y /ready con 503
+    hasta que el estado sea ready.
+    """
+
+    def __init__(self, load, warm=None, imports=()):
+        self.load = load
+        self.warm = warm
+        self.imports = list(imports)
+        self.state = 'pending'
+        self.error = None
+        self.timings = {}
+        self._ready = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        if self._thread is None:
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name='epp-warmup', daemon=True)
+            self._thread.start()
+
+    def _phase(self, state, fn):
+        self.state = state
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    def _import_all(self):
+        imports = {}
+        for name in self.imports:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue  # Opcional (p. ej. openvino sin instalar)
+            imports[name] = time.perf_counter() - start
+        self.timings['imports'] = imports
+
+    def _run(self):
+        try:
+            self.timings['import_seconds'] = self._phase('importing', self._import_all)
+            self.timings['load_seconds'] = self._phase('loading', self.load)
+            if self.warm is not None:
+                self.timings['warmup_seconds'] = self._phase('warming', self.warm)
+            self.timings['ready_seconds'] = time.perf_counter() - self._started
+            self.state = 'ready'
+            self._ready.set()
+            print(f"✅ Modelo listo en {self.timings['ready_seconds']:.1f} s "
+                  f"(imports {self.timings['import_seconds']:.1f} s, "
+                  f"carga {self.timings['load_seconds']:.1f} s, "
+                  f"calentamiento {self.timings.get('warmup_seconds', 0):.1f} s)")
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"❌ Error al preparar el modelo: {str(e)}")
+            traceback.print_exc()
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Espera a que termine (listo o fallido); devuelve si está listo"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'error': self.error,
+            'elapsed_seconds': self.timings.get('ready_seconds', elapsed),
+            'timings': dict(self.timings)
+        }
@@ -0,0 +1,275 @@
+import contextvars
+import json
+import os
+import threading
+import time
+
+
+# Traza activa y span padre del contexto actual (petición / hilo)
+_current_trace = contextvars.ContextVar('epp_trace', default=None)
+_current_parent = contextvars.ContextVar('epp_span_parent', default=None)
+
+
+def _new_id(nbytes=8):
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    """
+    Traza de una petición: lista plana de spans con padre
+
+    Los tiempos se toman con perf_counter y se convierten a tiempo de
+    reloj solo al exportar.
+    """
+
+    def __init__(self, name, **attributes):
+        self.trace_id = _new_id(16)
+        self.root_id = _new_id()
+        self.name = name
+        self.attributes = attributes
+        self.spans = []
+        self._lock = threading.Lock()
+        self._wall_start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._end = None
+
+    def add_span(self, name, start, end, parent_id=None, span_id=None, **attributes):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'span_id': span_id or _new_id(),
+                'parent_id': parent_id or self.root_id,
+                'start': start,
+                'end': end,
+                'attributes': attributes
+            })
+
+    def finish(self):
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def breakdown(self):
+        """Desglose para la respuesta JSON (ms relativos al inicio)"""
+        end = self._end or time.perf_counter()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start'])
+        names = {s['span_id']: s['name'] for s in spans}
+        return {
+            'trace_id': self.trace_id,
+            'total_ms': (end - self._start) * 1000,
+            'spans': [
+                {
+                    'name': s['name'],
+                    'parent': names.get(s['parent_id']),
+                    'start_ms': (s['start'] - self._start) * 1000,
+                    'duration_ms': (s['end'] - s['start']) * 1000,
+                    **s['attributes']
+                }
+                for s in spans
+            ]
+        }
+
+    def server_timing(self):
+        """Encabezado Server-Timing con el total por nombre de span raíz"""
+        totals = {}
+        with self._lock:
+            for s in self.spans:
+                if s['parent_id'] == self.root_id:
+                    totals[s['name']] = totals.get(s['name'], 0) + (s['end'] - s['start']) * 1000
+        return ', '.join(f'{name};dur={ms:.2f}' for name, ms in totals.items())
+
+    def _unix_nano(self, perf_time):
+        return self._wall_start_ns + int((perf_time - self._start) * 1e9)
+
+    def to_otlp(self, service_name='epp-api'):
+        """Traza en formato OTLP/JSON (como el file exporter de OpenTelemetry)"""
+        def attributes(values):
+            return [{'key': k, 'value': {'stringValue': str(v)}} for k, v in values.items()]
+
+        end = self._end or time.perf_counter()
+        with self._lock:
+            spans = list(self.spans)
+        otlp_spans = [{
+            'traceId': self.trace_id,
+            'spanId': self.root_id,
+            'name': self.name,
+            'kind': 2,  # SERVER
+            'startTimeUnixNano': str(self._wall_start_ns),
+            'endTimeUnixNano': str(self._unix_nano(end)),
+            'attributes': attributes(self.attributes)
+        }]
+        for s in spans:
+            otlp_spans.append({
+                'traceId': self.trace_id,
+                'spanId': s['span_id'],
+                'parentSpanId': s['parent_id'],
+                'name': s['name'],
+                'kind': 1,  # INTERNAL
+                'startTimeUnixNano': str(self._unix_nano(s['start'])),
+                'endTimeUnixNano': str(self._unix_nano(s['end'])),
+                'attributes': attributes(s['attributes'])
+            })
+        return {'resourceSpans': [{
+            'resource': {'attributes': attributes({'service.name': service_name})},
+            'scopeSpans': [{'scope': {'name': 'epp.tracing'}, 'spans': otlp_spans}]
+        }]}
+
+
+class TraceGroup:
+    """Varias trazas a la vez: un lote del micro-batcher sirve a varias peticiones"""
+
+    def __init__(self, traces):
+        self.traces = traces
+
+    def add_span(self, name, start, end, parent_id=None, span_id=None, **attributes):
+        for trace in self.traces:
+            trace.add_span(name, start, end, parent_id=parent_id, span_id=span_id, **attributes)
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attributes', 'span_id', 'parent_id', 'token', 'start')
+
+    def __init__(self, trace, name, attributes):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.span_id = _new_id()
+        self.parent_id = _current_parent.get()
+        self.token = _current_parent.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _current_parent.reset(self.token)
+        self.trace.add_span(self.name, self.start, end, parent_id=self.parent_id,
+                            span_id=self.span_id, **self.attributes)
+        return False
+
+
+class _NoopSpan:
+    """Span vacío cuando no hay traza: sin relojes ni asignaciones"""
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+# ============================================
+# API DE INSTRUMENTACIÓN
+# ============================================
+
+def span(name, **attributes):
+    """
+    Mide un bloque: `with span('inference', images=4): ...`
+
+    Si el contexto no tiene traza activa devuelve un objeto vacío
+    compartido, así que el coste con el trazado apagado es una lectura
+    de contextvar.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attributes)
+
+
+def record(name, seconds, **attributes):
+    """Span agregado ya medido (p. ej. tiempo total de una etapa del pipeline)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    end = time.perf_counter()
+    trace.add_span(name, end - seconds, end, parent_id=_current_parent.get(),
+                   aggregated=True, **attributes)
+
+
+def record_since_start(name, **attributes):
+    """Span desde el inicio de la traza hasta ahora (p. ej. lectura del multipart)"""
+    trace = _current_trace.get()
+    if isinstance(trace, Trace):
+        trace.add_span(name, trace._start, time.perf_counter(), **attributes)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+class _Activate:
+    """Activa una traza (o grupo) en el contexto actual mientras dure el bloque"""
+
+    def __init__(self, trace, owns=False):
+        self.trace = trace
+        self.owns = owns
+
+    def __enter__(self):
+        self._tokens = (_current_trace.set(self.trace), _current_parent.set(None))
+        return self.trace
+
+    def __exit__(self, *exc):
+        _current_trace.reset(self._tokens[0])
+        _current_parent.reset(self._tokens[1])
+        if self.owns and self.trace is not None:
+            self.trace.finish()
+        return False
+
+
+def start_trace(name, enabled=True, **attributes):
+    """
+    Abre una traza para el bloque: `with start_trace('POST /x') as trace:`
+
+    Con enabled=False no activa nada y trace es None.
+    """
+    return _Activate(Trace(name, **attributes) if enabled else None, owns=True)
+
+
+def attach(traces):
+    """
+    Reutiliza trazas de otro contexto en este hilo (worker de lotes)
+
+    Los spans del bloque se copian en todas las trazas no nulas.
+    """
+    traces = [t for t in traces if t is not None]
+    if not traces:
+        return _Activate(None)
+    group = traces[0] if len(traces) == 1 else TraceGroup(traces)
+    return _Activate(group)
+
+
+def requested(headers, query_params):
+    """¿La petición pide desglose de tiempos? (X-EPP-Trace: 1 o ?trace=1)"""
+    if TRACE_ALL:
+        return True
+    flag = headers.get('x-epp-trace') or query_params.get('trace')
+    return flag is not None and flag.lower() in ('1', 'true', 'yes')
+
+
+# ============================================
+# EXPORTACIÓN OPCIONAL A ARCHIVO
+# ============================================
+TRACE_ALL = os.environ.get('EPP_TRACE_ALL', '0') == '1'
+EXPORT_PATH = os.environ.get('EPP_TRACE_EXPORT')
+_export_lock = threading.Lock()
+
+
+def export(trace):
+    """Añade la traza como una línea OTLP/JSON a EPP_TRACE_EXPORT (si está definido)"""
+    if trace is None or not EXPORT_PATH:
+        return
+    line = json.dumps(trace.to_otlp())
+    with _export_lock, open(EXPORT_PATH, 'a') as f:
+        f.write(line + '\n')
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+EPP_ITEMS = ['helmet', 'vest', 'gloves', 'goggles', 'boots']
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """IoU entre todas las cajas de a (N,4) y b (M,4) en formato xyxy"""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def greedy_match(iou, threshold):
+    """Empareja filas y columnas por IoU descendente (sin repetir)"""
+    matches = []
+    if iou.size == 0:
+        return matches
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols])
+    used_rows, used_cols = set(), set()
+    for k in order:
+        r, c = int(rows[k]), int(cols[k])
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((r, c))
+    return matches
+
+
+class Track:
+    """Persona seguida entre frames con su estado de EPP acumulado"""
+
+    def __init__(self, track_id, box, score, frame_index):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.score = score
+        self.hits = 1
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.epp = {item: False for item in EPP_ITEMS}
+
+    def predict(self, frame_index):
+        """Caja estimada en frame_index con velocidad constante"""
+        return self.box + self.velocity * (frame_index - self.last_frame)
+
+    def update(self, box, score, frame_index):
+        box = np.asarray(box, dtype=np.float32)
+        gap = frame_index - self.last_frame
+        if gap > 0:
+            # Suavizado exponencial de la velocidad por frame
+            self.velocity = 0.5 * self.velocity + 0.5 * (box - self.box) / gap
+        self.box = box
+        self.score = score
+        self.hits += 1
+        self.last_frame = frame_index
+
+    def mark_epp(self, flags):
+        """Acumula los EPP vistos sobre esta persona (OR entre frames)"""
+        for item, present in flags.items():
+            if present:
+                self.epp[item] = True
+
+    @property
+    def complies(self):
+        return all(self.epp[item] for item in ['helmet', 'vest', 'gloves', 'goggles'])
+
+
+class PersonTracker:
+    """
+    Seguimiento multi-persona por IoU al estilo ByteTrack (solo CPU)
+
+    ============================================
+    ASOCIACIÓN POR FRAME:
+    ============================================
+    1. Cada track predice su caja con velocidad constante hasta el
+       frame actual (cubre los frames que el detector se salta).
+    2. Detecciones de alta confianza se emparejan con todos los tracks.
+    3. Detecciones de baja confianza se emparejan solo con los tracks
+       que quedaron libres (recupera personas parcialmente ocultas).
+    4. Detecciones de alta confianza sin pareja abren un track nuevo.
+    5. Tracks sin actualizar durante max_lost frames se cierran.
+    ============================================
+    """
+
+    def __init__(self, high_thresh=0.5, match_iou=0.3, max_lost=30, min_hits=2):
+        self.high_thresh = high_thresh
+        self.match_iou = match_iou
+        self.max_lost = max_lost
+        self.min_hits = min_hits
+        self.active = []
+        self.tracks = {}  # Todos los tracks vistos, por id
+        self._next_id = 1
+
+    def update(self, boxes, scores, frame_index):
+        """
+        Asocia las detecciones de persona de un frame
+
+        Args:
+            boxes: Array (N, 4) xyxy de personas detectadas
+            scores: Array (N,) de confianzas
+            frame_index: Número de frame
+
+        Returns:
+            list: Track asignado a cada detección (None si no se asignó)
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        assigned = [None] * len(boxes)
+
+        high = [i for i in range(len(boxes)) if scores[i] >= self.high_thresh]
+        low = [i for i in range(len(boxes)) if scores[i] < self.high_thresh]
+
+        predicted = np.array([t.predict(frame_index) for t in self.active]).reshape(-1, 4)
+        free_tracks = list(range(len(self.active)))
+
+        for detections in (high, low):
+            if not detections or not free_tracks:
+                continue
+            iou = iou_matrix(predicted[free_tracks], boxes[detections])
+            matched_tracks = set()
+            for r, c in greedy_match(iou, self.match_iou):
+                track = self.active[free_tracks[r]]
+                det = detections[c]
+                track.update(boxes[det], float(scores[det]), frame_index)
+                assigned[det] = track
+                matched_tracks.add(free_tracks[r])
+            free_tracks = [t for t in free_tracks if t not in matched_tracks]
+
+        for det in high:
+            if assigned[det] is None:
+                track = Track(self._next_id, boxes[det], float(scores[det]), frame_index)
+                self._next_id += 1
+                self.active.append(track)
+                self.tracks[track.track_id] = track
+                assigned[det] = track
+
+        self.active = [t for t in self.active if frame_index - t.last_frame <= self.max_lost]
+        return assigned
+
+    def predicted_boxes(self, frame_index):
+        """Tracks confirmados y su caja estimada para un frame sin inferencia"""
+        return [
+            (t, t.predict(frame_index)) for t in self.active
+            if t.hits >= self.min_hits and t.last_frame < frame_index
+        ]
+
+    def confirmed(self):
+        """
+        Tracks válidos para el resumen por persona
+
+        Se descartan los de menos de min_hits detecciones (falsos
+        positivos de un solo frame); en clips demasiado cortos para
+        confirmar a nadie se usan todos.
+        """
+        confirmed = [t for t in self.tracks.values() if t.hits >= self.min_hits]
+        if not confirmed:
+            confirmed = list(self.tracks.values())
+        return sorted(confirmed, key=lambda t: t.track_id)
+
+
+def draw_tracks(image, track_boxes):
+    """Dibuja id y estado de cada persona seguida (verde cumple, rojo no)"""
+    import cv2
+
+    for track, box in track_boxes:
+        x1, y1, x2, y2 = [int(v) for v in box]
+        color = (0, 255, 0) if track.complies else (0, 0, 255)
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(image, f"ID {track.track_id}", (x1, max(y1 - 8, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return image
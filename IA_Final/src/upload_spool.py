@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import os
+import struct
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Bloque de copia: lo único de la subida que vive en memoria a la vez
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """La subida supera el tamaño máximo permitido (413)"""
+
+
+class UnsupportedContainer(Exception):
+    """La cabecera no corresponde a un contenedor de video conocido (415)"""
+
+
+# ============================================
+# DETECCIÓN DEL CONTENEDOR
+# ============================================
+
+# Cabecera de ASF (.wmv/.asf)
+ASF_GUID = bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c')
+
+
+def _mp4_boxes(header):
+    """Tipos de las cajas de primer nivel que caben en la cabecera leída"""
+    offset = 0
+    while offset + 8 <= len(header):
+        size, box_type = struct.unpack('>I4s', header[offset:offset + 8])
+        if size == 1:
+            if offset + 16 > len(header):
+                yield box_type
+                return
+            size = struct.unpack('>Q', header[offset + 8:offset + 16])[0]
+        yield box_type
+        if size < 8:
+            return  # size 0: la caja llega hasta el final del archivo
+        offset += size
+
+
+def sniff_container(header):
+    """
+    Identifica el contenedor por los primeros bytes de la subida
+
+    Returns:
+        dict: {'format': 'mp4'|'mov'|'avi'|'mkv'|'ts'|'flv'|'mpeg'|'asf'|
+               'ogg'|'y4m' o None,
+               'streamable': True si el índice va delante de los datos
+               (se puede decodificar sin tener el final del archivo),
+               False si va al final, None si no se sabe con esta cabecera}
+    """
+    # Los .mov de QuickTime antiguos no tienen ftyp: empiezan por otra caja
+    if len(header) >= 8 and header[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+        brand = header[8:12] if header[4:8] == b'ftyp' else b'qt  '
+        streamable = None
+        for box_type in _mp4_boxes(header):
+            if box_type in (b'moov', b'moof'):
+                streamable = True
+                break
+            if box_type == b'mdat':
+                streamable = False
+                break
+        return {'format': 'mov' if brand == b'qt  ' else 'mp4', 'streamable': streamable}
+    if header[:4] == b'RIFF' and header[8:12] == b'AVI ':
+        return {'format': 'avi', 'streamable': True}
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return {'format': 'mkv', 'streamable': True}
+    if header[:3] == b'FLV':
+        return {'format': 'flv', 'streamable': True}
+    if len(header) > 376 and header[0] == header[188] == header[376] == 0x47:
+        return {'format': 'ts', 'streamable': True}
+    # MPEG-PS (.mpg/.vob) o secuencia MPEG-1/2 sin contenedor
+    if header[:4] in (b'\x00\x00\x01\xba', b'\x00\x00\x01\xb3'):
+        return {'format': 'mpeg', 'streamable': True}
+    if header[:16] == ASF_GUID:
+        return {'format': 'asf', 'streamable': True}
+    if header[:4] == b'OggS':
+        return {'format': 'ogg', 'streamable': True}
+    if header[:9] == b'YUV4MPEG2':
+        return {'format': 'y4m', 'streamable': True}
+    return {'format': None, 'streamable': None}
+
+
+# ============================================
+# COPIA POR BLOQUES
+# ============================================
+
+def _max_rss_mb():
+    """
+    Pico de memoria residente de todo el proceso desde su arranque (None
+    si no se puede medir); solo crece, no es de una subida concreta
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB en Linux
+
+
+def _write_chunk(f, digest, chunk):
+    f.write(chunk)
+    digest.update(chunk)
+
+
+async def spool_upload(upload, path, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """
+    Copia un UploadFile a disco por bloques de chunk_size
+
+    Nunca tiene más de un bloque en memoria; calcula el sha256 mientras
+    escribe (clave de la caché) y rechaza la subida en cuanto supera
+    max_bytes o si el primer bloque no es un contenedor de video. Si
+    falla, borra lo escrito.
+
+    Returns:
+        dict: bytes, sha256, contenedor y tamaño de bloque, más la memoria
+        (para las estadísticas del trabajo): process_peak_rss_mb es el pico
+        de todo el proceso; peak_rss_growth_mb, cuánto lo subió esta copia
+        (0 si no lo superó; con otras peticiones en paralelo incluye
+        también lo que subieron ellas)
+
+    Raises:
+        UploadTooLarge: Se superó max_bytes
+        UnsupportedContainer: Cabecera no reconocida o archivo vacío
+    """
+    digest = hashlib.sha256()
+    total = 0
+    container = None
+    start = time.perf_counter()
+    rss_before = _max_rss_mb()
+    try:
+        with open(path, 'wb') as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                if container is None:
+                    container = sniff_container(chunk)
+                    if container['format'] is None:
+                        raise UnsupportedContainer("Formato de video no reconocido")
+                total += len(chunk)
+                if max_bytes and total > max_bytes:
+                    raise UploadTooLarge(f"El video supera el máximo de {max_bytes // (1024 * 1024)} MB")
+                await asyncio.to_thread(_write_chunk, f, digest, chunk)
+        if container is None:
+            raise UnsupportedContainer("El archivo está vacío")
+    except BaseException:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    rss_after = _max_rss_mb()
+    return {
+        'bytes': total,
+        'sha256': digest.hexdigest(),
+        'container': container['format'],
+        'streamable': container['streamable'],
+        'chunk_size': chunk_size,
+        'process_peak_rss_mb': rss_after,
+        'peak_rss_growth_mb': rss_after - rss_before if rss_after is not None else None,
+        'seconds': time.perf_counter() - start
+    }
+
+
+# ============================================
+# LÍMITE DURANTE LA RECEPCIÓN
+# ============================================
+
+class BodySizeLimit:
+    """
+    Middleware ASGI que corta cuerpos demasiado grandes mientras llegan
+
+    Con Content-Length responde 413 sin leer el cuerpo; sin él (chunked)
+    cuenta los bytes recibidos y aborta la lectura al pasar max_bytes, así
+    el parser de multipart no termina de volcar la subida a disco.
+    """
+
+    def __init__(self, app, max_bytes, paths):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def _reject(self, send):
+        body = b'{"detail":"El archivo supera el tama\\u00f1o m\\u00e1ximo permitido"}'
+        await send({'type': 'http.response.start', 'status': 413, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'connection', b'close')
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.max_bytes or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope['headers']).get(b'content-length')
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge("Cuerpo de la petición demasiado grande")
+            return message
+
+        async def guarded_send(message):
+            # Tras cortar la lectura, la respuesta (413) la envía el middleware
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._reject(send)
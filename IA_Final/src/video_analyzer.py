@@ -1,7 +1,13 @@
-from ultralytics import YOLO
 import cv2
 import os
 
+import tracing
+from model_registry import registry
+from video_pipeline import VideoPipeline
+from video_writer import open_video_writer
+from frame_sampler import AdaptiveFrameSampler, person_class_id
+from video_stats import ViolationTimeline
+
 
 class VideoEPPAnalyzer:
     """
@@ -15,15 +21,29 @@ class VideoEPPAnalyzer:
     ============================================
     """
     
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-        self.violations = []
+    def __init__(self, model_path, device=None, batch_size=4, adaptive_sampling=True):
+        self.model = registry.acquire(model_path, device)
+        self._predict_lock = registry.lock_for(model_path, device)
+        # Violaciones por tramos (no por frame): memoria constante en videos largos
+        self.violations = ViolationTimeline(fps=0)
         self.compliant_frames = 0
         self.total_frames = 0
-        print(f"✅ Modelo cargado: {model_path}")
+        self.pipeline_stats = None
+        self.encoder_stats = None
+        self.batch_size = batch_size
+        self.adaptive_sampling = adaptive_sampling
+        self.sampling_stats = None
     
-    def analyze_video(self, video_path, output_dir=None):
-        """Analiza video completo y genera reporte"""
+    def analyze_video(self, video_path, output_dir=None, batch_size=None):
+        """
+        Analiza video completo y genera reporte
+        
+        Args:
+            video_path: Ruta del video a analizar
+            output_dir: Carpeta de salida (opcional)
+            batch_size: Frames por llamada a predict (por defecto el del analizador)
+        """
+        batch_size = batch_size or self.batch_size
         
         # Si no se especifica output_dir, crear uno por defecto
         if output_dir is None:
@@ -48,9 +68,9 @@ class VideoEPPAnalyzer:
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         total_frames_video = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
-        # Usar codec mp4v para compatibilidad
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        # H.264 vía ffmpeg (MP4 fragmentado); OpenCV mp4v como respaldo
+        out = open_video_writer(output_path, fps, (width, height), codecs=('mp4v',))
+        output_path = out.path
         
         # Verificar que el writer se abrió correctamente
         if not out.isOpened():
@@ -58,22 +78,35 @@ class VideoEPPAnalyzer:
             cap.release()
             return None
         
+        self.violations.fps = fps
+        
         print(f"\n📹 Procesando: {video_path}")
         print(f"🎬 FPS: {fps} | Resolución: {width}x{height} | Frames: {total_frames_video}")
         print(f"💾 Salida: {output_path}")
         print("⏳ Procesando frames...")
         
-        frame_count = 0
+        # Frames sin movimiento reutilizan las detecciones del último inferido
+        sampler = None
+        if self.adaptive_sampling:
+            sampler = AdaptiveFrameSampler(person_class_id=person_class_id(self.model.names))
+        last_results = None
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Detectar EPP
-            results = self.model.predict(frame, conf=0.25, verbose=False)[0]
+        def infer_batch(frames):
+            """Etapa de inferencia: un predict por lote de frames"""
+            with self._predict_lock:
+                batch_results = self.model.predict(frames, conf=0.25, verbose=False)
+            if sampler is not None:
+                for results in batch_results:
+                    sampler.observe(results)
+            return batch_results
+        
+        def handle_frame(frame_count, frame, results):
+            """Etapa de anotación: cumplimiento + overlay del frame"""
+            nonlocal last_results
+            carried = results is None
+            if carried:
+                results = last_results
+            last_results = results
             
             # Contar detecciones por clase
             detections = {}
@@ -101,21 +134,18 @@ class VideoEPPAnalyzer:
             
             if complies:
                 self.compliant_frames += 1
-            else:
-                if persons > 0:  # Solo registrar si hay personas
-                    self.violations.append({
-                        'frame': frame_count,
-                        'time': frame_count / fps,
-                        'persons': persons,
-                        'helmets': helmets,
-                        'vests': vests,
-                        'gloves': gloves,
-                        'goggles': goggles,
-                        'boots': boots
-                    })
+            # Solo es violación si hay personas; cualquier otro frame cierra el tramo
+            self.violations.observe(frame_count, {
+                'persons': persons,
+                'helmets': helmets,
+                'vests': vests,
+                'gloves': gloves,
+                'goggles': goggles,
+                'boots': boots
+            } if not complies and persons > 0 else None)
             
-            # Dibujar detecciones
-            annotated_frame = results.plot()
+            # Dibujar detecciones (sobre el frame actual si son arrastradas)
+            annotated_frame = results.plot(img=frame) if carried else results.plot()
             
             # Agregar overlay con estado
             status_text = "CUMPLE" if complies else "VIOLACION"
@@ -148,19 +178,38 @@ class VideoEPPAnalyzer:
                 2
             )
             
-            # Escribir frame procesado
-            out.write(annotated_frame)
-            
             # Progreso cada segundo
-            if frame_count % fps == 0:
+            if fps > 0 and frame_count % fps == 0 and total_frames_video > 0:
                 progress = (frame_count / total_frames_video) * 100
                 print(f"   {progress:.1f}% completado ({frame_count}/{total_frames_video} frames)")
+            
+            return annotated_frame
         
-        self.total_frames = frame_count
+        # Decodificación, inferencia y anotación+escritura en hilos solapados
+        pipeline = VideoPipeline(
+            infer_batch,
+            handle_frame,
+            out,
+            batch_size=batch_size,
+            should_infer=sampler.should_infer if sampler else None,
+            revisit=sampler.revisit if sampler else None
+        )
+        try:
+            with tracing.span("pipeline"):
+                self.pipeline_stats = pipeline.run(cap)
+                for stage, stage_stats in self.pipeline_stats['stages'].items():
+                    tracing.record(stage, stage_stats['busy_seconds'], frames=stage_stats['frames'])
+        finally:
+            # Cerrar archivos
+            cap.release()
+            with tracing.span("encoder_flush"):
+                out.release()
+        self.violations.finish()
+        frame_count = self.pipeline_stats['frames']
+        self.encoder_stats = out.stats()
+        self.sampling_stats = sampler.stats() if sampler else None
         
-        # Cerrar archivos
-        cap.release()
-        out.release()
+        self.total_frames = frame_count
         
         # Verificar que el archivo se creó
         if os.path.exists(output_path):
@@ -195,22 +244,38 @@ class VideoEPPAnalyzer:
         print(f"\n📈 ESTADÍSTICAS GENERALES:")
         print(f"   ├─ Total de frames procesados: {self.total_frames}")
         print(f"   ├─ Frames con cumplimiento: {self.compliant_frames} ({compliance_rate:.2f}%)")
-        print(f"   ├─ Frames con violaciones: {len(self.violations)} ({violation_rate:.2f}%)")
+        print(f"   ├─ Frames con violaciones: {self.violations.frames} ({violation_rate:.2f}%)")
         print(f"   └─ Tasa de cumplimiento: {'✅ ALTA' if compliance_rate > 80 else '⚠️ MEDIA' if compliance_rate > 50 else '❌ BAJA'}")
         
-        if self.violations:
-            print(f"\n⚠️  VIOLACIONES DETECTADAS ({len(self.violations)} frames):")
-            print(f"   Mostrando primeras 10 violaciones:")
-            print(f"   {'Frame':<8} {'Tiempo':<10} {'Pers':<6} {'Casco':<7} {'Chaleco':<9} {'Guantes':<9} {'Gafas'}")
-            print(f"   {'-'*65}")
+        if self.pipeline_stats:
+            stages = self.pipeline_stats['stages']
+            print(f"\n⚡ RENDIMIENTO ({self.pipeline_stats['fps']:.1f} fps totales):")
+            print(f"   ├─ Decodificación: {stages['decode']['fps']:.1f} fps")
+            print(f"   ├─ Inferencia:     {stages['inference']['fps']:.1f} fps")
+            print(f"   ├─ Anotación:      {stages['annotate']['fps']:.1f} fps")
+            print(f"   └─ Codificación:   {self.encoder_stats['fps']:.1f} fps ({self.encoder_stats['backend']})")
+        
+        if self.sampling_stats:
+            print(f"\n🎯 MUESTREO ADAPTATIVO:")
+            print(f"   ├─ Frames inferidos: {self.sampling_stats['inferred_frames']}")
+            print(f"   └─ Frames omitidos (sin cambios): {self.sampling_stats['skipped_frames']}")
+        
+        if self.violations.frames:
+            longest = self.violations.longest.items()
+            print(f"\n⚠️  VIOLACIONES DETECTADAS ({self.violations.frames} frames en {len(self.violations)} tramos):")
+            print(f"   Tramos más largos (mínimo de EPP visto en cada tramo):")
+            print(f"   {'Frames':<14} {'Tiempo':<18} {'Pers':<6} {'Casco':<7} {'Chaleco':<9} {'Guantes':<9} {'Gafas'}")
+            print(f"   {'-'*75}")
             
-            for i, v in enumerate(self.violations[:10], 1):
-                print(f"   {v['frame']:<8} {v['time']:.2f}s{' '*4} "
+            for v in longest:
+                frames = f"{v['start_frame']}-{v['end_frame']}"
+                span_time = f"{v['start_time']:.2f}-{v['end_time']:.2f}s"
+                print(f"   {frames:<14} {span_time:<18} "
                       f"{v['persons']:<6} {v['helmets']:<7} {v['vests']:<9} "
-                      f"{v.get('gloves', 0):<9} {v.get('goggles', 0)}")
+                      f"{v['gloves']:<9} {v['goggles']}")
             
-            if len(self.violations) > 10:
-                print(f"   ... y {len(self.violations) - 10} violaciones más")
+            if len(self.violations) > len(longest):
+                print(f"   ... y {len(self.violations) - len(longest)} tramos más")
         else:
             print(f"\n✅ ¡EXCELENTE! No se detectaron violaciones de EPP")
         
@@ -0,0 +1,307 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+
+class JobQueueFull(Exception):
+    """Demasiados trabajos pendientes: la API responde 503 con Retry-After"""
+
+
+class JobStore:
+    """
+    Almacén persistente de trabajos de video (SQLite local)
+
+    Guarda estado, progreso y resultado de cada trabajo para que un
+    reinicio del servidor no pierda la cola.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    output_filename TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    frames_processed INTEGER NOT NULL DEFAULT 0,
+                    total_frames INTEGER NOT NULL DEFAULT 0,
+                    fps REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_output ON jobs (output_filename)")
+
+    @contextmanager
+    def _connect(self):
+        """Conexión por operación: confirma la transacción y se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_dict(row):
+        keys = ['id', 'status', 'input_path', 'output_filename', 'params',
+                'frames_processed', 'total_frames', 'fps', 'result', 'error',
+                'created_at', 'started_at', 'finished_at']
+        job = dict(zip(keys, row))
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def create(self, input_path, output_filename, params=None, result=None, max_pending=None):
+        """
+        Inserta un trabajo en cola, o ya completado si se pasa result
+
+        Con max_pending, el conteo de pendientes y el INSERT van en la
+        misma transacción (BEGIN IMMEDIATE): ni otros hilos ni otros
+        workers de uvicorn pueden colarse entre ambos.
+
+        Raises:
+            JobQueueFull: Ya hay max_pending trabajos en cola o en curso
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        stats = (result or {}).get('stats', {})
+        frames = stats.get('processed_frames', 0)
+        with self._lock, self._connect() as conn:
+            if max_pending is not None:
+                conn.execute("BEGIN IMMEDIATE")
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+                ).fetchone()[0]
+                if pending >= max_pending:
+                    raise JobQueueFull(f"Cola de videos llena ({max_pending} trabajos pendientes)")
+            conn.execute(
+                "INSERT INTO jobs (id, status, input_path, output_filename, params, "
+                "frames_processed, total_frames, result, created_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, 'queued' if result is None else 'completed', str(input_path),
+                 output_filename, json.dumps(params or {}), frames,
+                 stats.get('total_frames', frames),
+                 json.dumps(result) if result is not None else None,
+                 now, None if result is None else now)
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def claim_next(self):
+        """Toma el trabajo en cola más antiguo y lo marca como 'running'"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (time.time(), row[0])
+            )
+        job = self._row_to_dict(row)
+        job['status'] = 'running'
+        return job
+
+    def update_progress(self, job_id, frames_processed, total_frames, fps):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET frames_processed = ?, total_frames = ?, fps = ? WHERE id = ?",
+                (frames_processed, total_frames, fps, job_id)
+            )
+
+    def finish(self, job_id, result):
+        # El escritor puede cambiar el nombre final (.avi de respaldo)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, finished_at = ?, "
+                "output_filename = COALESCE(?, output_filename) WHERE id = ?",
+                (json.dumps(result), time.time(), result.get('processed_video_path'), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_interrupted(self):
+        """Vuelve a encolar los trabajos que quedaron a medias en un reinicio"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', frames_processed = 0, fps = 0, "
+                "started_at = NULL WHERE status = 'running'"
+            )
+            return cursor.rowcount
+
+    def active_files(self):
+        """(entrada, salida) de los trabajos en cola o en ejecución"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT input_path, output_filename FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+
+    def expire(self, finished_before, removed_outputs=()):
+        """
+        Borra trabajos terminados (completados o fallidos)
+
+        Args:
+            finished_before: Los terminados antes de este instante (epoch)
+            removed_outputs: Nombres de video que la retención ya borró;
+                             sus trabajos completados apuntarían a un 404
+
+        Returns:
+            int: Trabajos borrados
+        """
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?",
+                (finished_before,)
+            ).rowcount
+            for output_filename in removed_outputs:
+                deleted += conn.execute(
+                    "DELETE FROM jobs WHERE status = 'completed' AND output_filename = ?",
+                    (output_filename,)
+                ).rowcount
+        return deleted
+
+    def count(self, *statuses):
+        placeholders = ', '.join('?' for _ in statuses)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})", statuses
+            ).fetchone()[0]
+
+
+class VideoJobManager:
+    """
+    Cola de trabajos de video procesada en segundo plano
+
+    process_fn(input_path, output_filename, progress, **params) debe
+    devolver (stats, output_filename) y llamar progress(frames, total)
+    a medida que avanza.
+    """
+
+    def __init__(self, store, process_fn, workers=1, max_pending=16, progress_every=30):
+        self.store = store
+        self.process_fn = process_fn
+        self.workers = workers
+        self.max_pending = max_pending
+        self.progress_every = progress_every
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Recupera trabajos interrumpidos y arranca los workers"""
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            print(f"🔁 {requeued} trabajo(s) de video reencolados tras reinicio")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"epp-video-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wakeup.set()
+
+    def submit(self, input_path, output_filename, params=None):
+        """
+        Encola un video y devuelve el id del trabajo
+
+        Raises:
+            JobQueueFull: Ya hay max_pending trabajos pendientes
+        """
+        job_id = self.store.create(input_path, output_filename, params, max_pending=self.max_pending)
+        self._wakeup.set()
+        return job_id
+
+    def record_completed(self, output_filename, result, params=None):
+        """Registra un trabajo ya resuelto (p. ej. desde la caché) sin encolarlo"""
+        return self.store.create('', output_filename, params, result=result)
+
+    def status(self, job_id):
+        """Vista pública del trabajo: progreso, fps, ETA y resultado"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+
+        total = job['total_frames']
+        done = job['frames_processed']
+        eta = None
+        if job['status'] == 'running' and job['fps'] > 0 and total > 0:
+            eta = max(total - done, 0) / job['fps']
+
+        view = {
+            "job_id": job['id'],
+            "status": job['status'],
+            "frames_processed": done,
+            "total_frames": total,
+            "progress": (done / total) * 100 if total > 0 else 0,
+            "fps": job['fps'],
+            "eta_seconds": eta
+        }
+        if job['status'] == 'completed':
+            view.update(job['result'])
+        elif job['status'] == 'failed':
+            view["success"] = False
+            view["error"] = job['error']
+        return view
+
+    def _worker(self):
+        while True:
+            job = self.store.claim_next()
+            if job is None:
+                self._wakeup.wait(timeout=5)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job['id']
+        started = time.perf_counter()
+
+        def progress(frames_processed, total_frames):
+            if frames_processed % self.progress_every != 0:
+                return
+            elapsed = time.perf_counter() - started
+            fps = frames_processed / elapsed if elapsed > 0 else 0
+            self.store.update_progress(job_id, frames_processed, total_frames, fps)
+
+        try:
+            stats, output_filename = self.process_fn(
+                job['input_path'], job['output_filename'], progress, **job['params']
+            )
+            elapsed = time.perf_counter() - started
+            frames = stats.get("processed_frames", 0)
+            self.store.update_progress(
+                job_id, frames, stats.get("total_frames", frames),
+                frames / elapsed if elapsed > 0 else 0
+            )
+            self.store.finish(job_id, {
+                "success": True,
+                "stats": stats,
+                "processed_video_path": output_filename
+            })
+        except Exception as e:
+            print(f"❌ Error en trabajo de video {job_id}: {str(e)}")
+            traceback.print_exc()
+            self.store.fail(job_id, str(e))
+        finally:
+            if job['input_path'] and os.path.exists(job['input_path']):
+                os.unlink(job['input_path'])
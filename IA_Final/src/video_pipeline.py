@@ -0,0 +1,235 @@
+import queue
+import threading
+import time
+
+
+_END = object()
+
+
+class PipelineStage:
+    """Contador de frames y tiempo ocupado de una etapa"""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'busy_seconds': self.busy,
+            'fps': self.frames / self.busy if self.busy > 0 else 0
+        }
+
+
+class VideoPipeline:
+    """
+    Pipeline de video por etapas con colas acotadas
+
+    ============================================
+    ETAPAS:
+    ============================================
+    1. Decodificación (hilo propio): cap.read()
+    2. Inferencia (hilo propio): agrupa frames en lotes de batch_size
+       y llama infer_batch(frames) -> lista de resultados
+    3. Anotación + codificación (hilo propio):
+       handle_frame(indice, frame, resultado) -> frame anotado,
+       que se escribe con writer.write(). Anotación y escritura se
+       miden por separado ('annotate' y 'encode'); con FFmpegWriter la
+       codificación real ocurre en el proceso ffmpeg.
+    ============================================
+
+    Las etapas se solapan, así que los fps totales quedan limitados por
+    la etapa más lenta y no por la suma de todas. Los frames llegan a la
+    etapa 3 en orden; los que should_infer descarta pasan con
+    resultado None.
+
+    Con lotes, should_infer decide toda una ventana antes de ver el
+    resultado de su primer frame. Tras cada lote, revisit(indice, frame)
+    puede recuperar frames saltados de esa ventana a la vista de los
+    resultados (p. ej. entró una persona); se infieren en un lote extra
+    antes de emitir la ventana.
+    """
+
+    def __init__(self, infer_batch, handle_frame, writer, batch_size=1,
+                 queue_size=16, should_infer=None, revisit=None):
+        self.infer_batch = infer_batch
+        self.handle_frame = handle_frame
+        self.writer = writer
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(queue_size, self.batch_size)
+        self.should_infer = should_infer or (lambda index, frame: True)
+        self.revisit = revisit
+
+        self.decode = PipelineStage('decode')
+        self.inference = PipelineStage('inference')
+        self.annotate = PipelineStage('annotate')
+        self.encode = PipelineStage('encode')
+        self.batches = 0
+        self.revisited = 0
+        self._error = None
+        self._stop = threading.Event()
+
+    # ============================================
+    # UTILIDADES DE COLAS
+    # ============================================
+
+    def _put(self, q, item):
+        """put bloqueante que se rinde si otra etapa falló"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    # ============================================
+    # ETAPAS
+    # ============================================
+
+    def _decode_stage(self, cap, out_q):
+        try:
+            index = 0
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                self.decode.busy += time.perf_counter() - start
+                if not ret:
+                    break
+                index += 1
+                self.decode.frames += 1
+                if not self._put(out_q, (index, frame)):
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _END)
+
+    def _infer(self, window, positions):
+        start = time.perf_counter()
+        batch_results = self.infer_batch([window[i][1] for i in positions])
+        self.inference.busy += time.perf_counter() - start
+        self.inference.frames += len(positions)
+        self.batches += 1
+        return dict(zip(positions, batch_results))
+
+    def _flush(self, window, out_q):
+        """Infiere los frames pendientes del lote y emite la ventana en orden"""
+        to_infer = [i for i, (_, _, needs) in enumerate(window) if needs]
+        results = {}
+        if to_infer:
+            results = self._infer(window, to_infer)
+            # Resultados ya observados: recuperar frames saltados si hace falta
+            if self.revisit is not None:
+                extra = [
+                    i for i, (index, frame, needs) in enumerate(window)
+                    if not needs and self.revisit(index, frame)
+                ]
+                if extra:
+                    results.update(self._infer(window, extra))
+                    self.revisited += len(extra)
+        for i, (index, frame, _) in enumerate(window):
+            if not self._put(out_q, (index, frame, results.get(i))):
+                return False
+        return True
+
+    def _inference_stage(self, in_q, out_q):
+        try:
+            window = []
+            pending = 0
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                index, frame = item
+                needs = self.should_infer(index, frame)
+                window.append((index, frame, needs))
+                pending += needs
+                if pending >= self.batch_size or len(window) >= self.queue_size:
+                    if not self._flush(window, out_q):
+                        return
+                    window, pending = [], 0
+            if window and not self._stop.is_set():
+                self._flush(window, out_q)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _END)
+
+    def _encode_stage(self, in_q):
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                index, frame, result = item
+                start = time.perf_counter()
+                annotated = self.handle_frame(index, frame, result)
+                annotated_at = time.perf_counter()
+                self.writer.write(annotated)
+                self.annotate.busy += annotated_at - start
+                self.annotate.frames += 1
+                self.encode.busy += time.perf_counter() - annotated_at
+                self.encode.frames += 1
+        except Exception as e:
+            self._fail(e)
+
+    # ============================================
+    # EJECUCIÓN
+    # ============================================
+
+    def run(self, cap):
+        """Procesa el video completo y devuelve estadísticas por etapa"""
+        decoded_q = queue.Queue(maxsize=self.queue_size)
+        inferred_q = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._decode_stage, args=(cap, decoded_q),
+                             name='epp-decode', daemon=True),
+            threading.Thread(target=self._inference_stage, args=(decoded_q, inferred_q),
+                             name='epp-inference', daemon=True),
+            threading.Thread(target=self._encode_stage, args=(inferred_q,),
+                             name='epp-encode', daemon=True),
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        if self._error is not None:
+            raise self._error
+
+        return self.stats(wall)
+
+    def stats(self, wall_seconds):
+        return {
+            'frames': self.encode.frames,
+            'wall_seconds': wall_seconds,
+            'fps': self.encode.frames / wall_seconds if wall_seconds > 0 else 0,
+            'batch_size': self.batch_size,
+            'batches': self.batches,
+            'revisited_frames': self.revisited,
+            'stages': {
+                'decode': self.decode.stats(),
+                'inference': self.inference.stats(),
+                'annotate': self.annotate.stats(),
+                'encode': self.encode.stats()
+            }
+        }
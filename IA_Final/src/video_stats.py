@@ -0,0 +1,166 @@
+import heapq
+import math
+
+
+# ============================================
+# ESTADÍSTICAS EN STREAMING PARA VIDEOS LARGOS
+# ============================================
+# Memoria O(clases + intervalos) sin importar la duración del video:
+# nada se guarda por detección ni por frame.
+
+class RunningMean:
+    """Media y varianza incrementales (Welford), numéricamente estables"""
+
+    __slots__ = ('count', 'mean', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class DetectionStats:
+    """
+    Conteo y confianza media por clase, acumulados detección a detección
+
+    Las clases se listan en el orden en que aparecen por primera vez (el
+    mismo que tenía el diccionario de listas de confianzas al que
+    sustituye).
+    """
+
+    def __init__(self):
+        self._classes = {}
+        self.total = 0
+
+    def add(self, class_name, confidence):
+        stats = self._classes.get(class_name)
+        if stats is None:
+            stats = self._classes[class_name] = RunningMean()
+        stats.add(confidence)
+        self.total += 1
+
+    def counts(self):
+        return {name: stats.count for name, stats in self._classes.items()}
+
+    def summary(self, limit=None):
+        """
+        Returns:
+            list: [{'class', 'confidence'}] con la confianza media por clase
+        """
+        items = [
+            {'class': name, 'confidence': stats.mean}
+            for name, stats in self._classes.items()
+        ]
+        return items[:limit] if limit is not None else items
+
+
+class TopK:
+    """
+    Los k elementos de mayor clave vistos hasta ahora (montículo de tamaño k)
+
+    Cada add es O(log k) y la memoria nunca pasa de k elementos; ante
+    empate se conserva el que llegó primero.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seen = 0
+
+    def add(self, key, item):
+        # -seen: a igual clave, el más antiguo es "mayor" y no se descarta
+        entry = (key, -self._seen, item)
+        self._seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """Elementos de mayor a menor clave"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class ViolationTimeline:
+    """
+    Violaciones codificadas por tramos (run-length) en lugar de por frame
+
+    Frames con violación consecutivos forman un intervalo con su inicio,
+    fin, número de frames, máximo de personas y el mínimo de cada EPP
+    visto (el peor momento del tramo). Un frame sin violación cierra el
+    tramo abierto. Los top_k intervalos más largos se guardan aparte
+    para el reporte.
+    """
+
+    ITEMS = ('helmets', 'vests', 'gloves', 'goggles', 'boots')
+
+    def __init__(self, fps, top_k=10):
+        self.fps = fps
+        self.intervals = []
+        self.frames = 0
+        self.longest = TopK(top_k)
+        self._open = None
+
+    def observe(self, frame, counts=None):
+        """
+        Args:
+            frame: Número de frame (creciente)
+            counts: dict con 'persons' y los conteos de ITEMS si el frame
+                    es una violación; None si no lo es
+        """
+        if counts is None:
+            self._close()
+            return
+
+        self.frames += 1
+        interval = self._open
+        if interval is not None and frame == interval['end_frame'] + 1:
+            interval['end_frame'] = frame
+            interval['end_time'] = frame / self.fps if self.fps else 0.0
+            interval['frames'] += 1
+            interval['persons'] = max(interval['persons'], counts['persons'])
+            for item in self.ITEMS:
+                interval[item] = min(interval[item], counts.get(item, 0))
+            return
+
+        self._close()
+        time = frame / self.fps if self.fps else 0.0
+        self._open = {
+            'start_frame': frame,
+            'end_frame': frame,
+            'start_time': time,
+            'end_time': time,
+            'frames': 1,
+            'persons': counts['persons'],
+            **{item: counts.get(item, 0) for item in self.ITEMS}
+        }
+        self.intervals.append(self._open)
+
+    def _close(self):
+        if self._open is not None:
+            self.longest.add(self._open['frames'], self._open)
+            self._open = None
+
+    def finish(self):
+        """Cierra el tramo abierto al terminar el video"""
+        self._close()
+
+    def __len__(self):
+        return len(self.intervals)
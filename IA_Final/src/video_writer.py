@@ -0,0 +1,205 @@
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+
+def _x264_arguments(size, fps, preset, crf, threads):
+    """Entrada BGR cruda por stdin y salida H.264 (común a escritor y prueba)"""
+    width, height = size
+    return [
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps),
+        '-i', '-',
+        '-an', '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+        '-threads', str(threads), '-pix_fmt', 'yuv420p'
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def probe_ffmpeg(ffmpeg, preset='veryfast', threads=0):
+    """
+    Codifica un frame de prueba con los mismos argumentos que FFmpegWriter
+
+    Detecta un ffmpeg sin libx264 o que rechaza el preset antes de abrir
+    el escritor real (si no, el fallo llegaría como una tubería rota en
+    el primer write). Se ejecuta una vez por binario y preset.
+
+    Returns:
+        tuple: (funciona, mensaje de error)
+    """
+    size = (64, 64)
+    command = [ffmpeg, '-hide_banner', '-loglevel', 'error'] + \
+        _x264_arguments(size, 30, preset, 23, threads) + ['-frames:v', '1', '-f', 'null', '-']
+    try:
+        completed = subprocess.run(
+            command, input=bytes(size[0] * size[1] * 3),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return False, str(e)
+    return completed.returncode == 0, completed.stderr.decode(errors='replace').strip()
+
+
+class FFmpegWriter:
+    """
+    Codificador H.264 en un proceso ffmpeg alimentado por tubería
+
+    Los frames BGR se escriben en crudo por stdin; ffmpeg codifica en sus
+    propios hilos con un preset rápido de x264, así la codificación no
+    compite con el GIL ni bloquea la etapa de anotación. La salida es MP4
+    fragmentado: se puede reproducir mientras todavía se escribe.
+    """
+
+    backend = 'ffmpeg'
+
+    def __init__(self, path, fps, size, preset='veryfast', crf=23, threads=0, ffmpeg='ffmpeg'):
+        self.path = str(path)
+        self.size = size
+        self.preset = preset
+        self.frames = 0
+        self._started = None
+        self._finished = None
+        command = [ffmpeg, '-y', '-loglevel', 'error'] + _x264_arguments(size, fps, preset, crf, threads) + [
+            '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+            self.path
+        ]
+        # stderr a un archivo: una tubería sin leer se llena y bloquea a ffmpeg
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._stderr
+        )
+
+    def isOpened(self):
+        return self._process.poll() is None
+
+    def write(self, frame):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if frame.shape[1::-1] != self.size:
+            import cv2
+
+            frame = cv2.resize(frame, self.size)
+        try:
+            self._process.stdin.write(frame.tobytes())
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg terminó inesperadamente: {self._error_output()}")
+        self.frames += 1
+
+    def _error_output(self):
+        self._process.wait()
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors='replace').strip()
+
+    def release(self):
+        """Cierra la tubería y espera a que ffmpeg termine de escribir"""
+        if self._finished is not None:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._process.wait()
+        self._finished = time.perf_counter()
+        try:
+            if returncode != 0:
+                raise RuntimeError(f"ffmpeg falló ({returncode}): {self._error_output()}")
+        finally:
+            self._stderr.close()
+
+    def stats(self):
+        seconds = (self._finished or time.perf_counter()) - (self._started or time.perf_counter())
+        return {
+            'backend': self.backend,
+            'preset': self.preset,
+            'frames': self.frames,
+            'seconds': seconds,
+            'fps': self.frames / seconds if seconds > 0 else 0
+        }
+
+
+class OpenCVWriter:
+    """
+    Respaldo con cv2.VideoWriter cuando ffmpeg no está disponible
+
+    Prueba los codecs en orden; si ninguno abre con la ruta pedida usa
+    XVID en .avi (mismo comportamiento que tenía la API).
+    """
+
+    backend = 'opencv'
+
+    def __init__(self, path, fps, size, codecs=('avc1', 'mp4v')):
+        import cv2
+
+        self.path = str(path)
+        self.frames = 0
+        self.seconds = 0.0
+        self.codec = None
+        for codec in codecs:
+            self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*codec), fps, size)
+            if self._writer.isOpened():
+                self.codec = codec
+                return
+        self.path = os.path.splitext(self.path)[0] + '.avi'
+        self.codec = 'XVID'
+        self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*'XVID'), fps, size)
+
+    def isOpened(self):
+        return self._writer.isOpened()
+
+    def write(self, frame):
+        start = time.perf_counter()
+        self._writer.write(frame)
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def release(self):
+        start = time.perf_counter()
+        self._writer.release()
+        self.seconds += time.perf_counter() - start
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'codec': self.codec,
+            'frames': self.frames,
+            'seconds': self.seconds,
+            'fps': self.frames / self.seconds if self.seconds > 0 else 0
+        }
+
+
+def open_video_writer(path, fps, size, encoder=None, preset=None, threads=None, codecs=('avc1', 'mp4v')):
+    """
+    Abre el mejor escritor disponible para un video de salida
+
+    Args:
+        path: Ruta del video (.mp4); el respaldo OpenCV puede cambiarla a .avi
+        fps, size: Cuadros por segundo y (ancho, alto)
+        encoder: 'ffmpeg', 'opencv' o 'auto' (por defecto EPP_VIDEO_ENCODER)
+        preset: Preset de x264 (por defecto EPP_X264_PRESET o 'veryfast')
+        threads: Hilos de ffmpeg (por defecto EPP_X264_THREADS; 0 = automático)
+        codecs: Codecs a probar con OpenCV
+
+    Returns:
+        FFmpegWriter u OpenCVWriter; la ruta final está en writer.path
+    """
+    encoder = encoder or os.environ.get('EPP_VIDEO_ENCODER', 'auto')
+    preset = preset or os.environ.get('EPP_X264_PRESET', 'veryfast')
+    if threads is None:
+        threads = int(os.environ.get('EPP_X264_THREADS', '0'))
+    fps = fps if fps and fps > 0 else 30
+
+    ffmpeg = shutil.which('ffmpeg')
+    if encoder != 'opencv' and ffmpeg:
+        works, error = probe_ffmpeg(ffmpeg, preset, threads)
+        if works:
+            writer = FFmpegWriter(path, fps, size, preset=preset, threads=threads, ffmpeg=ffmpeg)
+            if writer.isOpened():
+                return writer
+            error = writer._error_output()
+        print(f"⚠️ ffmpeg no puede codificar H.264 ({error or 'sin detalle'}), usando OpenCV")
+    elif encoder == 'ffmpeg':
+        print("⚠️ ffmpeg no encontrado en PATH, usando OpenCV")
+
+    return OpenCVWriter(path, fps, size, codecs=codecs)
@@ -0,0 +1,32 @@
+# Pruebas de IA_Final. Ejecuta desde IA_Final con: python -m pytest -q
+# Los módulos de src se importan igual que en api.py (sys.path plano).
+# hypothesis es opcional: sin él, las pruebas de propiedades usan casos
+# aleatorios con semilla fija.
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / 'src'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def api_module(tmp_path_factory):
+    """
+    api.py importado con processed/ temporal, sin caché de resultados y
+    con un límite de subida de 1 MB
+
+    No se ejecutan los eventos de startup (TestClient sin 'with'): el
+    modelo nunca se carga y las pruebas sustituyen lo que necesiten.
+    """
+    os.environ['EPP_PROCESSED_DIR'] = str(tmp_path_factory.mktemp('processed'))
+    os.environ['EPP_CACHE'] = '0'
+    os.environ['EPP_MAX_UPLOAD_MB'] = '1'
+    return importlib.import_module('api')
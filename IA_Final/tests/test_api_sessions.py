@@ -0,0 +1,102 @@
+# Contexto del chatbot por sesión: la imagen analizada por un cliente
+# llega a su chatbot (cookie epp_session / X-Session-Id) y no al de otro.
+
+import pytest
+from fastapi.testclient import TestClient
+
+from session_store import SESSION_COOKIE
+
+DETAILS = {
+    'total_persons': 2,
+    'total_detections': 3,
+    'summary': {'compliant': 1, 'non_compliant': 1},
+    'compliance_results': [
+        {'person_id': 1, 'complies': True, 'missing_items': [], 'has_helmet': True, 'has_vest': True},
+        {'person_id': 2, 'complies': False, 'missing_items': ['Casco'], 'has_vest': True},
+    ]
+}
+DETECTIONS = [
+    {'class': 'Person', 'confidence': 0.9, 'box': [0, 0, 10, 20]},
+    {'class': 'Person', 'confidence': 0.8, 'box': [20, 0, 30, 20]},
+    {'class': 'vest', 'confidence': 0.7, 'box': [0, 5, 10, 12]},
+]
+COMPLIANCE = {
+    'compliant': True,
+    'message': '✅ 1 personas cumplen / ❌ 1 no cumplen',
+    'total_persons': 2,
+    'missing_items': [{'person_id': 2, 'missing': ['Casco']}],
+    'details': DETAILS
+}
+
+
+@pytest.fixture
+def api(api_module, monkeypatch):
+    async def fake_run(contents, output_path):
+        return b'jpeg', DETECTIONS, COMPLIANCE
+
+    monkeypatch.setattr(api_module, '_require_model', lambda: None)
+    monkeypatch.setattr(api_module.batcher, 'run', fake_run)
+    return api_module
+
+
+def upload(client):
+    return client.post('/api/detect/image', files={'file': ('a.jpg', b'imagen', 'image/jpeg')})
+
+
+def ask(client, message):
+    response = client.post('/api/chatbot', json={'message': message})
+    assert response.status_code == 200
+    return response.json()['response']
+
+
+def test_detect_image_sets_session_cookie_and_header(api):
+    response = upload(TestClient(api.app))
+
+    assert response.status_code == 200
+    session_id = response.headers['X-Session-Id']
+    assert response.cookies[SESSION_COOKIE] == session_id
+    assert api.sessions.get(session_id)['missing_items'] == COMPLIANCE['missing_items']
+
+
+def test_image_then_chatbot_uses_own_session(api):
+    client = TestClient(api.app)
+    upload(client)
+
+    assert 'Persona 2' in ask(client, '¿qué le falta?')
+    # Intención con contexto del chatbot, respondida con el análisis de la sesión
+    assert 'CUMPLIMIENTO PARCIAL' in ask(client, '¿cumple la norma?')
+    assert 'Personas: 2' in ask(client, '¿qué detectaste?')
+
+
+def test_report_intent_returns_session_summary(api):
+    # 'todo' es la intención 'reporte' del chatbot de consola: en la API
+    # devuelve el resumen del análisis, no imprime en el servidor
+    client = TestClient(api.app)
+    upload(client)
+
+    answer = ask(client, 'todo')
+    assert 'REPORTE COMPLETO' in answer
+    assert 'Persona 2: NO CUMPLE' in answer
+
+
+def test_generic_word_does_not_override_specific_answer(api):
+    client = TestClient(api.app)
+    upload(client)
+
+    assert 'CASCO' in ask(client, '¿qué tipos de casco hay?').upper()
+    assert 'Personas: 2' not in ask(client, '¿qué tipos de casco hay?')
+
+
+def test_other_client_has_no_context(api):
+    upload(TestClient(api.app))
+    stranger = TestClient(api.app)
+
+    assert 'Persona 2' not in ask(stranger, '¿qué le falta?')
+    assert 'CUMPLIMIENTO' not in ask(stranger, '¿cumple la norma?')
+
+
+def test_session_header_without_cookie(api):
+    session_id = upload(TestClient(api.app)).headers['X-Session-Id']
+
+    client = TestClient(api.app, headers={'X-Session-Id': session_id})
+    assert 'Persona 2' in ask(client, '¿qué le falta?')
@@ -0,0 +1,136 @@
+# associate (NumPy) debe dar exactamente lo mismo que el bucle original
+# de check_overlap, persona por persona y clase por clase.
+
+import numpy as np
+import pytest
+
+from association import associate
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:  # hypothesis es opcional
+    st = None
+
+CLASSES = ['helmet', 'vest', 'boots', 'goggles', 'gloves']
+
+
+def loop_overlap(person_box, item_boxes, threshold=0.3):
+    """Copia de EPPComplianceChecker.check_overlap antes de vectorizar"""
+    if len(item_boxes) == 0:
+        return False
+    px1, py1, px2, py2 = person_box
+    for item in item_boxes:
+        ix1, iy1, ix2, iy2 = item
+        x1 = max(px1, ix1)
+        y1 = max(py1, iy1)
+        x2 = min(px2, ix2)
+        y2 = min(py2, iy2)
+        if x2 > x1 and y2 > y1:
+            intersection = (x2 - x1) * (y2 - y1)
+            item_area = (ix2 - ix1) * (iy2 - iy1)
+            if intersection / item_area > threshold:
+                return True
+    return False
+
+
+def loop_association(person_boxes, items_by_class, threshold=0.3):
+    return {
+        name: [loop_overlap(person, boxes, threshold) for person in person_boxes]
+        for name, boxes in items_by_class.items()
+    }
+
+
+def assert_matches_loop(person_boxes, items_by_class, threshold=0.3):
+    expected = loop_association(person_boxes, items_by_class, threshold)
+    actual = associate(person_boxes, items_by_class, threshold)
+    assert set(actual) == set(expected)
+    for name in expected:
+        assert actual[name].dtype == bool
+        assert list(actual[name]) == expected[name], name
+
+
+# ============================================
+# CASOS LÍMITE
+# ============================================
+
+def test_zero_persons():
+    flags = associate([], {'helmet': [[0, 0, 10, 10]], 'vest': []})
+    assert {name: len(v) for name, v in flags.items()} == {'helmet': 0, 'vest': 0}
+
+
+def test_zero_items():
+    persons = [[0, 0, 10, 10], [5, 5, 20, 20]]
+    assert_matches_loop(persons, {name: [] for name in CLASSES})
+    assert_matches_loop(persons, {})
+
+
+def test_some_classes_empty():
+    persons = [[0, 0, 10, 10], [50, 50, 60, 60]]
+    assert_matches_loop(persons, {'helmet': [], 'vest': [[1, 1, 4, 4]], 'gloves': [], 'boots': [[52, 52, 55, 58]]})
+
+
+@pytest.mark.parametrize('item', [
+    [10, 0, 20, 10],  # Comparte el borde derecho
+    [0, 10, 10, 20],  # Comparte el borde inferior
+    [10, 10, 20, 20],  # Solo toca la esquina
+    [-5, -5, 0, 0],  # Toca la esquina opuesta desde fuera
+])
+def test_touching_edges_do_not_overlap(item):
+    persons = [[0, 0, 10, 10]]
+    assert_matches_loop(persons, {'helmet': [item]})
+    assert not associate(persons, {'helmet': [item]})['helmet'][0]
+
+
+def test_threshold_is_strict():
+    # El item cae justo un 30 % dentro: el bucle exige > threshold
+    persons = [[0, 0, 10, 10]]
+    items = {'helmet': [[7, 0, 17, 10]]}
+    assert_matches_loop(persons, items)
+    assert not associate(persons, items)['helmet'][0]
+
+
+def test_item_inside_person():
+    assert_matches_loop([[0, 0, 100, 200]], {'vest': [[20, 50, 80, 120]]})
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int64])
+def test_array_inputs_and_dtypes(dtype):
+    persons = np.array([[0, 0, 10, 10], [8, 8, 30, 30]], dtype=dtype)
+    items = {'helmet': np.array([[2, 2, 6, 6], [9, 9, 12, 12]], dtype=dtype), 'vest': np.zeros((0, 4), dtype=dtype)}
+    assert_matches_loop(persons, items)
+
+
+# ============================================
+# PROPIEDAD: associate == bucle en escenas aleatorias
+# ============================================
+
+def random_boxes(rng, count, grid=20, max_size=10):
+    """Rejilla pequeña de enteros: muchos bordes compartidos y contactos"""
+    xy = rng.integers(0, grid, size=(count, 2))
+    wh = rng.integers(0, max_size, size=(count, 2))
+    return np.concatenate([xy, xy + wh], axis=1).astype(np.float64)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_scenes_match_loop(seed):
+    rng = np.random.default_rng(seed)
+    persons = random_boxes(rng, int(rng.integers(0, 8)))
+    items = {name: random_boxes(rng, int(rng.integers(0, 6))) for name in CLASSES}
+    threshold = float(rng.choice([0.0, 0.3, 0.5, 0.99]))
+    assert_matches_loop(persons, items, threshold)
+
+
+if st is not None:
+    coordinate = st.integers(min_value=0, max_value=30)
+    box = st.tuples(coordinate, coordinate, st.integers(0, 12), st.integers(0, 12)).map(
+        lambda b: [b[0], b[1], b[0] + b[2], b[1] + b[3]]
+    )
+
+    @settings(max_examples=500, deadline=None)
+    @given(
+        persons=st.lists(box, max_size=6),
+        items=st.dictionaries(st.sampled_from(CLASSES), st.lists(box, max_size=5)),
+        threshold=st.sampled_from([0.0, 0.3, 0.5, 0.99])
+    )
+    def test_hypothesis_matches_loop(persons, items, threshold):
+        assert_matches_loop(persons, items, threshold)
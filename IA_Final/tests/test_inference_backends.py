@@ -0,0 +1,108 @@
+# Backends ONNX sin torch: pre/post-proceso y Results de NumPy con la
+# misma interfaz que usan el checker y la API. _infer se sustituye por
+# una salida cruda fija, así no hace falta onnxruntime ni un .onnx.
+
+import sys
+
+import numpy as np
+import pytest
+
+from compliance_checker import EPPComplianceChecker
+from inference_backends import InferenceBackend, Results
+from model_registry import registry
+
+NAMES = {0: 'helmet', 1: 'gloves', 2: 'vest', 3: 'boots', 4: 'goggles', 5: 'none', 6: 'Person'}
+
+
+class FixedOutputBackend(InferenceBackend):
+    """Backend de prueba: devuelve siempre las mismas anclas (cx, cy, w, h, scores)"""
+
+    name = 'fixed'
+
+    def __init__(self, anchors, imgsz=64, dynamic_shape=False):
+        self.model_path = 'fixed.onnx'
+        self.threads = None
+        self.names, self.imgsz = NAMES, imgsz
+        self.fixed_batch = None
+        self.dynamic_shape = dynamic_shape
+        self._warned_sizes = set()
+        self.anchors = anchors
+        self.sizes = []
+
+    def _infer(self, batch):
+        self.sizes.append(batch.shape[-1])
+        raw = np.zeros((len(batch), 4 + len(NAMES), len(self.anchors)), dtype=np.float32)
+        for a, (box, class_id, score) in enumerate(self.anchors):
+            raw[:, :4, a] = box
+            raw[:, 4 + class_id, a] = score
+        return raw
+
+
+# Una persona con casco y chaleco; dos cascos casi iguales (NMS)
+ANCHORS = [
+    ((32, 32, 20, 40), 6, 0.9),
+    ((32, 16, 8, 6), 0, 0.8),
+    ((32, 16, 8, 6.5), 0, 0.7),
+    ((32, 34, 14, 14), 2, 0.6),
+]
+
+
+@pytest.fixture
+def image():
+    return np.zeros((64, 64, 3), dtype=np.uint8)
+
+
+def test_predict_returns_numpy_results(image):
+    backend = FixedOutputBackend(ANCHORS)
+    (result,) = backend.predict(image, conf=0.25)
+
+    assert isinstance(result, Results)
+    assert 'torch' not in sys.modules
+    assert len(result.boxes) == 3  # El casco duplicado cae en el NMS
+    assert sorted(int(box.cls[0]) for box in result.boxes) == [0, 2, 6]
+    assert result.boxes.xyxy.cpu().numpy().shape == (3, 4)
+    assert set(result.speed) == {'preprocess', 'inference', 'postprocess'}
+
+
+def test_results_indexing_update_and_plot(image):
+    (result,) = FixedOutputBackend(ANCHORS).predict(image)
+
+    subset = result[np.array([0])]
+    assert len(subset) == 1 and subset.orig_shape == (64, 64)
+
+    moved = result.new()
+    moved.update(boxes=np.array([[-5, 10, 80, 20, 0.5, 6]]))
+    assert moved.boxes.xyxy.tolist() == [[0, 10, 64, 20]]
+
+    plotted = result.plot()
+    assert plotted.shape == image.shape and plotted.any()
+    assert not image.any()  # plot no modifica el original
+
+
+def test_static_export_warns_on_other_imgsz(image):
+    backend = FixedOutputBackend(ANCHORS, imgsz=64)
+    with pytest.warns(RuntimeWarning, match='entrada fija'):
+        backend.predict(image, imgsz=32)
+    assert backend.sizes == [64]
+
+
+def test_dynamic_export_uses_imgsz(image):
+    backend = FixedOutputBackend(ANCHORS, imgsz=64, dynamic_shape=True)
+    backend.predict(image, imgsz=100)
+    assert backend.sizes == [128]  # Redondeado al stride
+
+
+@pytest.mark.filterwarnings('ignore:.*entrada fija')  # Cascada a 416/320 sobre export de 64
+@pytest.mark.parametrize('cascade', [False, True])
+def test_checker_runs_on_numpy_results(image, cascade):
+    path = f'fixed://backend-{cascade}'
+    registry.register(path, FixedOutputBackend(ANCHORS))
+    checker = EPPComplianceChecker(path, cascade=cascade)
+
+    (result,) = checker.predict([image])
+    annotated, detections, compliance = checker.annotate_results(result, 'test', display_conf=0.5)
+
+    assert annotated.shape == image.shape
+    assert {d['class'] for d in detections} == {'Person', 'helmet', 'vest'}
+    assert compliance['total_persons'] == 1
+    assert 'torch' not in sys.modules
@@ -0,0 +1,39 @@
+# Enrutado de intenciones del chatbot: el contexto habilita las reglas
+# sobre la imagen, pero una palabra genérica no tapa a una específica.
+
+import pytest
+
+from chatbot_final import ROUTER
+from intent_router import Intent, IntentRouter
+
+
+@pytest.mark.parametrize('message, context, intent', [
+    ('¿cumple con la norma?', True, 'cumplimiento'),
+    ('¿cumple con la norma?', False, None),
+    ('¿qué detectaste?', True, 'detecciones'),
+    ('¿qué hay en la imagen?', True, 'detecciones'),
+    ('¿qué tipos de casco hay?', True, 'cascos'),
+    ('¿viste los guantes?', True, 'guantes'),
+    ('todo bien?', True, 'reporte'),
+    ('todo bien?', False, None),
+    ('ayuda', True, 'ayuda'),
+])
+def test_chatbot_routes(message, context, intent):
+    assert ROUTER.route(message, context=context) == intent
+
+
+def test_weak_keyword_loses_to_any_normal_keyword():
+    router = IntentRouter([
+        Intent('generica', weak_keywords=['hay']),
+        Intent('especifica', ['casco']),
+    ])
+    assert router.route('hay casco') == 'especifica'
+    assert router.route('hay algo') == 'generica'
+
+
+def test_weak_keyword_order_between_weak_rules():
+    router = IntentRouter([
+        Intent('primera', weak_keywords=['todo']),
+        Intent('segunda', weak_keywords=['todo bien']),
+    ])
+    assert router.route('todo bien') == 'primera'
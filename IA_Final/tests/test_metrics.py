@@ -0,0 +1,52 @@
+# Registro de métricas propio y middleware de latencia de la API.
+
+import pytest
+from fastapi.testclient import TestClient
+
+from metrics import Counter, Histogram, MetricsRegistry, _Metric
+from percentiles import percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.5) == 0
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric('x', 'doc')
+
+
+def test_counter_renders_total_per_series():
+    registry = MetricsRegistry()
+    counter = registry.counter('epp_test_errors', 'Errores de prueba', ['route'])
+    counter.labels('/a').inc()
+    counter.labels('/a').inc(2)
+
+    assert isinstance(counter, Counter)
+    assert 'epp_test_errors_total{route="/a"} 3.0' in registry.render()
+
+
+def test_histogram_percentiles():
+    histogram = Histogram('epp_test_seconds', 'Prueba')
+    for value in (0.1, 0.2, 0.3, 0.4):
+        histogram.observe(value)
+    assert histogram.percentiles() == {'p50': 0.2, 'p95': 0.4, 'p99': 0.4, 'count': 4}
+
+
+def test_latency_recorded_when_endpoint_raises(api_module, monkeypatch):
+    def broken():
+        raise RuntimeError('fallo de prueba')
+
+    monkeypatch.setattr(api_module.sessions, 'stats', broken)
+    before = api_module.REQUEST_LATENCY.percentiles('GET', '/api/stats', 500)['count']
+
+    client = TestClient(api_module.app, raise_server_exceptions=False)
+    assert client.get('/api/stats').status_code == 500
+
+    assert api_module.REQUEST_LATENCY.percentiles('GET', '/api/stats', 500)['count'] == before + 1
+    assert 'epp_http_request_exceptions_total{method="GET",route="/api/stats"}' in \
+        api_module.metrics.render()
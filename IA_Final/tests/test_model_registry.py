@@ -0,0 +1,81 @@
+# La carga de un modelo (segundos) no bloquea el registro: /api/health
+# responde durante el arranque en segundo plano.
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from model_registry import ModelRegistry, registry
+
+
+class SlowLoad:
+    """_load de prueba que espera hasta release() (máximo 5 s)"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        self.calls = 0
+
+    def __call__(self, model_path, device):
+        self.calls += 1
+        self.started.set()
+        self.finish.wait(5)
+        return object()
+
+
+def start_loading(reg, path, slow_load):
+    thread = threading.Thread(target=reg.get, args=(path,), daemon=True)
+    thread.start()
+    assert slow_load.started.wait(5)
+    return thread
+
+
+def test_loaded_does_not_wait_for_load(monkeypatch):
+    reg = ModelRegistry()
+    slow_load = SlowLoad()
+    monkeypatch.setattr(reg, '_load', slow_load)
+    thread = start_loading(reg, 'slow.pt', slow_load)
+
+    start = time.perf_counter()
+    assert reg.loaded() == []
+    assert time.perf_counter() - start < 0.5
+
+    slow_load.finish.set()
+    thread.join(5)
+    assert [m['refs'] for m in reg.loaded()] == [0]
+
+
+def test_concurrent_get_loads_once(monkeypatch):
+    reg = ModelRegistry()
+    slow_load = SlowLoad()
+    monkeypatch.setattr(reg, '_load', slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reg.get('slow.pt'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert slow_load.started.wait(5)
+    slow_load.finish.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert slow_load.calls == 1
+    assert len(results) == 4 and len({id(m) for m in results}) == 1
+
+
+def test_health_responds_while_model_loads(api_module, monkeypatch):
+    slow_load = SlowLoad()
+    monkeypatch.setattr(registry, '_load', slow_load)
+    path = 'slow-health.pt'
+    thread = start_loading(registry, path, slow_load)
+    try:
+        start = time.perf_counter()
+        response = TestClient(api_module.app).get('/api/health')
+        elapsed = time.perf_counter() - start
+    finally:
+        slow_load.finish.set()
+        thread.join(5)
+        registry.release(path)
+
+    assert response.status_code == 200
+    assert elapsed < 1
@@ -0,0 +1,64 @@
+# La caché indexa artefactos de processed/ pero nunca los borra: eso es
+# trabajo de RetentionManager.
+
+import os
+
+from result_cache import ResultCache
+
+
+def make_artifact(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b'x' * size)
+    return path
+
+
+def test_put_keeps_artifact_larger_than_limit(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_disk_bytes=4000)
+    video = make_artifact(tmp_path, 'processed.mp4', 5000)
+
+    cache.put('k', {'processed_video_path': video.name}, [video])
+
+    assert video.exists()
+    assert cache.get('k') == {'processed_video_path': video.name}
+
+
+def test_put_never_evicts_the_new_entry(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_disk_bytes=1)
+    cache.put('old', {'n': 1})
+    cache.put('new', {'n': 2})
+
+    assert cache.get('new') == {'n': 2}
+    assert cache.get('old') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_eviction_drops_index_but_not_artifacts(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_disk_bytes=1)
+    first = make_artifact(tmp_path, 'a.jpg', 10)
+    second = make_artifact(tmp_path, 'b.jpg', 10)
+
+    cache.put('a', {'image': 'a.jpg'}, [first])
+    cache.put('b', {'image': 'b.jpg'}, [second])
+
+    assert cache.get('a') is None
+    assert first.exists() and second.exists()
+    assert not (tmp_path / 'cache' / 'a.json').exists()
+
+
+def test_entry_without_artifact_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path / 'cache')
+    image = make_artifact(tmp_path, 'a.jpg', 10)
+    cache.put('a', {'image': 'a.jpg'}, [image])
+
+    # La retención borró el archivo: la entrada ya no sirve
+    os.unlink(image)
+    assert cache.get('a') is None
+    assert cache.stats()['disk_entries'] == 0
+
+
+def test_index_survives_restart(tmp_path):
+    image = make_artifact(tmp_path, 'a.jpg', 10)
+    ResultCache(tmp_path / 'cache').put('a', {'image': 'a.jpg'}, [image])
+
+    reopened = ResultCache(tmp_path / 'cache')
+    assert reopened.get('a') == {'image': 'a.jpg'}
@@ -0,0 +1,19 @@
+# Límite de tamaño de subida de videos en la API: el 413 sale por dentro
+# de CORS, así el navegador puede leerlo.
+
+from fastapi.testclient import TestClient
+
+ORIGIN = 'http://localhost:5173'
+
+
+def test_oversized_upload_gets_413_with_cors_headers(api_module):
+    client = TestClient(api_module.app)
+    response = client.post(
+        '/api/detect/video',
+        files={'file': ('big.mp4', b'\0' * (api_module.MAX_UPLOAD_BYTES + 1), 'video/mp4')},
+        headers={'Origin': ORIGIN}
+    )
+
+    assert response.status_code == 413
+    assert response.headers['access-control-allow-origin'] == ORIGIN
+    assert response.headers['access-control-expose-headers'] == 'X-Session-Id'
@@ -0,0 +1,64 @@
+# Copia por bloques de subidas de video: contenedor reconocido por la
+# cabecera y memoria informada por subida.
+
+import asyncio
+import io
+
+import pytest
+
+from upload_spool import UnsupportedContainer, sniff_container, spool_upload
+
+MP4_HEADER = b'\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2' + b'\x00\x00\x00\x08moov'
+
+
+class FakeUpload:
+    """Lo que spool_upload usa de un UploadFile: read(n) asíncrono"""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    async def read(self, size):
+        return self._data.read(size)
+
+
+def spool(tmp_path, data, **kwargs):
+    return asyncio.run(spool_upload(FakeUpload(data), tmp_path / 'upload', **kwargs))
+
+
+def test_spool_reports_process_peak_and_growth(tmp_path):
+    stats = spool(tmp_path, MP4_HEADER + b'\x00' * 5000, chunk_size=1024)
+
+    assert stats['bytes'] == len(MP4_HEADER) + 5000
+    assert stats['container'] == 'mp4' and stats['streamable'] is True
+    if stats['process_peak_rss_mb'] is not None:
+        # Bloques de 1 KB: la copia no sube el pico del proceso
+        assert 0 <= stats['peak_rss_growth_mb'] < 1
+    assert 'process_max_rss_mb' not in stats
+
+
+def test_unknown_header_is_rejected_and_removed(tmp_path):
+    with pytest.raises(UnsupportedContainer):
+        spool(tmp_path, b'esto no es un video' * 10)
+    assert not (tmp_path / 'upload').exists()
+
+
+def test_sniff_mp4():
+    assert sniff_container(MP4_HEADER) == {'format': 'mp4', 'streamable': True}
+
+
+@pytest.mark.parametrize('header, container', [
+    (b'\x00\x00\x01\xba\x44\x00\x04\x00\x04\x01', 'mpeg'),
+    (b'\x00\x00\x01\xb3\x16\x00\xf0\x15', 'mpeg'),
+    (bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c') + b'\x00' * 8, 'asf'),
+    (b'OggS\x00\x02' + b'\x00' * 20, 'ogg'),
+    (b'YUV4MPEG2 W64 H48 F30:1', 'y4m'),
+    (b'RIFF\x00\x00\x00\x00AVI LIST', 'avi'),
+    (b'\x1a\x45\xdf\xa3\x01\x00', 'mkv'),
+])
+def test_sniff_formats_opencv_decodes(header, container):
+    assert sniff_container(header)['format'] == container
+
+
+def test_sniff_quicktime_without_ftyp():
+    header = b'\x00\x00\x00\x08wide\x00\x00\x00\x08moov'
+    assert sniff_container(header) == {'format': 'mov', 'streamable': True}
@@ -0,0 +1,49 @@
+# Cola de trabajos de video: el límite max_pending se respeta aunque
+# varios workers (cada uno con su JobStore) encolen a la vez.
+
+import threading
+
+import pytest
+
+from video_jobs import JobQueueFull, JobStore, VideoJobManager
+
+
+def test_submit_rejects_when_full(tmp_path):
+    manager = VideoJobManager(JobStore(tmp_path / 'jobs.db'), process_fn=None, max_pending=2)
+    manager.submit('a.mp4', 'a_out.mp4')
+    manager.submit('b.mp4', 'b_out.mp4')
+
+    with pytest.raises(JobQueueFull):
+        manager.submit('c.mp4', 'c_out.mp4')
+    assert manager.store.count('queued') == 2
+
+
+def test_concurrent_submits_never_exceed_max_pending(tmp_path):
+    db_path = tmp_path / 'jobs.db'
+    # Un JobStore por hilo: como procesos distintos, sin lock compartido
+    managers = [VideoJobManager(JobStore(db_path), process_fn=None, max_pending=5) for _ in range(16)]
+    barrier = threading.Barrier(len(managers))
+    accepted, rejected = [], []
+
+    def submit(manager, i):
+        barrier.wait()
+        try:
+            accepted.append(manager.submit(f'{i}.mp4', f'{i}_out.mp4'))
+        except JobQueueFull:
+            rejected.append(i)
+
+    threads = [threading.Thread(target=submit, args=(m, i)) for i, m in enumerate(managers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(accepted) == 5 and len(rejected) == 11
+    assert JobStore(db_path).count('queued', 'running') == 5
+
+
+def test_completed_records_do_not_count(tmp_path):
+    manager = VideoJobManager(JobStore(tmp_path / 'jobs.db'), process_fn=None, max_pending=1)
+    manager.record_completed('cached.mp4', {'success': True})
+    manager.submit('a.mp4', 'a_out.mp4')
+    assert manager.store.count('completed') == 1
@@ -0,0 +1,78 @@
+# Pipeline de video con muestreo adaptativo: cuando entra una persona, los
+# frames siguientes se infieren aunque el lote ya se hubiera decidido.
+
+import numpy as np
+import pytest
+
+from frame_sampler import AdaptiveFrameSampler
+from video_pipeline import VideoPipeline
+
+PERSON = 6
+ENTERS_AT = 40
+TOTAL = 80
+
+
+class FakeCapture:
+    """Escena quieta; en ENTERS_AT cambia (movimiento) y aparece una persona"""
+
+    def __init__(self):
+        self.index = 0
+
+    def read(self):
+        if self.index >= TOTAL:
+            return False, None
+        self.index += 1
+        value = 200 if self.index >= ENTERS_AT else 0
+        return True, np.full((36, 64, 3), value, dtype=np.uint8)
+
+
+class FakeBoxes:
+    def __init__(self, classes):
+        self.cls = np.array(classes)
+
+
+class FakeResult:
+    def __init__(self, persons):
+        self.boxes = FakeBoxes([PERSON] * persons)
+
+
+class FakeWriter:
+    def write(self, frame):
+        pass
+
+
+def run(batch_size):
+    sampler = AdaptiveFrameSampler(person_class_id=PERSON)
+    inferred = []
+
+    def infer_batch(frames):
+        results = [FakeResult(1 if frame[0, 0, 0] else 0) for frame in frames]
+        for result in results:
+            sampler.observe(result)
+        return results
+
+    def handle_frame(index, frame, result):
+        if result is not None:
+            inferred.append(index)
+        return frame
+
+    pipeline = VideoPipeline(infer_batch, handle_frame, FakeWriter(), batch_size=batch_size,
+                             should_infer=sampler.should_infer, revisit=sampler.revisit)
+    stats = pipeline.run(FakeCapture())
+    assert stats['frames'] == TOTAL
+    assert sampler.inferred == len(inferred)
+    return inferred
+
+
+@pytest.mark.parametrize('batch_size', [1, 4, 8])
+def test_person_entry_is_sampled_every_frame(batch_size):
+    inferred = run(batch_size)
+
+    # Latencia de reacción nula: la entrada y los `burst` frames siguientes
+    assert {ENTERS_AT, ENTERS_AT + 1, ENTERS_AT + 2, ENTERS_AT + 3} <= set(inferred)
+
+
+def test_batched_sampling_matches_sequential_after_entry():
+    sequential = [i for i in run(1) if i >= ENTERS_AT]
+    batched = [i for i in run(8) if i >= ENTERS_AT]
+    assert batched[:4] == sequential[:4] == [40, 41, 42, 43]
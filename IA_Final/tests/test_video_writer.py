@@ -0,0 +1,76 @@
+# Elección de escritor de video con ejecutables ffmpeg falsos en el PATH:
+# sin libx264 debe caer a OpenCV antes del primer frame, y un ffmpeg que
+# escribe mucho por stderr no debe bloquear la codificación.
+
+import os
+import stat
+import sys
+
+import numpy as np
+import pytest
+
+import video_writer
+from video_writer import FFmpegWriter, OpenCVWriter, open_video_writer
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='ffmpeg falso en shell')
+
+
+def fake_ffmpeg(tmp_path, monkeypatch, body):
+    """Instala un 'ffmpeg' de shell en el PATH y limpia la caché de la prueba"""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    script = bin_dir / 'ffmpeg'
+    script.write_text('#!/bin/sh\n' + body)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    video_writer.probe_ffmpeg.cache_clear()
+    return str(script)
+
+
+def test_missing_libx264_falls_back_to_opencv(tmp_path, monkeypatch, capsys):
+    fake_ffmpeg(tmp_path, monkeypatch, 'cat > /dev/null\necho "Unknown encoder \'libx264\'" >&2\nexit 1\n')
+
+    writer = open_video_writer(tmp_path / 'out.mp4', 30, (64, 48), encoder='auto')
+
+    assert isinstance(writer, OpenCVWriter)
+    assert "Unknown encoder 'libx264'" in capsys.readouterr().out
+    writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+
+
+def test_working_ffmpeg_is_used(tmp_path, monkeypatch):
+    # Copia stdin a la salida (último argumento) para simular el encode
+    fake_ffmpeg(tmp_path, monkeypatch, 'for last; do :; done\n[ "$last" = "-" ] && last=/dev/null\ncat > "$last"\n')
+
+    writer = open_video_writer(tmp_path / 'out.mp4', 30, (64, 48), encoder='auto')
+    assert isinstance(writer, FFmpegWriter)
+    for _ in range(3):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+
+    assert writer.stats()['frames'] == 3
+    assert os.path.getsize(tmp_path / 'out.mp4') == 3 * 64 * 48 * 3
+
+
+def test_chatty_stderr_does_not_block(tmp_path, monkeypatch):
+    # Más de lo que cabe en una tubería (64 KB) por cada bloque leído
+    script = fake_ffmpeg(tmp_path, monkeypatch, f'''exec {sys.executable} -c "
+import sys
+while sys.stdin.buffer.read(9216):
+    sys.stderr.write('x' * 100000)
+    sys.stderr.flush()
+"
+''')
+    writer = FFmpegWriter(tmp_path / 'out.mp4', 30, (64, 48), ffmpeg=script)
+    for _ in range(20):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+    assert writer.frames == 20
+
+
+def test_probe_runs_once_per_binary(tmp_path, monkeypatch):
+    script = fake_ffmpeg(tmp_path, monkeypatch, 'echo run >> "$(dirname "$0")/calls"\ncat > /dev/null\n')
+
+    for _ in range(3):
+        assert video_writer.probe_ffmpeg(script, 'veryfast', 0) == (True, '')
+    assert (tmp_path / 'bin' / 'calls').read_text().count('run') == 1